@@ -0,0 +1,55 @@
+"""
+Add inventory movement ledger columns
+"""
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision = '65ae9a470463'
+down_revision = 'aff9544ade85'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # Link items to a product and location; enforce non-negative stock
+    with op.batch_alter_table('inventory_items') as batch_op:
+        batch_op.add_column(sa.Column('product_id', sa.Integer(), nullable=True))
+        batch_op.add_column(sa.Column('location_id', sa.Integer(), nullable=True))
+        batch_op.create_foreign_key('inventory_items_product_id_fkey', 'products', ['product_id'], ['id'])
+        batch_op.create_foreign_key('inventory_items_location_id_fkey', 'locations', ['location_id'], ['id'])
+        batch_op.create_check_constraint('ck_inventory_items_quantity_non_negative', 'quantity >= 0')
+
+    # Ledger rows reference the item moved; items need not have a product
+    with op.batch_alter_table('inventory_movements') as batch_op:
+        batch_op.add_column(sa.Column('inventory_item_id', sa.Integer(), nullable=True))
+        batch_op.add_column(sa.Column('transfer_item_id', sa.Integer(), nullable=True))
+        batch_op.add_column(sa.Column('balance_after', sa.Integer(), nullable=True))
+        batch_op.alter_column('product_id', existing_type=sa.Integer(), nullable=True)
+        batch_op.create_foreign_key(
+            'inventory_movements_inventory_item_id_fkey', 'inventory_items',
+            ['inventory_item_id'], ['id'], ondelete='SET NULL'
+        )
+        batch_op.create_foreign_key(
+            'inventory_movements_transfer_item_id_fkey', 'inventory_items',
+            ['transfer_item_id'], ['id'], ondelete='SET NULL'
+        )
+        batch_op.create_index('ix_inventory_movements_inventory_item_id_id', ['inventory_item_id', 'id'])
+
+
+def downgrade():
+    with op.batch_alter_table('inventory_movements') as batch_op:
+        batch_op.drop_index('ix_inventory_movements_inventory_item_id_id')
+        batch_op.drop_constraint('inventory_movements_transfer_item_id_fkey', type_='foreignkey')
+        batch_op.drop_constraint('inventory_movements_inventory_item_id_fkey', type_='foreignkey')
+        batch_op.alter_column('product_id', existing_type=sa.Integer(), nullable=False)
+        batch_op.drop_column('balance_after')
+        batch_op.drop_column('transfer_item_id')
+        batch_op.drop_column('inventory_item_id')
+
+    with op.batch_alter_table('inventory_items') as batch_op:
+        batch_op.drop_constraint('ck_inventory_items_quantity_non_negative', type_='check')
+        batch_op.drop_constraint('inventory_items_location_id_fkey', type_='foreignkey')
+        batch_op.drop_constraint('inventory_items_product_id_fkey', type_='foreignkey')
+        batch_op.drop_column('location_id')
+        batch_op.drop_column('product_id')
@@ -0,0 +1,28 @@
+"""
+Add version columns behind the inventory listing ETags
+"""
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision = '9b8c66d1dfd4'
+down_revision = 'ea0358daae13'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # The server default fills existing rows
+    op.add_column('inventories', sa.Column('version', sa.Integer(), server_default='1', nullable=False))
+    op.add_column('inventory_items', sa.Column('version', sa.Integer(), server_default='1', nullable=False))
+    op.create_index(
+        'ix_inventory_items_inventory_id_version', 'inventory_items', ['inventory_id', 'version', 'id']
+    )
+
+
+def downgrade():
+    op.drop_index('ix_inventory_items_inventory_id_version', table_name='inventory_items')
+    with op.batch_alter_table('inventory_items') as batch_op:
+        batch_op.drop_column('version')
+    with op.batch_alter_table('inventories') as batch_op:
+        batch_op.drop_column('version')
@@ -0,0 +1,35 @@
+"""
+Add stock checkpoints table
+"""
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision = 'ea0358daae13'
+down_revision = '65ae9a470463'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table(
+        'stock_checkpoints',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('inventory_item_id', sa.Integer(), nullable=False),
+        sa.Column('movement_id', sa.Integer(), nullable=False),
+        sa.Column('quantity', sa.Integer(), nullable=False),
+        sa.Column('taken_at', sa.DateTime(timezone=True), nullable=False),
+        sa.ForeignKeyConstraint(['inventory_item_id'], ['inventory_items.id'], ondelete='CASCADE'),
+        sa.PrimaryKeyConstraint('id'),
+        sa.UniqueConstraint('inventory_item_id', 'movement_id', name='uq_stock_checkpoints_item_movement')
+    )
+    op.create_index('ix_stock_checkpoints_id', 'stock_checkpoints', ['id'])
+    op.create_index(
+        'ix_stock_checkpoints_inventory_item_id_taken_at', 'stock_checkpoints', ['inventory_item_id', 'taken_at']
+    )
+
+
+def downgrade():
+    op.drop_index('ix_stock_checkpoints_inventory_item_id_taken_at', table_name='stock_checkpoints')
+    op.drop_index('ix_stock_checkpoints_id', table_name='stock_checkpoints')
+    op.drop_table('stock_checkpoints')
@@ -0,0 +1,110 @@
+import logging
+import select
+import threading
+from collections import defaultdict
+from typing import Callable, Dict, List
+from sqlalchemy import func
+from sqlalchemy import select as sql_select
+from sqlalchemy.engine import Connection, Engine
+from app.database.base import engine
+
+logger = logging.getLogger(__name__)
+
+
+def notify(connection: Connection, channel: str, payload: str = ""):
+    """
+    Queue a PostgreSQL notification on `connection`. It is delivered to
+    every listener when the surrounding transaction commits and dropped if
+    it rolls back. A no-op on other databases.
+    """
+    if connection.dialect.name == "postgresql":
+        connection.execute(sql_select(func.pg_notify(channel, payload)))
+
+
+class NotificationListener:
+    """
+    Background thread that LISTENs on PostgreSQL channels and dispatches
+    each notification's payload to the handlers subscribed to its channel.
+
+    It holds one dedicated connection per process, detached from the
+    engine's pool. Notifications sent while the connection is down are
+    lost, so reconnect handlers are called after every (re)connect to let
+    subscribers resynchronise.
+    """
+
+    def __init__(self, bind: Engine, poll_interval: float = 1.0, retry_interval: float = 5.0):
+        self.bind = bind
+        self.poll_interval = poll_interval
+        self.retry_interval = retry_interval
+        self._handlers: Dict[str, List[Callable[[str], None]]] = defaultdict(list)
+        self._reconnect_handlers: List[Callable[[], None]] = []
+        self._stop = threading.Event()
+        self._thread = None
+
+    def subscribe(self, channel: str, handler: Callable[[str], None]):
+        self._handlers[channel].append(handler)
+
+    def on_reconnect(self, handler: Callable[[], None]):
+        self._reconnect_handlers.append(handler)
+
+    def start(self):
+        if self.bind.dialect.name != "postgresql" or self._thread is not None:
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name="pg-notification-listener", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout=self.poll_interval * 2)
+            self._thread = None
+
+    def _connect(self):
+        connection = self.bind.raw_connection()
+        connection.detach()
+        dbapi_connection = connection.dbapi_connection
+        dbapi_connection.autocommit = True
+        cursor = dbapi_connection.cursor()
+        for channel in self._handlers:
+            cursor.execute(f'LISTEN "{channel}"')
+        cursor.close()
+        return dbapi_connection
+
+    def _dispatch(self, channel: str, payload: str):
+        for handler in self._handlers.get(channel, ()):
+            try:
+                handler(payload)
+            except Exception:
+                logger.exception("Notification handler for %s failed", channel)
+
+    def _run(self):
+        while not self._stop.is_set():
+            try:
+                dbapi_connection = self._connect()
+            except Exception:
+                logger.warning("Notification listener could not connect, retrying", exc_info=True)
+                self._stop.wait(self.retry_interval)
+                continue
+            try:
+                for handler in self._reconnect_handlers:
+                    handler()
+                while not self._stop.is_set():
+                    if select.select([dbapi_connection], [], [], self.poll_interval) == ([], [], []):
+                        continue
+                    dbapi_connection.poll()
+                    while dbapi_connection.notifies:
+                        notification = dbapi_connection.notifies.pop(0)
+                        self._dispatch(notification.channel, notification.payload)
+            except Exception:
+                logger.warning("Notification listener lost its connection, reconnecting", exc_info=True)
+                self._stop.wait(self.retry_interval)
+            finally:
+                try:
+                    dbapi_connection.close()
+                except Exception:
+                    pass
+
+
+# Shared per-process listener, started with the app
+notification_listener = NotificationListener(engine)
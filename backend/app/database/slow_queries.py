@@ -0,0 +1,159 @@
+"""
+Slow-query recorder.
+
+Times every statement through SQLAlchemy cursor events and keeps those
+slower than SLOW_QUERY_THRESHOLD_MS in a bounded table keyed by SQL text
+(statements are parameterized, so one entry covers every execution of a
+query), ranked by total time. Bound parameters are never stored.
+
+A sampled fraction of slow executions also captures the statement's plan
+on the same connection, right after it ran, so it sees the same
+transaction state. SELECTs are planned with EXPLAIN (ANALYZE, BUFFERS) on
+PostgreSQL, which executes them a second time; writes only get a plain
+EXPLAIN so they are never applied twice. SQLite gets EXPLAIN QUERY PLAN.
+"""
+
+import logging
+import random
+import threading
+import time
+from datetime import datetime, timezone
+from typing import Dict, List, Optional
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+from app.config import settings
+
+logger = logging.getLogger(__name__)
+
+
+class SlowQuery:
+    __slots__ = ("statement", "calls", "total_ms", "max_ms", "last_seen", "plan", "plan_captured_at")
+
+    def __init__(self, statement: str):
+        self.statement = statement
+        self.calls = 0
+        self.total_ms = 0.0
+        self.max_ms = 0.0
+        self.last_seen: Optional[datetime] = None
+        self.plan: Optional[str] = None
+        self.plan_captured_at: Optional[datetime] = None
+
+    def as_dict(self) -> dict:
+        return {
+            "statement": self.statement,
+            "calls": self.calls,
+            "total_ms": round(self.total_ms, 3),
+            "mean_ms": round(self.total_ms / self.calls, 3),
+            "max_ms": round(self.max_ms, 3),
+            "last_seen": self.last_seen,
+            "plan": self.plan,
+            "plan_captured_at": self.plan_captured_at,
+        }
+
+
+EXPLAINABLE = ("select", "with", "insert", "update", "delete")
+# SELECTs that write or notify must not be executed again by ANALYZE
+SIDE_EFFECTS = (" for update", " for share", "nextval(", "pg_notify(", "setval(")
+
+
+def _explain_sql(dialect: str, statement: str) -> Optional[str]:
+    lowered = statement.lstrip().lower()
+    if not lowered.startswith(EXPLAINABLE):
+        return None
+    if dialect == "postgresql":
+        is_read = lowered.startswith("select") and not any(marker in lowered for marker in SIDE_EFFECTS)
+        return f"EXPLAIN (ANALYZE, BUFFERS) {statement}" if is_read else f"EXPLAIN {statement}"
+    if dialect == "sqlite":
+        return f"EXPLAIN QUERY PLAN {statement}"
+    return None
+
+
+class SlowQueryLog:
+    def __init__(self, threshold_ms: float, explain_sample_rate: float, top_n: int):
+        self.threshold_ms = threshold_ms
+        self.explain_sample_rate = explain_sample_rate
+        self.top_n = top_n
+        self._entries: Dict[str, SlowQuery] = {}
+        self._lock = threading.Lock()
+
+    def _before_cursor_execute(self, conn, cursor, statement, parameters, context, executemany):
+        if context is not None:
+            context.slow_query_started = time.perf_counter()
+
+    def _after_cursor_execute(self, conn, cursor, statement, parameters, context, executemany):
+        started = getattr(context, "slow_query_started", None)
+        if started is None:
+            return
+        elapsed_ms = (time.perf_counter() - started) * 1000
+        if elapsed_ms < self.threshold_ms:
+            return
+        logger.warning("Slow query (%.1f ms): %s", elapsed_ms, statement)
+        plan = None
+        if not executemany and random.random() < self.explain_sample_rate:
+            plan = self.explain(conn, cursor, statement, parameters)
+        self.record(statement, elapsed_ms, plan)
+
+    def explain(self, conn, cursor, statement: str, parameters) -> Optional[str]:
+        """Plan of `statement`, run on a fresh cursor so the caller's results are untouched"""
+        sql = _explain_sql(conn.dialect.name, statement)
+        if sql is None:
+            return None
+        # On PostgreSQL a failed statement aborts the whole transaction, so
+        # the EXPLAIN runs inside a savepoint the request can survive
+        savepoint = conn.dialect.name == "postgresql"
+        explain_cursor = cursor.connection.cursor()
+        try:
+            if savepoint:
+                explain_cursor.execute("SAVEPOINT slow_query_explain")
+            try:
+                explain_cursor.execute(sql, parameters)
+                plan = "\n".join(" ".join(str(column) for column in row) for row in explain_cursor.fetchall())
+            except Exception:
+                if savepoint:
+                    explain_cursor.execute("ROLLBACK TO SAVEPOINT slow_query_explain")
+                logger.warning("Could not capture plan for slow query", exc_info=True)
+                return None
+            finally:
+                if savepoint:
+                    explain_cursor.execute("RELEASE SAVEPOINT slow_query_explain")
+            return plan
+        finally:
+            explain_cursor.close()
+
+    def record(self, statement: str, elapsed_ms: float, plan: Optional[str] = None):
+        now = datetime.now(timezone.utc)
+        with self._lock:
+            entry = self._entries.get(statement)
+            if entry is None:
+                if len(self._entries) >= self.top_n:
+                    # Make room by dropping the entry with the least total time
+                    cheapest = min(self._entries.values(), key=lambda e: e.total_ms)
+                    del self._entries[cheapest.statement]
+                entry = self._entries[statement] = SlowQuery(statement)
+            entry.calls += 1
+            entry.total_ms += elapsed_ms
+            entry.max_ms = max(entry.max_ms, elapsed_ms)
+            entry.last_seen = now
+            if plan is not None:
+                entry.plan = plan
+                entry.plan_captured_at = now
+
+    def top(self, limit: Optional[int] = None) -> List[dict]:
+        with self._lock:
+            entries = sorted(self._entries.values(), key=lambda e: e.total_ms, reverse=True)
+            return [entry.as_dict() for entry in entries[:limit]]
+
+    def reset(self):
+        with self._lock:
+            self._entries.clear()
+
+    def install(self, engine: Engine):
+        event.listen(engine, "before_cursor_execute", self._before_cursor_execute)
+        event.listen(engine, "after_cursor_execute", self._after_cursor_execute)
+
+
+slow_query_log = SlowQueryLog(
+    threshold_ms=settings.SLOW_QUERY_THRESHOLD_MS,
+    explain_sample_rate=settings.SLOW_QUERY_EXPLAIN_SAMPLE_RATE,
+    top_n=settings.SLOW_QUERY_TOP_N
+)
@@ -1,15 +1,22 @@
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 from app.config import settings
-from app.database.base import create_tables
-from app.routers import auth, products, inventory, inventories
+from app.database.base import create_tables, engine
+from app.database.notifications import notification_listener
+from app.database.slow_queries import slow_query_log
+from app.routers import auth, products, inventory, inventories, stats, events, admin
+from app.utils.compression import CompressionMiddleware
+from app.utils.metrics import MetricsMiddleware, MultiprocessStore, instrument_engine, metrics_response, registry
+from app.utils.passwords import password_hasher
+from app.utils.serialization import FastJSONResponse
 
 # Create FastAPI app
 app = FastAPI(
     title=settings.PROJECT_NAME,
     version="1.0.0",
     description="A modern inventory management system built with FastAPI",
-    openapi_url=f"{settings.API_V1_STR}/openapi.json"
+    openapi_url=f"{settings.API_V1_STR}/openapi.json",
+    default_response_class=FastJSONResponse
 )
 
 # Set up CORS
@@ -19,8 +26,31 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["X-Next-Cursor", "ETag"],
 )
 
+if settings.COMPRESSION_ENABLED:
+    app.add_middleware(
+        CompressionMiddleware,
+        minimum_size=settings.COMPRESSION_MINIMUM_SIZE,
+        gzip_level=settings.COMPRESSION_GZIP_LEVEL,
+        zstd_level=settings.COMPRESSION_ZSTD_LEVEL,
+    )
+
+# Outermost, so that latency covers every other middleware and response
+# sizes are measured as sent
+# Shared between worker processes when the server runs several
+metrics_store = (
+    MultiprocessStore(registry, settings.METRICS_MULTIPROCESS_DIR)
+    if settings.METRICS_ENABLED and settings.METRICS_MULTIPROCESS_DIR else None
+)
+if settings.METRICS_ENABLED:
+    instrument_engine(engine)
+    app.add_middleware(MetricsMiddleware, store=metrics_store)
+
+if settings.SLOW_QUERY_LOG_ENABLED:
+    slow_query_log.install(engine)
+
 # Include routers
 app.include_router(
     auth.router,
@@ -46,11 +76,42 @@ app.include_router(
     tags=["Inventories"]
 )
 
+app.include_router(
+    stats.router,
+    prefix=f"{settings.API_V1_STR}/stats",
+    tags=["Statistics"]
+)
+
+app.include_router(
+    events.router,
+    prefix=f"{settings.API_V1_STR}/events",
+    tags=["Events"]
+)
+
+app.include_router(
+    admin.router,
+    prefix=f"{settings.API_V1_STR}/admin",
+    tags=["Admin"]
+)
+
 
 @app.on_event("startup")
 async def startup_event():
     """Create database tables on startup"""
-    create_tables()
+    if settings.CREATE_TABLES_ON_STARTUP:
+        create_tables()
+    notification_listener.start()
+    if metrics_store is not None:
+        metrics_store.start()
+
+
+@app.on_event("shutdown")
+async def shutdown_event():
+    """Stop the notification listener and the password hashing workers"""
+    notification_listener.stop()
+    password_hasher.shutdown()
+    if metrics_store is not None:
+        metrics_store.stop()
 
 
 @app.get("/")
@@ -70,11 +131,25 @@ async def health_check():
     return {"status": "healthy"}
 
 
+if settings.METRICS_ENABLED:
+    @app.get("/metrics", include_in_schema=False)
+    async def metrics():
+        """Request and database metrics in the Prometheus text format"""
+        return metrics_response(metrics_store)
+
+
 if __name__ == "__main__":
-    import uvicorn
-    uvicorn.run(
-        "main:app",
-        host="0.0.0.0",
-        port=8000,
-        reload=True
-    )
+    if settings.DEBUG:
+        import uvicorn
+        uvicorn.run(
+            "app.main:app",
+            host=settings.SERVER_HOST,
+            port=settings.SERVER_PORT,
+            reload=True
+        )
+    else:
+        # The production server sizes the database pools before importing
+        # the app, which has already happened here
+        import os
+        import sys
+        os.execv(sys.executable, [sys.executable, "-m", "app.server"])
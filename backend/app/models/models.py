@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, Boolean, DateTime, Text, ForeignKey, Enum, Numeric, Table
+from sqlalchemy import Column, Integer, String, Boolean, DateTime, Text, ForeignKey, Enum, Numeric, Table, Index, CheckConstraint, UniqueConstraint, DDL, event, text
 from sqlalchemy.orm import relationship
 from sqlalchemy.sql import func
 from app.database.base import Base
@@ -86,6 +86,64 @@ class Product(Base):
     inventory_items = relationship("InventoryItem", back_populates="product")
     inventory_movements = relationship("InventoryMovement", back_populates="product")
 
+    __table_args__ = (
+        # Keyset pagination ordered by (name, id)
+        Index("ix_products_name_id", "name", "id"),
+    )
+
+
+# Full-text document of a product. Search queries must use this exact
+# expression so that PostgreSQL can match it to the expression index below.
+product_search_vector = func.to_tsvector(
+    text("'simple'"),
+    func.coalesce(Product.__table__.c.name, text("''"))
+    .concat(text("' '"))
+    .concat(func.coalesce(Product.__table__.c.description, text("''")))
+)
+
+# PostgreSQL search indexes: a GIN index over the full-text document plus
+# trigram indexes that make substring matches on name/sku/barcode indexable
+Index(
+    "ix_products_search_vector", product_search_vector, postgresql_using="gin"
+).ddl_if(dialect="postgresql")
+for _column in ("name", "sku", "barcode"):
+    Index(
+        f"ix_products_{_column}_trgm",
+        Product.__table__.c[_column],
+        postgresql_using="gin",
+        postgresql_ops={_column: "gin_trgm_ops"}
+    ).ddl_if(dialect="postgresql")
+
+event.listen(
+    Product.__table__,
+    "before_create",
+    DDL("CREATE EXTENSION IF NOT EXISTS pg_trgm").execute_if(dialect="postgresql")
+)
+
+# SQLite fallback: an external-content FTS5 table kept in sync by triggers
+_PRODUCTS_FTS_DDL = (
+    "CREATE VIRTUAL TABLE IF NOT EXISTS products_fts USING fts5("
+    "name, description, sku, barcode, content='products', content_rowid='id')",
+    "CREATE TRIGGER IF NOT EXISTS products_fts_ai AFTER INSERT ON products BEGIN "
+    "INSERT INTO products_fts(rowid, name, description, sku, barcode) "
+    "VALUES (new.id, new.name, new.description, new.sku, new.barcode); END",
+    "CREATE TRIGGER IF NOT EXISTS products_fts_ad AFTER DELETE ON products BEGIN "
+    "INSERT INTO products_fts(products_fts, rowid, name, description, sku, barcode) "
+    "VALUES ('delete', old.id, old.name, old.description, old.sku, old.barcode); END",
+    "CREATE TRIGGER IF NOT EXISTS products_fts_au AFTER UPDATE ON products BEGIN "
+    "INSERT INTO products_fts(products_fts, rowid, name, description, sku, barcode) "
+    "VALUES ('delete', old.id, old.name, old.description, old.sku, old.barcode); "
+    "INSERT INTO products_fts(rowid, name, description, sku, barcode) "
+    "VALUES (new.id, new.name, new.description, new.sku, new.barcode); END",
+)
+for _statement in _PRODUCTS_FTS_DDL:
+    event.listen(Product.__table__, "after_create", DDL(_statement).execute_if(dialect="sqlite"))
+event.listen(
+    Product.__table__,
+    "before_drop",
+    DDL("DROP TABLE IF EXISTS products_fts").execute_if(dialect="sqlite")
+)
+
 
 class Location(Base):
     __tablename__ = "locations"
@@ -132,6 +190,9 @@ class InventoryGroup(Base):
     description = Column(Text, nullable=True)
     created_at = Column(DateTime(timezone=True), server_default=func.now())
     updated_at = Column(DateTime(timezone=True), onupdate=func.now())
+    # Bumped by every UPDATE; the sum over a listing only grows as writes
+    # commit, whatever their order, unlike max(updated_at)
+    version = Column(Integer, default=1, server_default=text("1"), nullable=False)
 
     # Relationships
     items = relationship("InventoryItem", back_populates="inventory_group", cascade="all, delete-orphan")
@@ -145,19 +206,48 @@ class InventoryItem(Base):
     name = Column(String(200), nullable=False)
     description = Column(Text, nullable=True)
     category = Column(String(100), nullable=True)
+    product_id = Column(Integer, ForeignKey("products.id"), nullable=True)
+    location_id = Column(Integer, ForeignKey("locations.id"), nullable=True)
     quantity = Column(Integer, default=0, nullable=False)
     min_stock_level = Column(Integer, default=10)
     max_stock_level = Column(Integer, default=1000)
     updated_at = Column(DateTime(timezone=True), onupdate=func.now())
+    # Bumped by every UPDATE, see InventoryGroup.version
+    version = Column(Integer, default=1, server_default=text("1"), nullable=False)
 
     # Relationships
     inventory_group = relationship("InventoryGroup", back_populates="items")
+    product = relationship("Product", back_populates="inventory_items")
+    location = relationship("Location", back_populates="inventory_items")
     tags = relationship(
         "Tag",
         secondary=inventory_tags,
         back_populates="inventory_items"
     )
 
+    __table_args__ = (
+        # Item listing and its ETag watermark (count, max id, sum of versions),
+        # answered from the index alone
+        Index("ix_inventory_items_inventory_id_version", "inventory_id", "version", "id"),
+        CheckConstraint("quantity >= 0", name="ck_inventory_items_quantity_non_negative"),
+        # Partial indexes holding only low-stock items, so low-stock listings
+        # read a handful of index entries however many items there are. The
+        # predicate must match services.low_stock.LOW_STOCK for them to be used
+        Index(
+            "ix_inventory_items_low_stock",
+            "id",
+            postgresql_where=text("quantity < min_stock_level"),
+            sqlite_where=text("quantity < min_stock_level")
+        ),
+        Index(
+            "ix_inventory_items_inventory_id_low_stock",
+            "inventory_id",
+            "id",
+            postgresql_where=text("quantity < min_stock_level"),
+            sqlite_where=text("quantity < min_stock_level")
+        ),
+    )
+
 
 class MovementType(str, enum.Enum):
     IN = "in"
@@ -170,9 +260,15 @@ class InventoryMovement(Base):
     __tablename__ = "inventory_movements"
 
     id = Column(Integer, primary_key=True, index=True)
-    product_id = Column(Integer, ForeignKey("products.id"), nullable=False)
+    product_id = Column(Integer, ForeignKey("products.id"), nullable=True)
+    inventory_item_id = Column(Integer, ForeignKey("inventory_items.id", ondelete="SET NULL"), nullable=True)
+    # Item on the other side of a transfer
+    transfer_item_id = Column(Integer, ForeignKey("inventory_items.id", ondelete="SET NULL"), nullable=True)
     movement_type = Column(Enum(MovementType), nullable=False)
+    # Signed change applied to the item's quantity
     quantity = Column(Integer, nullable=False)
+    # Item quantity right after this movement was applied
+    balance_after = Column(Integer, nullable=True)
     reference_number = Column(String(50))
     notes = Column(Text)
     user_id = Column(Integer, ForeignKey("users.id"))
@@ -181,6 +277,29 @@ class InventoryMovement(Base):
     # Relationships
     product = relationship("Product", back_populates="inventory_movements")
     user = relationship("User", back_populates="inventory_movements")
+    inventory_item = relationship("InventoryItem", foreign_keys=[inventory_item_id])
+
+    __table_args__ = (
+        # Per-item ledger, paged by id
+        Index("ix_inventory_movements_inventory_item_id_id", "inventory_item_id", "id"),
+    )
+
+
+class StockCheckpoint(Base):
+    """Quantity of an item once every movement up to `movement_id` was applied"""
+    __tablename__ = "stock_checkpoints"
+
+    id = Column(Integer, primary_key=True, index=True)
+    inventory_item_id = Column(Integer, ForeignKey("inventory_items.id", ondelete="CASCADE"), nullable=False)
+    movement_id = Column(Integer, nullable=False)
+    quantity = Column(Integer, nullable=False)
+    # created_at of the movement the checkpoint closes with
+    taken_at = Column(DateTime(timezone=True), nullable=False)
+
+    __table_args__ = (
+        UniqueConstraint("inventory_item_id", "movement_id", name="uq_stock_checkpoints_item_movement"),
+        Index("ix_stock_checkpoints_inventory_item_id_taken_at", "inventory_item_id", "taken_at"),
+    )
 
 
 class PurchaseOrderStatus(str, enum.Enum):
@@ -0,0 +1,27 @@
+from typing import List
+from fastapi import APIRouter, Depends, Query
+from app.database.slow_queries import slow_query_log
+from app.schemas.schemas import SlowQuery
+from app.utils.auth import require_admin
+
+router = APIRouter()
+
+
+@router.get("/slow-queries", response_model=List[SlowQuery])
+def list_slow_queries(
+    limit: int = Query(50, ge=1, le=1000),
+    current_user=Depends(require_admin)
+):
+    """
+    Statements slower than SLOW_QUERY_THRESHOLD_MS since the last reset,
+    by total time spent in them, with the plan of a sampled execution.
+    Recorded per worker process.
+    """
+    return slow_query_log.top(limit)
+
+
+@router.delete("/slow-queries")
+def reset_slow_queries(current_user=Depends(require_admin)):
+    """Start a fresh measurement window"""
+    slow_query_log.reset()
+    return {"message": "Slow query log cleared"}
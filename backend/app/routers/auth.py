@@ -1,61 +1,79 @@
 from datetime import timedelta
 from fastapi import APIRouter, Depends, HTTPException, status
 from fastapi.security import OAuth2PasswordRequestForm
-from sqlalchemy.orm import Session
-from app.database.base import get_db
+from sqlalchemy import insert
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.database.async_base import get_async_db
 from app.models.models import User
-from app.schemas.schemas import Token, User as UserSchema, UserCreate, MessageResponse
+from app.schemas.schemas import Token, User as UserSchema, UserCreate, MessageResponse, AuthCacheStats
 from app.utils.auth import (
-    authenticate_user,
+    authenticate_user_async,
     create_access_token,
     get_current_active_user,
-    get_password_hash,
-    get_user_by_username,
-    get_user_by_email
+    get_password_hash_async,
+    get_user_by_username_async,
+    get_user_by_email_async,
+    require_admin
 )
+from app.utils.auth_cache import auth_cache
+from app.utils.db_errors import raise_for_unique_violation
 from app.config import settings
 
 router = APIRouter()
 
+USER_UNIQUE_ERRORS = {
+    "username": "Username already registered",
+    "email": "Email already registered",
+}
+
 
 @router.post("/register", response_model=UserSchema)
-async def register(user: UserCreate, db: Session = Depends(get_db)):
+async def register(user: UserCreate, db: AsyncSession = Depends(get_async_db)):
     """Register a new user"""
     # Check if user exists
-    db_user = get_user_by_username(db, username=user.username)
+    db_user = await get_user_by_username_async(db, username=user.username)
     if db_user:
         raise HTTPException(
             status_code=400,
             detail="Username already registered"
         )
     
-    db_user = get_user_by_email(db, email=user.email)
+    db_user = await get_user_by_email_async(db, email=user.email)
     if db_user:
         raise HTTPException(
             status_code=400,
             detail="Email already registered"
         )
     
-    # Create new user
-    hashed_password = get_password_hash(user.password)
-    db_user = User(
-        username=user.username,
-        email=user.email,
-        hashed_password=hashed_password,
-        full_name=user.full_name,
-        role=user.role
+    # Create new user; the checks above spare a hash for obvious duplicates,
+    # the unique indexes catch concurrent registrations
+    hashed_password = await get_password_hash_async(user.password)
+    statement = (
+        insert(User)
+        .values(
+            username=user.username,
+            email=user.email,
+            hashed_password=hashed_password,
+            full_name=user.full_name,
+            role=user.role
+        )
+        .returning(*User.__table__.columns)
     )
-    db.add(db_user)
-    db.commit()
-    db.refresh(db_user)
+    try:
+        db_user = (await db.execute(statement)).one()
+        await db.commit()
+    except IntegrityError as e:
+        await db.rollback()
+        raise_for_unique_violation(e, USER_UNIQUE_ERRORS)
     
     return db_user
 
 
 @router.post("/login", response_model=Token)
-async def login(form_data: OAuth2PasswordRequestForm = Depends(), db: Session = Depends(get_db)):
+async def login(form_data: OAuth2PasswordRequestForm = Depends(), db: AsyncSession = Depends(get_async_db)):
     """Login user and return access token"""
-    user = authenticate_user(db, form_data.username, form_data.password)
+    user = await authenticate_user_async(db, form_data.username, form_data.password)
     if not user:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
@@ -87,3 +105,9 @@ async def read_users_me(current_user: User = Depends(get_current_active_user)):
 async def test_token(current_user: User = Depends(get_current_active_user)):
     """Test access token"""
     return current_user
+
+
+@router.get("/cache-stats", response_model=AuthCacheStats)
+async def auth_cache_stats(current_user: User = Depends(require_admin)):
+    """Hit rate and time saved by the token resolution cache"""
+    return auth_cache.stats()
@@ -0,0 +1,112 @@
+import asyncio
+import json
+from typing import List, Optional
+from fastapi import APIRouter, HTTPException, Query, Request, WebSocket, status
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import StreamingResponse
+from starlette.requests import HTTPConnection
+from app.config import settings
+from app.database.base import SessionLocal
+from app.services.stock_events import stock_events
+from app.utils.auth import resolve_token_user
+
+router = APIRouter()
+
+# Comment line sent on idle event streams so proxies keep them open
+SSE_KEEPALIVE_SECONDS = 15
+
+
+def _resolve_token(token: str):
+    with SessionLocal() as db:
+        return resolve_token_user(db, token)
+
+
+async def _authorized(connection: HTTPConnection) -> bool:
+    """
+    Browsers cannot set headers on WebSockets or EventSource streams, so a
+    ?token= is accepted as well as a bearer Authorization header
+    """
+    if settings.AUTH_BYPASS:
+        return True
+    token = connection.query_params.get("token")
+    authorization = connection.headers.get("authorization", "")
+    if not token and authorization.lower().startswith("bearer "):
+        token = authorization[7:]
+    if not token:
+        return False
+    try:
+        user = await run_in_threadpool(_resolve_token, token)
+    except HTTPException:
+        return False
+    return user.is_active
+
+
+async def _wait_for_disconnect(websocket: WebSocket):
+    while (await websocket.receive())["type"] != "websocket.disconnect":
+        pass
+
+
+@router.websocket("/stock/ws")
+async def stock_changes_websocket(websocket: WebSocket, inventory_id: Optional[List[int]] = Query(None)):
+    """
+    Push item and quantity changes as JSON messages, optionally only those of
+    the given inventories (repeat ?inventory_id=). Each message is either
+    {"type": "changes", "changes": [...]} holding the latest state of every
+    item changed since the previous one, or {"type": "resync"} when changes
+    were missed and the client should refetch.
+    """
+    if not await _authorized(websocket):
+        await websocket.close(code=1008)
+        return
+    await websocket.accept()
+    subscription = stock_events.subscribe(set(inventory_id) if inventory_id else None)
+    disconnected = asyncio.create_task(_wait_for_disconnect(websocket))
+    try:
+        while not disconnected.done():
+            batch = asyncio.create_task(subscription.next_batch(stock_events.coalesce_window))
+            await asyncio.wait({batch, disconnected}, return_when=asyncio.FIRST_COMPLETED)
+            if not batch.done():
+                batch.cancel()
+                break
+            # Awaiting the send holds this client's changes back while its
+            # socket is full; they keep coalescing in the bounded pending set
+            await websocket.send_json(batch.result())
+    finally:
+        disconnected.cancel()
+        stock_events.unsubscribe(subscription)
+
+
+@router.get("/stock")
+async def stock_changes_stream(
+    request: Request,
+    inventory_id: Optional[List[int]] = Query(None)
+):
+    """The same messages as the WebSocket, as a server-sent event stream"""
+    if not await _authorized(request):
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="Not authenticated",
+            headers={"WWW-Authenticate": "Bearer"},
+        )
+
+    async def stream():
+        subscription = stock_events.subscribe(set(inventory_id) if inventory_id else None)
+        try:
+            yield "retry: 3000\n\n"
+            while not await request.is_disconnected():
+                try:
+                    batch = await asyncio.wait_for(
+                        subscription.next_batch(stock_events.coalesce_window), SSE_KEEPALIVE_SECONDS
+                    )
+                except asyncio.TimeoutError:
+                    yield ": keepalive\n\n"
+                    continue
+                yield f"event: {batch['type']}\ndata: {json.dumps(batch)}\n\n"
+        finally:
+            stock_events.unsubscribe(subscription)
+
+    return StreamingResponse(
+        stream(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
@@ -1,30 +1,82 @@
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, Response
+from sqlalchemy import func, insert, select, update
+from sqlalchemy.exc import IntegrityError
 from sqlalchemy.orm import Session
-from typing import List
+from typing import List, Optional
 from app.database.base import get_db
 from app.models.models import InventoryGroup
-from app.schemas.schemas import InventoryGroup, InventoryGroupCreate, InventoryGroupUpdate
+from app.schemas.schemas import InventoryGroup as InventoryGroupSchema, InventoryGroupCreate, InventoryGroupUpdate, InventoryItem as InventoryItemSchema
+from app.services.export import export_response
+from app.services.low_stock import low_stock_page
+from app.utils.db_errors import raise_for_unique_violation
+from app.utils.etag import conditional_response, make_etag
 from app.utils.auth import get_current_active_user, require_manager_or_admin
+from app.utils.serialization import json_response, serialize
 
 router = APIRouter(prefix="/inventories", tags=["inventories"])
 
-@router.get("", response_model=List[InventoryGroup])
-def list_inventories(db: Session = Depends(get_db), current_user=Depends(get_current_active_user)):
-    return db.query(InventoryGroup).all()
+INVENTORY_UNIQUE_ERRORS = {"name": "Inventory name already exists"}
 
-@router.post("", response_model=InventoryGroup)
+@router.get("", response_model=List[InventoryGroupSchema])
+def list_inventories(
+    request: Request,
+    response: Response,
+    db: Session = Depends(get_db),
+    current_user=Depends(get_current_active_user)
+):
+    watermark = db.query(
+        func.count(InventoryGroup.id),
+        func.max(InventoryGroup.id),
+        func.sum(InventoryGroup.version)
+    ).one()
+    not_modified = conditional_response(request, response, make_etag("inventories", *watermark))
+    if not_modified:
+        return not_modified
+    return json_response(serialize(InventoryGroupSchema, db.query(InventoryGroup).all()), response)
+
+@router.post("", response_model=InventoryGroupSchema)
 def create_inventory(
     inventory: InventoryGroupCreate,
     db: Session = Depends(get_db),
     current_user=Depends(require_manager_or_admin)
 ):
-    db_inventory = InventoryGroup(**inventory.dict())
-    db.add(db_inventory)
-    db.commit()
-    db.refresh(db_inventory)
+    statement = insert(InventoryGroup).values(**inventory.dict()).returning(*InventoryGroup.__table__.columns)
+    try:
+        db_inventory = db.execute(statement).one()
+        db.commit()
+    except IntegrityError as e:
+        db.rollback()
+        raise_for_unique_violation(e, INVENTORY_UNIQUE_ERRORS)
     return db_inventory
 
-@router.get("/{inventory_id}", response_model=InventoryGroup)
+@router.get("/export")
+def export_inventories(
+    format: str = Query("ndjson", pattern="^(ndjson|csv)$"),
+    current_user=Depends(get_current_active_user)
+):
+    columns = list(InventoryGroup.__table__.columns)
+    return export_response(
+        select(*columns).order_by(InventoryGroup.id),
+        [column.key for column in columns],
+        format,
+        "inventories"
+    )
+
+@router.get("/low-stock", response_model=List[InventoryItemSchema])
+def list_low_stock_items(
+    response: Response,
+    limit: int = Query(100, ge=1, le=1000),
+    cursor: Optional[str] = Query(None, description="Opaque cursor from the X-Next-Cursor header of the previous page"),
+    db: Session = Depends(get_db),
+    current_user=Depends(get_current_active_user)
+):
+    """Items below their minimum stock level across all inventories"""
+    items, next_cursor = low_stock_page(db, limit, cursor)
+    if next_cursor:
+        response.headers["X-Next-Cursor"] = next_cursor
+    return json_response(serialize(InventoryItemSchema, items), response)
+
+@router.get("/{inventory_id}", response_model=InventoryGroupSchema)
 def get_inventory(
     inventory_id: int,
     db: Session = Depends(get_db),
@@ -35,20 +87,28 @@ def get_inventory(
         raise HTTPException(status_code=404, detail="Inventory not found")
     return inventory
 
-@router.put("/{inventory_id}", response_model=InventoryGroup)
+@router.put("/{inventory_id}", response_model=InventoryGroupSchema)
 def update_inventory(
     inventory_id: int,
     inventory_update: InventoryGroupUpdate,
     db: Session = Depends(get_db),
     current_user=Depends(require_manager_or_admin)
 ):
-    inventory = db.query(InventoryGroup).filter(InventoryGroup.id == inventory_id).first()
+    statement = (
+        update(InventoryGroup)
+        .where(InventoryGroup.id == inventory_id)
+        .values(**inventory_update.dict(exclude_unset=True), updated_at=func.now(), version=InventoryGroup.version + 1)
+        .returning(*InventoryGroup.__table__.columns)
+        .execution_options(synchronize_session=False)
+    )
+    try:
+        inventory = db.execute(statement).first()
+        db.commit()
+    except IntegrityError as e:
+        db.rollback()
+        raise_for_unique_violation(e, INVENTORY_UNIQUE_ERRORS)
     if not inventory:
         raise HTTPException(status_code=404, detail="Inventory not found")
-    for k, v in inventory_update.dict(exclude_unset=True).items():
-        setattr(inventory, k, v)
-    db.commit()
-    db.refresh(inventory)
     return inventory
 
 @router.delete("/{inventory_id}")
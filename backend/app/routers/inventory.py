@@ -1,66 +1,199 @@
-from typing import List
-from fastapi import APIRouter, Depends, HTTPException, Query
-from sqlalchemy.orm import Session
+from datetime import datetime, timezone
+from typing import List, Optional
+from fastapi import APIRouter, Depends, File, HTTPException, Query, Request, Response, UploadFile
+from sqlalchemy import func, insert, select, update
+from sqlalchemy.orm import Session, selectinload
 from app.database.base import get_db
-from app.models.models import InventoryItem, Tag, InventoryGroup
-from app.schemas.schemas import InventoryItem, InventoryItemCreate, InventoryItemUpdate, Tag as TagSchema
+from app.models.models import InventoryItem, InventoryMovement, MovementType, Tag, InventoryGroup
+from app.schemas.schemas import InventoryItem as InventoryItemSchema, InventoryItemCreate, InventoryItemUpdate, Tag as TagSchema, InventoryImportResult, InventoryMovement as InventoryMovementSchema, InventoryMovementCreate, StockAtTime, QuantityAdjustmentBatch, ItemQuantity
+from app.services.export import attach_item_tags, export_response
+from app.services.inventory_import import IMPORT_FORMATS, import_items
+from app.services.low_stock import low_stock_page
+from app.services.movements import apply_adjustments, merge_adjustments, record_movement
+from app.services.stock_checkpoints import stock_at
+from app.services.stock_events import item_change, publish_stock_changes
+from app.services.tags import item_tags, resolve_tags, set_item_tags
+from app.utils.etag import conditional_response, make_etag
 from app.utils.auth import get_current_active_user, require_manager_or_admin
+from app.utils.pagination import keyset_page
+from app.utils.serialization import json_response, serialize
 
 router = APIRouter(prefix="/inventories/{inventory_id}/items", tags=["inventory_items"])
 
-@router.get("", response_model=List[InventoryItem])
+@router.get("", response_model=List[InventoryItemSchema])
 def list_items(
     inventory_id: int,
+    request: Request,
+    response: Response,
     db: Session = Depends(get_db),
     current_user=Depends(get_current_active_user)
 ):
-    items = db.query(InventoryItem).filter(InventoryItem.inventory_id == inventory_id).all()
-    return items
+    watermark = db.query(
+        func.count(InventoryItem.id),
+        func.max(InventoryItem.id),
+        func.sum(InventoryItem.version)
+    ).filter(InventoryItem.inventory_id == inventory_id).one()
+    not_modified = conditional_response(
+        request, response, make_etag("inventory_items", inventory_id, *watermark)
+    )
+    if not_modified:
+        return not_modified
+
+    items = (
+        db.query(InventoryItem)
+        .options(selectinload(InventoryItem.tags))
+        .filter(InventoryItem.inventory_id == inventory_id)
+        .all()
+    )
+    return json_response(serialize(InventoryItemSchema, items), response)
 
-@router.post("", response_model=InventoryItem)
+@router.post("", response_model=InventoryItemSchema)
 def create_item(
     inventory_id: int,
     item: InventoryItemCreate,
     db: Session = Depends(get_db),
     current_user=Depends(require_manager_or_admin)
 ):
-    tags = []
-    if item.tags:
-        for tag_data in item.tags:
-            tag = db.query(Tag).filter(Tag.name == tag_data.name).first()
-            if not tag:
-                tag = Tag(name=tag_data.name, description=tag_data.description)
-                db.add(tag)
-                db.flush()
-            tags.append(tag)
-    db_item = InventoryItem(
-        inventory_id=inventory_id,
-        name=item.name,
-        description=item.description,
-        category=item.category,
-        quantity=item.quantity,
-        min_stock_level=item.min_stock_level,
-        max_stock_level=item.max_stock_level,
-        tags=tags
+    tags = resolve_tags(db, item.tags or [])
+    statement = (
+        insert(InventoryItem)
+        .values(
+            inventory_id=inventory_id,
+            name=item.name,
+            description=item.description,
+            category=item.category,
+            quantity=item.quantity,
+            min_stock_level=item.min_stock_level,
+            max_stock_level=item.max_stock_level
+        )
+        .returning(*InventoryItem.__table__.columns)
     )
-    db.add(db_item)
+    db_item = db.execute(statement).one()
+    set_item_tags(db, db_item.id, tags)
+    publish_stock_changes(db, [item_change("created", inventory_id, db_item.id, db_item.quantity)])
     db.commit()
-    db.refresh(db_item)
-    return db_item
+    return InventoryItemSchema(**db_item._mapping, tags=tags)
+
+@router.post("/import", response_model=InventoryImportResult)
+def import_inventory_items(
+    inventory_id: int,
+    file: UploadFile = File(...),
+    format: Optional[str] = Query(None, pattern="^(csv|ndjson)$"),
+    db: Session = Depends(get_db),
+    current_user=Depends(require_manager_or_admin)
+):
+    """
+    Bulk import items from a CSV or NDJSON file.
+
+    The file is streamed in chunks, so its size is not limited by memory.
+    CSV files need a header row and separate multiple tags with ";". Rows
+    that fail validation are reported in `errors` and skipped.
+    """
+    if not db.query(InventoryGroup.id).filter(InventoryGroup.id == inventory_id).first():
+        raise HTTPException(status_code=404, detail="Inventory not found")
+
+    if format is None:
+        extension = (file.filename or "").rsplit(".", 1)[-1].lower()
+        format = {"csv": "csv", "ndjson": "ndjson", "jsonl": "ndjson"}.get(extension)
+    if format not in IMPORT_FORMATS:
+        raise HTTPException(status_code=400, detail="Unknown file format, use format=csv or format=ndjson")
+
+    return import_items(db, inventory_id, file.file, format)
+
+@router.get("/export")
+def export_inventory_items(
+    inventory_id: int,
+    format: str = Query("ndjson", pattern="^(ndjson|csv)$"),
+    db: Session = Depends(get_db),
+    current_user=Depends(get_current_active_user)
+):
+    """Stream every item of an inventory as NDJSON or CSV (re-importable via /import)"""
+    if not db.query(InventoryGroup.id).filter(InventoryGroup.id == inventory_id).first():
+        raise HTTPException(status_code=404, detail="Inventory not found")
+
+    columns = [
+        InventoryItem.id,
+        InventoryItem.inventory_id,
+        InventoryItem.name,
+        InventoryItem.description,
+        InventoryItem.category,
+        InventoryItem.quantity,
+        InventoryItem.min_stock_level,
+        InventoryItem.max_stock_level,
+        InventoryItem.updated_at,
+    ]
+    statement = (
+        select(*columns)
+        .where(InventoryItem.inventory_id == inventory_id)
+        .order_by(InventoryItem.id)
+    )
+    return export_response(
+        statement,
+        [column.key for column in columns] + ["tags"],
+        format,
+        f"inventory-{inventory_id}-items",
+        enrich=attach_item_tags
+    )
 
-@router.get("/{item_id}", response_model=InventoryItem)
+@router.get("/low-stock", response_model=List[InventoryItemSchema])
+def list_low_stock_items(
+    inventory_id: int,
+    response: Response,
+    limit: int = Query(100, ge=1, le=1000),
+    cursor: Optional[str] = Query(None, description="Opaque cursor from the X-Next-Cursor header of the previous page"),
+    db: Session = Depends(get_db),
+    current_user=Depends(get_current_active_user)
+):
+    """Items of an inventory below their minimum stock level"""
+    if not db.query(InventoryGroup.id).filter(InventoryGroup.id == inventory_id).first():
+        raise HTTPException(status_code=404, detail="Inventory not found")
+    items, next_cursor = low_stock_page(db, limit, cursor, inventory_id=inventory_id)
+    if next_cursor:
+        response.headers["X-Next-Cursor"] = next_cursor
+    return json_response(serialize(InventoryItemSchema, items), response)
+
+@router.post("/adjust", response_model=List[ItemQuantity])
+def adjust_quantities(
+    inventory_id: int,
+    batch: QuantityAdjustmentBatch,
+    db: Session = Depends(get_db),
+    current_user=Depends(require_manager_or_admin)
+):
+    """
+    Apply a batch of (item_id, delta) changes, e.g. a scanner's queued +1/-1
+    scans, in one transaction. Deltas for the same item are merged first.
+    The whole batch is rejected if an item is missing or would go below
+    zero. Returns the new quantity of every changed item.
+    """
+    quantities = apply_adjustments(
+        db,
+        inventory_id,
+        merge_adjustments(batch.adjustments),
+        user_id=current_user.id,
+        reference_number=batch.reference_number,
+        notes=batch.notes
+    )
+    db.commit()
+    return [ItemQuantity(item_id=item_id, quantity=quantity) for item_id, quantity in quantities.items()]
+
+@router.get("/{item_id}", response_model=InventoryItemSchema)
 def get_item(
     inventory_id: int,
     item_id: int,
     db: Session = Depends(get_db),
     current_user=Depends(get_current_active_user)
 ):
-    item = db.query(InventoryItem).filter(InventoryItem.inventory_id == inventory_id, InventoryItem.id == item_id).first()
+    item = (
+        db.query(InventoryItem)
+        .options(selectinload(InventoryItem.tags))
+        .filter(InventoryItem.inventory_id == inventory_id, InventoryItem.id == item_id)
+        .first()
+    )
     if not item:
         raise HTTPException(status_code=404, detail="Item not found")
     return item
 
-@router.put("/{item_id}", response_model=InventoryItem)
+@router.put("/{item_id}", response_model=InventoryItemSchema)
 def update_item(
     inventory_id: int,
     item_id: int,
@@ -68,14 +201,101 @@ def update_item(
     db: Session = Depends(get_db),
     current_user=Depends(require_manager_or_admin)
 ):
-    item = db.query(InventoryItem).filter(InventoryItem.inventory_id == inventory_id, InventoryItem.id == item_id).first()
+    update_data = item_update.dict(exclude_unset=True, exclude={"tags"})
+    previous_quantity = None
+    if update_data.get("quantity") is not None:
+        # Setting an absolute quantity is recorded as an adjustment; lock the
+        # row so that concurrent movements are not lost in between
+        previous_quantity = db.scalar(
+            select(InventoryItem.quantity)
+            .where(InventoryItem.inventory_id == inventory_id, InventoryItem.id == item_id)
+            .with_for_update()
+        )
+        if previous_quantity is None:
+            raise HTTPException(status_code=404, detail="Item not found")
+
+    # The version is always bumped, so tag-only changes move list ETags too
+    item = db.execute(
+        update(InventoryItem)
+        .where(InventoryItem.inventory_id == inventory_id, InventoryItem.id == item_id)
+        .values(**update_data, updated_at=func.now(), version=InventoryItem.version + 1)
+        .returning(*InventoryItem.__table__.columns)
+        .execution_options(synchronize_session=False)
+    ).first()
     if not item:
         raise HTTPException(status_code=404, detail="Item not found")
-    for k, v in item_update.dict(exclude_unset=True).items():
-        setattr(item, k, v)
+
+    if previous_quantity is not None and item.quantity != previous_quantity:
+        db.execute(insert(InventoryMovement.__table__).values(
+            product_id=item.product_id,
+            inventory_item_id=item.id,
+            movement_type=MovementType.ADJUSTMENT,
+            quantity=item.quantity - previous_quantity,
+            balance_after=item.quantity,
+            user_id=current_user.id
+        ))
+    if "tags" in item_update.model_fields_set:
+        tags = resolve_tags(db, item_update.tags or [])
+        set_item_tags(db, item.id, tags, replace=True)
+    else:
+        tags = item_tags(db, item.id)
+    publish_stock_changes(db, [item_change("updated", inventory_id, item.id, item.quantity)])
     db.commit()
-    db.refresh(item)
-    return item
+    return InventoryItemSchema(**item._mapping, tags=tags)
+
+@router.post("/{item_id}/movements", response_model=List[InventoryMovementSchema])
+def create_movement(
+    inventory_id: int,
+    item_id: int,
+    movement: InventoryMovementCreate,
+    db: Session = Depends(get_db),
+    current_user=Depends(require_manager_or_admin)
+):
+    """
+    Record a stock movement and apply it to the item atomically.
+
+    IN and OUT take a positive quantity, ADJUSTMENT a signed one, and
+    TRANSFER moves a positive quantity to `to_item_id`. Movements that would
+    take stock below zero are rejected. Returns the recorded ledger rows,
+    two for a transfer (source side first).
+    """
+    movements = record_movement(db, inventory_id, item_id, movement, user_id=current_user.id)
+    db.commit()
+    return movements
+
+@router.get("/{item_id}/movements", response_model=List[InventoryMovementSchema])
+def list_movements(
+    inventory_id: int,
+    item_id: int,
+    response: Response,
+    limit: int = Query(100, ge=1, le=1000),
+    cursor: Optional[str] = Query(None, description="Opaque cursor from the X-Next-Cursor header of the previous page"),
+    db: Session = Depends(get_db),
+    current_user=Depends(get_current_active_user)
+):
+    """Ledger of an item's movements, oldest first"""
+    if not db.query(InventoryItem.id).filter(InventoryItem.inventory_id == inventory_id, InventoryItem.id == item_id).first():
+        raise HTTPException(status_code=404, detail="Item not found")
+    query = db.query(InventoryMovement).filter(InventoryMovement.inventory_item_id == item_id)
+    movements, next_cursor = keyset_page(query, (InventoryMovement.id,), "id", limit, cursor=cursor)
+    if next_cursor:
+        response.headers["X-Next-Cursor"] = next_cursor
+    return json_response(serialize(InventoryMovementSchema, movements), response)
+
+@router.get("/{item_id}/stock", response_model=StockAtTime)
+def get_item_stock(
+    inventory_id: int,
+    item_id: int,
+    at: Optional[datetime] = Query(None, description="Point in time (default: now)"),
+    db: Session = Depends(get_db),
+    current_user=Depends(get_current_active_user)
+):
+    """Quantity of an item at a point in time, from its checkpoints and movement ledger"""
+    if not db.query(InventoryItem.id).filter(InventoryItem.inventory_id == inventory_id, InventoryItem.id == item_id).first():
+        raise HTTPException(status_code=404, detail="Item not found")
+    at = at or datetime.now(timezone.utc)
+    items = stock_at(db, [item_id], at)
+    return StockAtTime(at=at, quantity=sum(items.values()), items=items)
 
 @router.delete("/{item_id}")
 def delete_item(
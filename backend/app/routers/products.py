@@ -1,34 +1,90 @@
+from datetime import datetime, timezone
 from typing import List, Optional
-from fastapi import APIRouter, Depends, HTTPException, Query
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, Response
+from sqlalchemy import func, insert, update
+from sqlalchemy.exc import IntegrityError
 from sqlalchemy.orm import Session
 from app.database.base import get_db
-from app.models.models import Product, User
-from app.schemas.schemas import Product as ProductSchema, ProductCreate, ProductUpdate
+from app.models.models import Category, InventoryItem, Product, Supplier, User
+from app.schemas.schemas import Product as ProductSchema, ProductCreate, ProductUpdate, StockAtTime
 from app.utils.auth import get_current_active_user, require_manager_or_admin
+from app.services.export import export_response
+from app.services.product_search import search_products
+from app.services.reference_cache import reference_cache
+from app.services.stock_checkpoints import stock_at
+from app.utils.db_errors import raise_for_unique_violation
+from app.utils.etag import conditional_response, make_etag
+from app.utils.pagination import keyset_page
+from app.utils.serialization import ModelSerializer, json_response
 
 router = APIRouter()
 
+# Unique columns and the error reported when a write collides with them
+PRODUCT_UNIQUE_ERRORS = {
+    "sku": "SKU already exists",
+    "barcode": "Barcode already exists",
+}
+
+# Keyset orderings available to cursor pagination; the last column is unique
+PRODUCT_SORT_COLUMNS = {
+    "id": (Product.id,),
+    "name": (Product.name, Product.id),
+}
+
+
+def product_responses(db: Session, products: List[Product]) -> List[dict]:
+    """
+    Build Product responses, nesting category and supplier from the
+    reference cache instead of loading the relationships. Takes ORM objects
+    or rows RETURNING the product columns, which are trusted as they are.
+    """
+    categories = reference_cache.categories(db)
+    suppliers = reference_cache.suppliers(db)
+    serializer = ModelSerializer.for_schema(ProductSchema)
+    return [
+        serializer.to_dict(
+            product,
+            category=categories.get(product.category_id),
+            supplier=suppliers.get(product.supplier_id)
+        )
+        for product in products
+    ]
+
+
+def validate_product_references(db: Session, category_id: Optional[int], supplier_id: Optional[int]):
+    """Reject unknown category/supplier ids before they hit the foreign keys"""
+    if category_id is not None and not reference_cache.exists(db, Category.__tablename__, category_id):
+        raise HTTPException(status_code=400, detail="Category not found")
+    if supplier_id is not None and not reference_cache.exists(db, Supplier.__tablename__, supplier_id):
+        raise HTTPException(status_code=400, detail="Supplier not found")
+
 
 @router.get("", response_model=List[ProductSchema])
 def get_products(
+    response: Response,
     skip: int = Query(0, ge=0),
     limit: int = Query(100, ge=1, le=1000),
     search: Optional[str] = Query(None),
     category_id: Optional[int] = Query(None),
     is_active: Optional[bool] = Query(None),
+    cursor: Optional[str] = Query(None, description="Opaque cursor from the X-Next-Cursor header of the previous page"),
+    sort: Optional[str] = Query(None, pattern="^(id|name|relevance)$"),
     db: Session = Depends(get_db),
     current_user: User = Depends(get_current_active_user)
 ):
-    """Get all products with optional filtering"""
+    """
+    Get all products with optional filtering
+
+    Pages with `skip`/`limit`, or with keyset pagination when `cursor` is
+    given. Whenever more rows follow, the cursor of the next page is returned
+    in the `X-Next-Cursor` response header. Searches are ordered by relevance
+    unless another `sort` is requested.
+    """
     query = db.query(Product)
+    ranking = []
     
     if search:
-        query = query.filter(
-            Product.name.ilike(f"%{search}%") |
-            Product.description.ilike(f"%{search}%") |
-            Product.sku.ilike(f"%{search}%") |
-            Product.barcode.ilike(f"%{search}%")
-        )
+        query, ranking = search_products(db, query, search)
     
     if category_id is not None:
         query = query.filter(Product.category_id == category_id)
@@ -36,8 +92,24 @@ def get_products(
     if is_active is not None:
         query = query.filter(Product.is_active == is_active)
     
-    products = query.offset(skip).limit(limit).all()
-    return products
+    if sort is None:
+        sort = "relevance" if search else "id"
+
+    if sort == "relevance":
+        if cursor:
+            raise HTTPException(
+                status_code=400,
+                detail="Cursor pagination requires sort=id or sort=name"
+            )
+        products = query.order_by(*ranking, Product.id).offset(skip).limit(limit).all()
+        return json_response(product_responses(db, products), response)
+
+    products, next_cursor = keyset_page(
+        query, PRODUCT_SORT_COLUMNS[sort], sort, limit, cursor=cursor, offset=skip
+    )
+    if next_cursor:
+        response.headers["X-Next-Cursor"] = next_cursor
+    return json_response(product_responses(db, products), response)
 
 
 @router.post("", response_model=ProductSchema)
@@ -47,39 +119,99 @@ def create_product(
     current_user: User = Depends(require_manager_or_admin)
 ):
     """Create a new product"""
-    # Check if SKU already exists
-    if product.sku:
-        db_product = db.query(Product).filter(Product.sku == product.sku).first()
-        if db_product:
-            raise HTTPException(status_code=400, detail="SKU already exists")
-    
-    # Check if barcode already exists
-    if product.barcode:
-        db_product = db.query(Product).filter(Product.barcode == product.barcode).first()
-        if db_product:
-            raise HTTPException(status_code=400, detail="Barcode already exists")
-    
-    db_product = Product(
-        **product.dict(),
-        created_by=current_user.id
+    validate_product_references(db, product.category_id, product.supplier_id)
+
+    # SKU and barcode uniqueness is left to their unique indexes
+    statement = (
+        insert(Product)
+        .values(**product.dict(), created_by=current_user.id)
+        .returning(*Product.__table__.columns)
+    )
+    try:
+        db_product = db.execute(statement).one()
+        db.commit()
+    except IntegrityError as e:
+        db.rollback()
+        raise_for_unique_violation(e, PRODUCT_UNIQUE_ERRORS)
+    return product_responses(db, [db_product])[0]
+
+
+@router.get("/export")
+def export_products(
+    format: str = Query("ndjson", pattern="^(ndjson|csv)$"),
+    search: Optional[str] = Query(None),
+    category_id: Optional[int] = Query(None),
+    is_active: Optional[bool] = Query(None),
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_active_user)
+):
+    """Stream all matching products as NDJSON or CSV"""
+    columns = list(Product.__table__.columns)
+    query = db.query(*columns)
+    ordering = [Product.id]
+
+    if search:
+        query, ranking = search_products(db, query, search)
+        ordering = ranking + ordering
+
+    if category_id is not None:
+        query = query.filter(Product.category_id == category_id)
+
+    if is_active is not None:
+        query = query.filter(Product.is_active == is_active)
+
+    return export_response(
+        query.order_by(*ordering).statement,
+        [column.key for column in columns],
+        format,
+        "products"
     )
-    db.add(db_product)
-    db.commit()
-    db.refresh(db_product)
-    return db_product
 
 
 @router.get("/{product_id}", response_model=ProductSchema)
 def get_product(
     product_id: int,
+    request: Request,
+    response: Response,
     db: Session = Depends(get_db),
     current_user: User = Depends(get_current_active_user)
 ):
     """Get a specific product by ID"""
+    # The response nests category and supplier, so their timestamps are
+    # part of the watermark as well
+    watermark = (
+        db.query(Product.updated_at, Product.created_at, Category.updated_at, Supplier.updated_at)
+        .outerjoin(Category, Category.id == Product.category_id)
+        .outerjoin(Supplier, Supplier.id == Product.supplier_id)
+        .filter(Product.id == product_id)
+        .first()
+    )
+    if watermark is None:
+        raise HTTPException(status_code=404, detail="Product not found")
+    not_modified = conditional_response(request, response, make_etag("product", product_id, *watermark))
+    if not_modified:
+        return not_modified
+
     product = db.query(Product).filter(Product.id == product_id).first()
     if not product:
         raise HTTPException(status_code=404, detail="Product not found")
-    return product
+    return product_responses(db, [product])[0]
+
+
+@router.get("/{product_id}/stock", response_model=StockAtTime)
+def get_product_stock(
+    product_id: int,
+    at: Optional[datetime] = Query(None, description="Point in time (default: now)"),
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_active_user)
+):
+    """Stock of a product across its inventory items at a point in time"""
+    if not db.query(Product.id).filter(Product.id == product_id).first():
+        raise HTTPException(status_code=404, detail="Product not found")
+    at = at or datetime.now(timezone.utc)
+    item_ids = [item_id for (item_id,) in db.query(InventoryItem.id).filter(InventoryItem.product_id == product_id)]
+    items = stock_at(db, item_ids, at)
+    return StockAtTime(at=at, quantity=sum(items.values()), items=items)
 
 
 @router.put("/{product_id}", response_model=ProductSchema)
@@ -90,29 +222,25 @@ def update_product(
     current_user: User = Depends(require_manager_or_admin)
 ):
     """Update a product"""
-    product = db.query(Product).filter(Product.id == product_id).first()
+    update_data = product_update.dict(exclude_unset=True)
+    validate_product_references(db, update_data.get("category_id"), update_data.get("supplier_id"))
+
+    statement = (
+        update(Product)
+        .where(Product.id == product_id)
+        .values(**update_data, updated_at=func.now())
+        .returning(*Product.__table__.columns)
+        .execution_options(synchronize_session=False)
+    )
+    try:
+        product = db.execute(statement).first()
+        db.commit()
+    except IntegrityError as e:
+        db.rollback()
+        raise_for_unique_violation(e, PRODUCT_UNIQUE_ERRORS)
     if not product:
         raise HTTPException(status_code=404, detail="Product not found")
-    
-    # Check SKU uniqueness if updating
-    if product_update.sku and product_update.sku != product.sku:
-        existing = db.query(Product).filter(Product.sku == product_update.sku).first()
-        if existing:
-            raise HTTPException(status_code=400, detail="SKU already exists")
-    
-    # Check barcode uniqueness if updating
-    if product_update.barcode and product_update.barcode != product.barcode:
-        existing = db.query(Product).filter(Product.barcode == product_update.barcode).first()
-        if existing:
-            raise HTTPException(status_code=400, detail="Barcode already exists")
-    
-    update_data = product_update.dict(exclude_unset=True)
-    for field, value in update_data.items():
-        setattr(product, field, value)
-    
-    db.commit()
-    db.refresh(product)
-    return product
+    return product_responses(db, [product])[0]
 
 
 @router.delete("/{product_id}")
@@ -122,10 +250,14 @@ def delete_product(
     current_user: User = Depends(require_manager_or_admin)
 ):
     """Delete a product (soft delete by setting is_active to False)"""
-    product = db.query(Product).filter(Product.id == product_id).first()
-    if not product:
+    deleted = db.execute(
+        update(Product)
+        .where(Product.id == product_id)
+        .values(is_active=False, updated_at=func.now())
+        .returning(Product.id)
+        .execution_options(synchronize_session=False)
+    ).first()
+    if not deleted:
         raise HTTPException(status_code=404, detail="Product not found")
-    
-    product.is_active = False
     db.commit()
     return {"message": "Product deleted successfully"}
@@ -0,0 +1,30 @@
+from fastapi import APIRouter, Depends, Request, Response
+from sqlalchemy.orm import Session
+from app.database.base import get_db
+from app.schemas.schemas import DashboardStats
+from app.services.stats import stats_cache
+from app.utils.auth import get_current_active_user
+from app.utils.etag import conditional_response, make_etag
+
+router = APIRouter()
+
+
+@router.get("", response_model=DashboardStats)
+def get_stats(
+    request: Request,
+    response: Response,
+    db: Session = Depends(get_db),
+    current_user=Depends(get_current_active_user)
+):
+    """
+    Dashboard figures: item counts and units per inventory, low-stock items,
+    stock value and products per category.
+
+    Served from a short-lived cache that is dropped whenever inventories,
+    items, products or categories change.
+    """
+    stats = stats_cache.get(db)
+    not_modified = conditional_response(request, response, make_etag("stats", stats.generated_at))
+    if not_modified:
+        return not_modified
+    return stats
@@ -1,5 +1,5 @@
 from pydantic import BaseModel, EmailStr, Field
-from typing import Optional, List
+from typing import Dict, Optional, List
 from datetime import datetime
 from decimal import Decimal
 from app.models.models import UserRole, MovementType, PurchaseOrderStatus
@@ -223,27 +223,37 @@ class Inventory(InventoryBase):
 
 # Inventory Movement schemas
 class InventoryMovementBase(BaseModel):
-    product_id: int
     movement_type: MovementType
-    quantity: int = Field(..., ne=0)
+    quantity: int
     reference_number: Optional[str] = Field(None, max_length=50)
     notes: Optional[str] = None
 
 
 class InventoryMovementCreate(InventoryMovementBase):
-    pass
+    # IN, OUT and TRANSFER take a positive amount, ADJUSTMENT a signed delta
+    to_item_id: Optional[int] = None
 
 
 class InventoryMovement(InventoryMovementBase):
     id: int
+    product_id: Optional[int] = None
+    inventory_item_id: Optional[int] = None
+    transfer_item_id: Optional[int] = None
+    balance_after: Optional[int] = None
     user_id: Optional[int] = None
     created_at: datetime
-    product: Optional[Product] = None
 
     class Config:
         from_attributes = True
 
 
+class StockAtTime(BaseModel):
+    at: datetime
+    quantity: int
+    # Quantity per inventory item making up the total
+    items: Dict[int, int] = {}
+
+
 # Purchase Order schemas
 class PurchaseOrderBase(BaseModel):
     supplier_id: int
@@ -307,6 +317,18 @@ class TokenData(BaseModel):
     username: Optional[str] = None
 
 
+class AuthCacheStats(BaseModel):
+    entries: int
+    hits: int
+    misses: int
+    hit_rate: float
+    evictions: int
+    invalidations: int
+    avg_hit_ms: float  # cost of resolving a token from the cache
+    avg_miss_ms: float  # cost of a JWT decode plus users-table lookup
+    saved_ms: float  # auth time saved by cache hits since startup
+
+
 # Response schemas
 class MessageResponse(BaseModel):
     message: str
@@ -349,7 +371,7 @@ class InventoryItemBase(BaseModel):
     quantity: int = Field(..., ge=0)
     min_stock_level: int = Field(10, ge=0)
     max_stock_level: int = Field(1000, ge=0)
-    tags: Optional[List[Tag]] = []
+    tags: Optional[List[TagCreate]] = []
 
 
 class InventoryItemCreate(InventoryItemBase):
@@ -363,7 +385,7 @@ class InventoryItemUpdate(BaseModel):
     quantity: Optional[int] = Field(None, ge=0)
     min_stock_level: Optional[int] = Field(None, ge=0)
     max_stock_level: Optional[int] = Field(None, ge=0)
-    tags: Optional[List[Tag]] = []
+    tags: Optional[List[TagCreate]] = []
 
 
 class InventoryItem(InventoryItemBase):
@@ -372,3 +394,70 @@ class InventoryItem(InventoryItemBase):
     tags: Optional[List[Tag]] = []
     class Config:
         from_attributes = True
+
+
+# Inventory item bulk import schemas
+class InventoryImportError(BaseModel):
+    line: int  # line of the uploaded file, 0 when the file as a whole is unreadable
+    error: str
+
+
+class InventoryImportResult(BaseModel):
+    imported: int = 0
+    failed: int = 0
+    errors: List[InventoryImportError] = []
+
+
+# Dashboard statistics schemas
+class InventoryGroupStats(BaseModel):
+    inventory_id: int
+    name: str
+    item_count: int
+    total_units: int
+    low_stock_items: int
+
+
+class CategoryStats(BaseModel):
+    category_id: Optional[int] = None  # None for products without a category
+    name: Optional[str] = None
+    product_count: int
+
+
+class DashboardStats(BaseModel):
+    total_products: int
+    total_items: int
+    total_units: int
+    low_stock_items: int
+    stock_value: Decimal  # sum of quantity * cost_price over items linked to a product
+    inventories: List[InventoryGroupStats] = []
+    categories: List[CategoryStats] = []
+    generated_at: datetime
+
+
+# Batch quantity adjustment schemas
+class QuantityAdjustment(BaseModel):
+    item_id: int
+    delta: int
+
+
+class QuantityAdjustmentBatch(BaseModel):
+    adjustments: List[QuantityAdjustment] = Field(..., min_length=1, max_length=1000)
+    reference_number: Optional[str] = Field(None, max_length=50)
+    notes: Optional[str] = None
+
+
+class ItemQuantity(BaseModel):
+    item_id: int
+    quantity: int
+
+
+# Slow query log schemas
+class SlowQuery(BaseModel):
+    statement: str
+    calls: int
+    total_ms: float
+    mean_ms: float
+    max_ms: float
+    last_seen: datetime
+    plan: Optional[str] = None  # EXPLAIN output of a sampled execution
+    plan_captured_at: Optional[datetime] = None
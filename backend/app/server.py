@@ -0,0 +1,184 @@
+"""
+Production server: gunicorn managing Uvicorn workers.
+
+    python -m app.server
+
+One worker per CPU available to the process (SERVER_WORKERS overrides).
+The application is imported once in the master before forking, so
+workers start fast and share its memory pages; each worker then opens
+its own database connections after the fork.
+
+Every worker holds a sync and an async connection pool plus the
+notification listener's connection. Before the app is imported, the
+pools are shrunk (never grown past DB_POOL_SIZE/DB_MAX_OVERFLOW) so that
+all workers together fit in the server's max_connections, less
+DB_RESERVED_CONNECTIONS kept free for migrations, psql and monitoring.
+Likewise PASSWORD_HASH_WORKERS and PASSWORD_HASH_QUEUE_LIMIT are shared
+out so the bcrypt processes of all workers do not outnumber the CPUs.
+/metrics adds up the metrics of all workers through a shared directory
+(app.utils.metrics.MultiprocessStore).
+
+Workers are replaced after SERVER_MAX_REQUESTS requests (with jitter, so
+they do not all restart at once) to bound slow memory growth. On SIGTERM
+gunicorn stops accepting connections and lets workers finish the
+requests in flight; connections still open after SERVER_GRACEFUL_TIMEOUT
+(event streams) are closed so shutdown handlers still run.
+"""
+
+import glob
+import os
+import shutil
+import sys
+import tempfile
+from typing import Optional, Tuple
+from sqlalchemy import create_engine, text
+from sqlalchemy.engine import make_url
+from sqlalchemy.pool import NullPool
+from gunicorn.app.base import BaseApplication
+from uvicorn.workers import UvicornWorker
+from app.config import settings
+
+# Connections per worker outside the pools: the notification listener
+UNPOOLED_CONNECTIONS = 1
+
+
+class Worker(UvicornWorker):
+    """UvicornWorker that gives up on lingering connections before gunicorn kills it"""
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.config.timeout_graceful_shutdown = max(1, self.cfg.graceful_timeout - 5)
+
+
+def worker_count() -> int:
+    if settings.SERVER_WORKERS:
+        return settings.SERVER_WORKERS
+    try:
+        return len(os.sched_getaffinity(0))
+    except AttributeError:  # not available on macOS
+        return os.cpu_count() or 1
+
+
+def database_max_connections() -> Optional[int]:
+    if settings.DB_MAX_CONNECTIONS:
+        return settings.DB_MAX_CONNECTIONS
+    if make_url(settings.DATABASE_URL).get_backend_name() != "postgresql":
+        return None
+    engine = create_engine(settings.DATABASE_URL, poolclass=NullPool)
+    try:
+        with engine.connect() as connection:
+            return int(connection.execute(text("SHOW max_connections")).scalar())
+    finally:
+        engine.dispose()
+
+
+def pool_sizes(max_connections: int, workers: int) -> Tuple[int, int]:
+    """(pool_size, max_overflow) of each engine in each worker"""
+    per_worker = (max_connections - settings.DB_RESERVED_CONNECTIONS) // workers
+    # Sync and async engine share what the listener leaves
+    per_pool = (per_worker - UNPOOLED_CONNECTIONS) // 2
+    if per_pool < 1:
+        raise ValueError(
+            f"{workers} workers do not fit in max_connections={max_connections} "
+            f"with {settings.DB_RESERVED_CONNECTIONS} reserved; lower SERVER_WORKERS"
+        )
+    # Keep the configured ratio of idle connections to overflow
+    pool_size = min(
+        settings.DB_POOL_SIZE,
+        max(1, per_pool * settings.DB_POOL_SIZE // (settings.DB_POOL_SIZE + settings.DB_MAX_OVERFLOW))
+    )
+    return pool_size, min(settings.DB_MAX_OVERFLOW, per_pool - pool_size)
+
+
+def hash_worker_share(workers: int) -> Tuple[int, int]:
+    """(bcrypt processes, queue limit) of each worker's password hasher"""
+    return (
+        max(1, settings.PASSWORD_HASH_WORKERS // workers),
+        max(1, settings.PASSWORD_HASH_QUEUE_LIMIT // workers)
+    )
+
+
+def metrics_directory() -> str:
+    """Empty directory for the workers' metrics snapshots"""
+    if not settings.METRICS_MULTIPROCESS_DIR:
+        return tempfile.mkdtemp(prefix="register-metrics-")
+    os.makedirs(settings.METRICS_MULTIPROCESS_DIR, exist_ok=True)
+    # Counts of an earlier run would be added to this one's
+    for path in glob.glob(os.path.join(settings.METRICS_MULTIPROCESS_DIR, "*.json")):
+        os.remove(path)
+    return settings.METRICS_MULTIPROCESS_DIR
+
+
+def remove_metrics_directory(server):
+    shutil.rmtree(settings.METRICS_MULTIPROCESS_DIR, ignore_errors=True)
+
+
+def post_fork(server, worker):
+    """Drop connections inherited from the master without closing them under its feet"""
+    from app.database.async_base import async_engine
+    from app.database.base import engine
+
+    engine.dispose(close=False)
+    async_engine.sync_engine.dispose(close=False)
+
+
+class Server(BaseApplication):
+    def __init__(self, app, options: dict):
+        self.app = app
+        self.options = options
+        super().__init__()
+
+    def load_config(self):
+        for key, value in self.options.items():
+            self.cfg.set(key, value)
+
+    def load(self):
+        return self.app
+
+
+def serve():
+    workers = worker_count()
+    try:
+        max_connections = database_max_connections()
+        if max_connections is not None:
+            settings.DB_POOL_SIZE, settings.DB_MAX_OVERFLOW = pool_sizes(max_connections, workers)
+    except Exception as e:
+        print(f"❌ Cannot size the database pools: {e}")
+        sys.exit(1)
+    settings.PASSWORD_HASH_WORKERS, settings.PASSWORD_HASH_QUEUE_LIMIT = hash_worker_share(workers)
+    temporary_metrics = settings.METRICS_ENABLED and not settings.METRICS_MULTIPROCESS_DIR
+    if settings.METRICS_ENABLED:
+        settings.METRICS_MULTIPROCESS_DIR = metrics_directory()
+    print(
+        f"✓ {workers} workers, database pools of {settings.DB_POOL_SIZE}+{settings.DB_MAX_OVERFLOW} "
+        f"connections per engine (max_connections: {max_connections or 'not limited'}), "
+        f"{settings.PASSWORD_HASH_WORKERS} password hashing process(es) per worker"
+    )
+
+    # Imported only now that the pools are sized; this is the preload
+    from app.database.base import create_tables, engine
+    from app.main import app
+
+    # Once here rather than racing in every worker's startup
+    create_tables()
+    engine.dispose()
+    settings.CREATE_TABLES_ON_STARTUP = False
+
+    options = {
+        "bind": f"{settings.SERVER_HOST}:{settings.SERVER_PORT}",
+        "workers": workers,
+        "worker_class": Worker,
+        "preload_app": True,
+        "max_requests": settings.SERVER_MAX_REQUESTS,
+        "max_requests_jitter": settings.SERVER_MAX_REQUESTS_JITTER,
+        "graceful_timeout": settings.SERVER_GRACEFUL_TIMEOUT,
+        "keepalive": settings.SERVER_KEEPALIVE,
+        "post_fork": post_fork,
+    }
+    if temporary_metrics:
+        options["on_exit"] = remove_metrics_directory
+    Server(app, options).run()
+
+
+if __name__ == "__main__":
+    serve()
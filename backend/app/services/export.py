@@ -0,0 +1,111 @@
+"""
+Streaming NDJSON / CSV exports.
+
+Rows are fetched through a server-side cursor (`yield_per`) and encoded one
+batch at a time, so memory stays flat regardless of the table size and the
+first bytes go out before the query has finished. The generator runs in
+Starlette's threadpool with its own session, which outlives the request's
+get_db session.
+"""
+
+import csv
+import io
+import json
+from datetime import date, datetime
+from decimal import Decimal
+from typing import Callable, Dict, List, Optional, Sequence
+from fastapi.responses import StreamingResponse
+from sqlalchemy import select
+from sqlalchemy.orm import Session
+from sqlalchemy.sql import Select
+from app.database.base import SessionLocal
+from app.models.models import Tag, inventory_tags
+
+EXPORT_FORMATS = ("ndjson", "csv")
+EXPORT_BATCH_SIZE = 1000
+EXPORT_MEDIA_TYPES = {
+    "ndjson": "application/x-ndjson",
+    "csv": "text/csv",
+}
+
+# Same separator the CSV import uses, so item exports can be re-imported
+CSV_LIST_SEPARATOR = ";"
+
+
+def _json_default(value):
+    if isinstance(value, (datetime, date)):
+        return value.isoformat()
+    if isinstance(value, Decimal):
+        return str(value)
+    if hasattr(value, "value"):
+        return value.value
+    raise TypeError(f"Object of type {type(value).__name__} is not JSON serializable")
+
+
+def _encode_ndjson(records: List[Dict]) -> str:
+    return "".join(json.dumps(record, default=_json_default) + "\n" for record in records)
+
+
+def _encode_csv(records: List[Dict], fields: Sequence[str]) -> str:
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    for record in records:
+        row = []
+        for field in fields:
+            value = record.get(field)
+            if isinstance(value, list):
+                value = CSV_LIST_SEPARATOR.join(value)
+            elif isinstance(value, (datetime, date)):
+                value = value.isoformat()
+            row.append("" if value is None else value)
+        writer.writerow(row)
+    return buffer.getvalue()
+
+
+def attach_item_tags(db: Session, records: List[Dict]):
+    """Add the tag names of a batch of inventory item records in one query"""
+    tags: Dict[int, List[str]] = {record["id"]: [] for record in records}
+    rows = db.execute(
+        select(inventory_tags.c.inventory_id, Tag.name)
+        .join(Tag, Tag.id == inventory_tags.c.tag_id)
+        .where(inventory_tags.c.inventory_id.in_(list(tags)))
+        .order_by(inventory_tags.c.inventory_id, Tag.name)
+    )
+    for item_id, name in rows:
+        tags[item_id].append(name)
+    for record in records:
+        record["tags"] = tags[record["id"]]
+
+
+def export_response(
+    statement: Select,
+    fields: Sequence[str],
+    fmt: str,
+    filename: str,
+    enrich: Optional[Callable[[Session, List[Dict]], None]] = None
+) -> StreamingResponse:
+    """
+    Stream the rows of `statement` as NDJSON or CSV.
+
+    `fields` names the output columns (and the CSV header); `enrich` may add
+    computed fields to each batch of records before they are encoded.
+    """
+    def generate():
+        if fmt == "csv":
+            yield _encode_csv([dict(zip(fields, fields))], fields)
+        db = SessionLocal()
+        try:
+            result = db.execute(statement.execution_options(yield_per=EXPORT_BATCH_SIZE))
+            for partition in result.partitions():
+                records = [dict(row._mapping) for row in partition]
+                if enrich:
+                    enrich(db, records)
+                yield _encode_csv(records, fields) if fmt == "csv" else _encode_ndjson(records)
+        finally:
+            db.close()
+
+    return StreamingResponse(
+        generate(),
+        media_type=EXPORT_MEDIA_TYPES[fmt],
+        headers={"Content-Disposition": f'attachment; filename="{filename}.{fmt}"'}
+    )
@@ -0,0 +1,179 @@
+"""
+Streaming bulk import of inventory items.
+
+Rows are read incrementally from a CSV or NDJSON file, validated against
+InventoryItemCreate in chunks and written with one multi-row INSERT per
+chunk, committing as it goes. Memory use is bounded by the chunk size no
+matter how large the file is. Invalid rows are reported individually and
+never abort the rest of the import: a chunk the database rejects is
+retried in savepoints, bisected down to the rows that actually fail.
+"""
+
+import csv
+import io
+import json
+from typing import BinaryIO, Dict, Iterator, List, Tuple
+from pydantic import ValidationError
+from sqlalchemy import insert
+from sqlalchemy.exc import SQLAlchemyError
+from sqlalchemy.orm import Session
+from app.models.models import InventoryItem, inventory_tags
+from app.schemas.schemas import InventoryImportError, InventoryImportResult, InventoryItemCreate
+from app.services.stock_events import item_change, publish_stock_changes
+from app.services.tags import resolve_tags
+
+IMPORT_FORMATS = ("csv", "ndjson")
+IMPORT_CHUNK_SIZE = 1000
+# Per-row errors returned in the response; later failures are only counted
+MAX_REPORTED_ERRORS = 1000
+
+# CSV cells holding several tag names separate them with this character
+CSV_TAG_SEPARATOR = ";"
+
+
+def _csv_rows(stream: BinaryIO) -> Iterator[Tuple[int, object]]:
+    text_stream = io.TextIOWrapper(stream, encoding="utf-8-sig", newline="")
+    for line_number, row in enumerate(csv.DictReader(text_stream), start=2):
+        data = {key: value for key, value in row.items() if key and value not in (None, "")}
+        if "tags" in data:
+            data["tags"] = [
+                {"name": name} for name in data["tags"].split(CSV_TAG_SEPARATOR) if name.strip()
+            ]
+        yield line_number, data
+
+
+def _ndjson_rows(stream: BinaryIO) -> Iterator[Tuple[int, object]]:
+    text_stream = io.TextIOWrapper(stream, encoding="utf-8-sig")
+    for line_number, line in enumerate(text_stream, start=1):
+        if not line.strip():
+            continue
+        try:
+            data = json.loads(line)
+        except ValueError as e:
+            yield line_number, e
+            continue
+        if isinstance(data, dict) and isinstance(data.get("tags"), list):
+            data["tags"] = [{"name": tag} if isinstance(tag, str) else tag for tag in data["tags"]]
+        yield line_number, data
+
+
+def _format_validation_error(error: ValidationError) -> str:
+    return "; ".join(
+        f"{'.'.join(str(part) for part in detail['loc']) or 'row'}: {detail['msg']}"
+        for detail in error.errors()
+    )
+
+
+class _ImportWriter:
+    """Accumulates validated rows and flushes them in multi-row INSERTs"""
+
+    def __init__(self, db: Session, inventory_id: int):
+        self.db = db
+        self.inventory_id = inventory_id
+        self.result = InventoryImportResult()
+        self.pending: List[Tuple[int, InventoryItemCreate]] = []
+
+    def fail(self, line: int, message: str):
+        self.result.failed += 1
+        if len(self.result.errors) < MAX_REPORTED_ERRORS:
+            self.result.errors.append(InventoryImportError(line=line, error=message))
+
+    def add(self, line: int, data: object):
+        if isinstance(data, Exception):
+            self.fail(line, f"Invalid JSON: {data}")
+            return
+        if not isinstance(data, dict):
+            self.fail(line, "Row must be an object")
+            return
+        data["inventory_id"] = self.inventory_id
+        try:
+            item = InventoryItemCreate.model_validate(data)
+        except ValidationError as e:
+            self.fail(line, _format_validation_error(e))
+            return
+        self.pending.append((line, item))
+        if len(self.pending) >= IMPORT_CHUNK_SIZE:
+            self.flush()
+
+    def flush(self):
+        if not self.pending:
+            return
+        chunk, self.pending = self.pending, []
+        try:
+            try:
+                self._write(chunk)
+                imported = len(chunk)
+            except SQLAlchemyError:
+                # Some row broke a constraint the schema cannot check (a
+                # dangling foreign key, a CHECK); find it without losing the rest
+                self.db.rollback()
+                imported = self._write_isolating(chunk)
+            if imported:
+                # One event per chunk rather than per row; subscribers refetch
+                publish_stock_changes(self.db, [item_change("imported", self.inventory_id, None)])
+            self.db.commit()
+        except SQLAlchemyError as e:
+            self.db.rollback()
+            message = f"Database error: {e.__class__.__name__}"
+            for line, _ in chunk:
+                self.fail(line, message)
+            return
+        finally:
+            self.db.expunge_all()
+        self.result.imported += imported
+
+    def _write_isolating(self, chunk: List[Tuple[int, InventoryItemCreate]]) -> int:
+        """
+        Write `chunk` in savepoints, halving it around failures until the
+        failing rows are on their own. Returns the number of rows written.
+        """
+        try:
+            with self.db.begin_nested():
+                self._write(chunk)
+            return len(chunk)
+        except SQLAlchemyError as e:
+            if len(chunk) == 1:
+                self.fail(chunk[0][0], f"Database error: {e.__class__.__name__}")
+                return 0
+            middle = len(chunk) // 2
+            return self._write_isolating(chunk[:middle]) + self._write_isolating(chunk[middle:])
+
+    def _write(self, chunk: List[Tuple[int, InventoryItemCreate]]):
+        rows = [item.dict(exclude={"tags"}) for _, item in chunk]
+        tagged = [item.tags for _, item in chunk]
+
+        if not any(tagged):
+            self.db.execute(insert(InventoryItem), rows)
+            return
+
+        ids = self.db.scalars(
+            insert(InventoryItem).returning(InventoryItem.id, sort_by_parameter_order=True),
+            rows
+        ).all()
+        tag_ids: Dict[str, int] = {
+            tag.name: tag.id
+            for tag in resolve_tags(self.db, [tag for tags in tagged if tags for tag in tags])
+        }
+        links = {
+            (item_id, tag_ids[tag.name.strip()])
+            for item_id, tags in zip(ids, tagged) if tags
+            for tag in tags if tag.name.strip()
+        }
+        if links:
+            self.db.execute(
+                insert(inventory_tags),
+                [{"inventory_id": item_id, "tag_id": tag_id} for item_id, tag_id in links]
+            )
+
+
+def import_items(db: Session, inventory_id: int, stream: BinaryIO, fmt: str) -> InventoryImportResult:
+    """Import every row of a CSV or NDJSON stream into an inventory group"""
+    rows = _csv_rows(stream) if fmt == "csv" else _ndjson_rows(stream)
+    writer = _ImportWriter(db, inventory_id)
+    try:
+        for line, data in rows:
+            writer.add(line, data)
+    except (UnicodeDecodeError, csv.Error) as e:
+        writer.fail(0, f"Unreadable file: {e}")
+    writer.flush()
+    return writer.result
@@ -0,0 +1,23 @@
+from typing import Optional
+from sqlalchemy.orm import Session, selectinload
+from app.models.models import InventoryItem
+from app.utils.pagination import keyset_page
+
+# Same predicate as the partial low-stock indexes on inventory_items
+LOW_STOCK = InventoryItem.quantity < InventoryItem.min_stock_level
+
+
+def low_stock_page(
+    db: Session,
+    limit: int,
+    cursor: Optional[str] = None,
+    inventory_id: Optional[int] = None
+):
+    """
+    One page of items below their minimum stock level, ordered by id, across
+    all inventories or within one. Returns the items and the next cursor.
+    """
+    query = db.query(InventoryItem).options(selectinload(InventoryItem.tags)).filter(LOW_STOCK)
+    if inventory_id is not None:
+        query = query.filter(InventoryItem.inventory_id == inventory_id)
+    return keyset_page(query, (InventoryItem.id,), "low_stock", limit, cursor=cursor)
@@ -0,0 +1,187 @@
+"""
+Inventory movement ledger.
+
+Every stock change is applied with a single conditional
+UPDATE ... SET quantity = quantity + :delta ... RETURNING, so concurrent
+writers never overwrite each other's changes and stock can never go
+negative, and is recorded as a row in inventory_movements in the same
+transaction.
+"""
+
+from typing import Dict, List, Optional
+from fastapi import HTTPException
+from sqlalchemy import case, func, insert, select, update
+from sqlalchemy.orm import Session
+from app.models.models import InventoryItem, InventoryMovement, MovementType
+from app.schemas.schemas import InventoryMovementCreate, QuantityAdjustment
+from app.services.stock_events import item_change, publish_stock_changes
+
+
+def apply_delta(db: Session, item_id: int, delta: int, inventory_id: Optional[int] = None):
+    """
+    Add `delta` to an item's quantity in one statement, unless that would
+    take it below zero. Returns the (quantity, product_id, inventory_id)
+    after the change, or None when the item does not exist or has too
+    little stock.
+    """
+    statement = (
+        update(InventoryItem)
+        .where(InventoryItem.id == item_id, InventoryItem.quantity + delta >= 0)
+        .values(quantity=InventoryItem.quantity + delta, updated_at=func.now(), version=InventoryItem.version + 1)
+        .returning(InventoryItem.quantity, InventoryItem.product_id, InventoryItem.inventory_id)
+        .execution_options(synchronize_session=False)
+    )
+    if inventory_id is not None:
+        statement = statement.where(InventoryItem.inventory_id == inventory_id)
+    return db.execute(statement).first()
+
+
+def _apply_or_raise(db: Session, item_id: int, delta: int, inventory_id: Optional[int] = None):
+    row = apply_delta(db, item_id, delta, inventory_id)
+    if row is not None:
+        return row
+    # Tell a missing item apart from a failed stock guard
+    query = select(InventoryItem.id).where(InventoryItem.id == item_id)
+    if inventory_id is not None:
+        query = query.where(InventoryItem.inventory_id == inventory_id)
+    if db.execute(query).first() is None:
+        raise HTTPException(status_code=404, detail="Item not found")
+    raise HTTPException(status_code=400, detail="Insufficient stock")
+
+
+def _source_delta(movement: InventoryMovementCreate) -> int:
+    """Signed change to the source item, validating the amount for the type"""
+    if movement.movement_type == MovementType.ADJUSTMENT:
+        if movement.quantity == 0:
+            raise HTTPException(status_code=400, detail="Adjustment quantity must not be zero")
+        return movement.quantity
+    if movement.quantity <= 0:
+        raise HTTPException(status_code=400, detail="Quantity must be positive")
+    return movement.quantity if movement.movement_type == MovementType.IN else -movement.quantity
+
+
+def record_movement(
+    db: Session,
+    inventory_id: int,
+    item_id: int,
+    movement: InventoryMovementCreate,
+    user_id: Optional[int] = None
+) -> List:
+    """
+    Apply a movement to an item and record it in the ledger.
+
+    A TRANSFER moves stock to `to_item_id` (in any inventory) and records one
+    row per side. Returns the recorded rows; nothing is committed.
+    """
+    delta = _source_delta(movement)
+    if movement.movement_type == MovementType.TRANSFER:
+        if movement.to_item_id is None:
+            raise HTTPException(status_code=400, detail="Transfers need a to_item_id")
+        if movement.to_item_id == item_id:
+            raise HTTPException(status_code=400, detail="Cannot transfer an item to itself")
+    elif movement.to_item_id is not None:
+        raise HTTPException(status_code=400, detail="to_item_id is only valid for transfers")
+
+    legs = [(item_id, delta, inventory_id, movement.to_item_id)]
+    if movement.movement_type == MovementType.TRANSFER:
+        legs.append((movement.to_item_id, -delta, None, item_id))
+        # Lock rows in id order so that opposite transfers cannot deadlock
+        legs.sort(key=lambda leg: leg[0])
+
+    rows = []
+    changes = []
+    for leg_item_id, leg_delta, leg_inventory_id, other_item_id in legs:
+        try:
+            balance, product_id, item_inventory_id = _apply_or_raise(db, leg_item_id, leg_delta, leg_inventory_id)
+        except HTTPException as exc:
+            if exc.status_code == 404 and leg_item_id != item_id:
+                raise HTTPException(status_code=404, detail="Destination item not found")
+            raise
+        changes.append(item_change("updated", item_inventory_id, leg_item_id, balance))
+        rows.append({
+            "product_id": product_id,
+            "inventory_item_id": leg_item_id,
+            "transfer_item_id": other_item_id,
+            "movement_type": movement.movement_type,
+            "quantity": leg_delta,
+            "balance_after": balance,
+            "reference_number": movement.reference_number,
+            "notes": movement.notes,
+            "user_id": user_id,
+        })
+    # Source leg first, whatever order the rows were locked in
+    rows.sort(key=lambda row: row["inventory_item_id"] != item_id)
+    publish_stock_changes(db, changes)
+
+    table = InventoryMovement.__table__
+    return db.execute(insert(table).returning(*table.c, sort_by_parameter_order=True), rows).all()
+
+
+def merge_adjustments(adjustments: List[QuantityAdjustment]) -> Dict[int, int]:
+    """Net delta per item, dropping items whose changes cancel out"""
+    deltas: Dict[int, int] = {}
+    for adjustment in adjustments:
+        deltas[adjustment.item_id] = deltas.get(adjustment.item_id, 0) + adjustment.delta
+    return {item_id: delta for item_id, delta in deltas.items() if delta}
+
+
+def apply_adjustments(
+    db: Session,
+    inventory_id: int,
+    deltas: Dict[int, int],
+    user_id: Optional[int] = None,
+    reference_number: Optional[str] = None,
+    notes: Optional[str] = None
+) -> Dict[int, int]:
+    """
+    Apply net deltas to many items of an inventory with one multi-row
+    UPDATE ... RETURNING and record them as ADJUSTMENT movements with one
+    multi-row INSERT. All or nothing: if any item is missing or would go
+    below zero, nothing is applied. Returns the new quantity per item;
+    nothing is committed.
+    """
+    if not deltas:
+        return {}
+    delta = case(deltas, value=InventoryItem.id)
+    statement = (
+        update(InventoryItem)
+        .where(
+            InventoryItem.inventory_id == inventory_id,
+            InventoryItem.id.in_(list(deltas)),
+            InventoryItem.quantity + delta >= 0
+        )
+        .values(quantity=InventoryItem.quantity + delta, updated_at=func.now(), version=InventoryItem.version + 1)
+        .returning(InventoryItem.id, InventoryItem.quantity, InventoryItem.product_id)
+        .execution_options(synchronize_session=False)
+    )
+    updated = db.execute(statement).all()
+
+    if len(updated) != len(deltas):
+        db.rollback()
+        existing = set(db.scalars(
+            select(InventoryItem.id)
+            .where(InventoryItem.inventory_id == inventory_id, InventoryItem.id.in_(list(deltas)))
+        ))
+        missing = sorted(set(deltas) - existing)
+        if missing:
+            raise HTTPException(status_code=404, detail=f"Items not found: {', '.join(map(str, missing))}")
+        short = sorted(existing - {item_id for item_id, _, _ in updated})
+        raise HTTPException(status_code=400, detail=f"Insufficient stock for items: {', '.join(map(str, short))}")
+
+    db.execute(insert(InventoryMovement.__table__), [
+        {
+            "product_id": product_id,
+            "inventory_item_id": item_id,
+            "movement_type": MovementType.ADJUSTMENT,
+            "quantity": deltas[item_id],
+            "balance_after": quantity,
+            "reference_number": reference_number,
+            "notes": notes,
+            "user_id": user_id,
+        }
+        for item_id, quantity, product_id in updated
+    ])
+    publish_stock_changes(db, [
+        item_change("updated", inventory_id, item_id, quantity) for item_id, quantity, _ in updated
+    ])
+    return {item_id: quantity for item_id, quantity, _ in updated}
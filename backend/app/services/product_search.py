@@ -0,0 +1,70 @@
+"""
+Indexed product search.
+
+PostgreSQL matches the full-text document and trigram-indexed substring
+matches on name/sku/barcode, ranked by ts_rank plus name similarity.
+SQLite (used for tests) falls back to the products_fts FTS5 table ranked by
+bm25. Other dialects keep the plain substring match.
+"""
+
+from typing import List, Tuple
+from sqlalchemy import Float, Integer, or_, text
+from sqlalchemy.orm import Query, Session
+from sqlalchemy.sql import func
+from app.models.models import Product, product_search_vector
+
+
+def _like_pattern(term: str) -> str:
+    """Build a %term% pattern with LIKE wildcards escaped"""
+    escaped = term.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+    return f"%{escaped}%"
+
+
+def _substring_filter(term: str):
+    pattern = _like_pattern(term)
+    return or_(
+        Product.name.ilike(pattern, escape="\\"),
+        Product.sku.ilike(pattern, escape="\\"),
+        Product.barcode.ilike(pattern, escape="\\")
+    )
+
+
+def _fts5_query(term: str) -> str:
+    """Turn free text into an FTS5 query matching every word as a prefix"""
+    words = [word.replace('"', '""') for word in term.split()]
+    return " ".join(f'"{word}"*' for word in words)
+
+
+def search_products(db: Session, query: Query, term: str) -> Tuple[Query, List]:
+    """
+    Restrict a Product query to rows matching `term`.
+
+    Returns the filtered query and the ORDER BY clauses that rank the matches
+    by relevance, best first.
+    """
+    term = term.strip()
+    if not term:
+        return query, []
+
+    dialect = db.get_bind().dialect.name
+
+    if dialect == "postgresql":
+        tsquery = func.plainto_tsquery(text("'simple'"), term)
+        query = query.filter(
+            or_(product_search_vector.op("@@")(tsquery), _substring_filter(term))
+        )
+        rank = func.ts_rank(product_search_vector, tsquery) + func.similarity(Product.name, term)
+        return query, [rank.desc()]
+
+    if dialect == "sqlite":
+        matches = (
+            text("SELECT rowid AS id, bm25(products_fts) AS rank FROM products_fts WHERE products_fts MATCH :match")
+            .bindparams(match=_fts5_query(term))
+            .columns(id=Integer, rank=Float)
+            .subquery("products_fts_matches")
+        )
+        query = query.join(matches, matches.c.id == Product.id)
+        return query, [matches.c.rank.asc()]
+
+    query = query.filter(or_(_substring_filter(term), Product.description.ilike(_like_pattern(term), escape="\\")))
+    return query, [Product.name]
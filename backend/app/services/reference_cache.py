@@ -0,0 +1,132 @@
+"""
+In-process cache of the reference tables (categories, suppliers, locations).
+
+Each table is loaded whole, in one query, the first time it is needed and
+then served from memory. Writes through any ORM session bump the table's
+version on commit, which drops the cached copy. On PostgreSQL the same
+write queues a NOTIFY on the reference_data channel, so sibling worker
+processes drop theirs too; a TTL bounds staleness should a notification
+ever be missed.
+"""
+
+import threading
+import time
+from itertools import chain
+from typing import Dict, NamedTuple, Optional
+from pydantic import BaseModel
+from sqlalchemy import event
+from sqlalchemy.orm import Session
+from app.config import settings
+from app.database.notifications import notification_listener, notify
+from app.models.models import Category, Location, Supplier
+from app.schemas.schemas import Category as CategorySchema, Location as LocationSchema, Supplier as SupplierSchema
+
+REFERENCE_CHANNEL = "reference_data"
+
+REFERENCE_TABLES = {
+    Category.__tablename__: (Category, CategorySchema),
+    Supplier.__tablename__: (Supplier, SupplierSchema),
+    Location.__tablename__: (Location, LocationSchema),
+}
+REFERENCE_MODELS = {model: table for table, (model, _) in REFERENCE_TABLES.items()}
+
+
+class _Snapshot(NamedTuple):
+    version: int
+    loaded_at: float
+    rows: Dict[int, BaseModel]
+
+
+class ReferenceCache:
+    """Versioned copies of the reference tables, keyed by id"""
+
+    def __init__(self, ttl: float):
+        self.ttl = ttl
+        self._versions = {table: 0 for table in REFERENCE_TABLES}
+        self._snapshots: Dict[str, _Snapshot] = {}
+        self._lock = threading.Lock()
+        self.loads = 0
+
+    def rows(self, db: Session, table: str) -> Dict[int, BaseModel]:
+        """All rows of a reference table as response schemas, keyed by id"""
+        snapshot = self._snapshots.get(table)
+        if (
+            snapshot is not None
+            and snapshot.version == self._versions[table]
+            and time.monotonic() - snapshot.loaded_at < self.ttl
+        ):
+            return snapshot.rows
+        return self._load(db, table)
+
+    def _load(self, db: Session, table: str) -> Dict[int, BaseModel]:
+        model, schema = REFERENCE_TABLES[table]
+        # Read the version before querying: an invalidation that lands
+        # while loading leaves this snapshot outdated rather than trusted
+        version = self._versions[table]
+        rows = {row.id: schema.model_validate(row) for row in db.query(model)}
+        with self._lock:
+            self.loads += 1
+            if version == self._versions[table]:
+                self._snapshots[table] = _Snapshot(version, time.monotonic(), rows)
+        return rows
+
+    def get(self, db: Session, table: str, row_id: Optional[int]) -> Optional[BaseModel]:
+        if row_id is None:
+            return None
+        return self.rows(db, table).get(row_id)
+
+    def exists(self, db: Session, table: str, row_id: int) -> bool:
+        """Check an id, reloading once on a miss in case the row is brand new"""
+        return row_id in self.rows(db, table) or row_id in self._load(db, table)
+
+    def categories(self, db: Session) -> Dict[int, BaseModel]:
+        return self.rows(db, Category.__tablename__)
+
+    def suppliers(self, db: Session) -> Dict[int, BaseModel]:
+        return self.rows(db, Supplier.__tablename__)
+
+    def locations(self, db: Session) -> Dict[int, BaseModel]:
+        return self.rows(db, Location.__tablename__)
+
+    def invalidate(self, table: str):
+        if table not in self._versions:
+            return
+        with self._lock:
+            self._versions[table] += 1
+            self._snapshots.pop(table, None)
+
+    def invalidate_all(self, *_):
+        for table in REFERENCE_TABLES:
+            self.invalidate(table)
+
+
+reference_cache = ReferenceCache(ttl=settings.REFERENCE_CACHE_TTL_SECONDS)
+
+notification_listener.subscribe(REFERENCE_CHANNEL, reference_cache.invalidate)
+notification_listener.on_reconnect(reference_cache.invalidate_all)
+
+
+@event.listens_for(Session, "after_flush")
+def _track_reference_writes(session, flush_context):
+    changed = {
+        REFERENCE_MODELS[type(obj)]
+        for obj in chain(session.new, session.dirty, session.deleted)
+        if type(obj) in REFERENCE_MODELS
+    }
+    if not changed:
+        return
+    session.info.setdefault("reference_changes", set()).update(changed)
+    connection = session.connection()
+    for table in changed:
+        notify(connection, REFERENCE_CHANNEL, table)
+
+
+@event.listens_for(Session, "after_commit")
+def _invalidate_committed_writes(session):
+    for table in session.info.pop("reference_changes", ()):
+        reference_cache.invalidate(table)
+
+
+@event.listens_for(Session, "after_rollback")
+def _discard_rolled_back_writes(session):
+    session.info.pop("reference_changes", None)
@@ -0,0 +1,152 @@
+"""
+Dashboard statistics, aggregated in SQL and cached in process.
+
+The cached figures are dropped whenever a transaction that wrote to one of
+the tables they are built from commits, including bulk statements such as
+movements and imports. On PostgreSQL those writes also NOTIFY the
+dashboard_stats channel so that sibling workers drop theirs; the TTL bounds
+staleness otherwise.
+"""
+
+import threading
+import time
+from datetime import datetime, timezone
+from itertools import chain
+from typing import Optional, Tuple
+from sqlalchemy import case, func
+from sqlalchemy import event
+from sqlalchemy.orm import Session
+from app.config import settings
+from app.database.notifications import notification_listener, notify
+from app.models.models import Category, InventoryGroup, InventoryItem, Product
+from app.schemas.schemas import CategoryStats, DashboardStats, InventoryGroupStats
+from app.services.low_stock import LOW_STOCK
+from app.services.reference_cache import reference_cache
+
+STATS_CHANNEL = "dashboard_stats"
+
+STATS_TABLES = frozenset(
+    model.__tablename__ for model in (Category, InventoryGroup, InventoryItem, Product)
+)
+
+
+def compute_stats(db: Session) -> DashboardStats:
+    """Compute the dashboard figures with three aggregate queries"""
+    groups = (
+        db.query(
+            InventoryGroup.id,
+            InventoryGroup.name,
+            func.count(InventoryItem.id),
+            func.coalesce(func.sum(InventoryItem.quantity), 0),
+            func.coalesce(func.sum(case((LOW_STOCK, 1), else_=0)), 0),
+        )
+        .outerjoin(InventoryItem, InventoryItem.inventory_id == InventoryGroup.id)
+        .group_by(InventoryGroup.id, InventoryGroup.name)
+        .order_by(InventoryGroup.id)
+        .all()
+    )
+    inventories = [
+        InventoryGroupStats(inventory_id=group_id, name=name, item_count=items, total_units=units, low_stock_items=low)
+        for group_id, name, items, units, low in groups
+    ]
+
+    stock_value = (
+        db.query(func.coalesce(func.sum(InventoryItem.quantity * Product.cost_price), 0))
+        .join(Product, Product.id == InventoryItem.product_id)
+        .scalar()
+    )
+
+    counts = dict(
+        db.query(Product.category_id, func.count(Product.id))
+        .filter(Product.is_active == True)
+        .group_by(Product.category_id)
+        .all()
+    )
+    categories = [
+        CategoryStats(category_id=category.id, name=category.name, product_count=counts.pop(category.id, 0))
+        for category in reference_cache.categories(db).values()
+    ]
+    if counts.get(None):
+        categories.append(CategoryStats(product_count=counts.pop(None)))
+
+    return DashboardStats(
+        total_products=sum(category.product_count for category in categories) + sum(counts.values()),
+        total_items=sum(group.item_count for group in inventories),
+        total_units=sum(group.total_units for group in inventories),
+        low_stock_items=sum(group.low_stock_items for group in inventories),
+        stock_value=stock_value,
+        inventories=inventories,
+        categories=categories,
+        generated_at=datetime.now(timezone.utc),
+    )
+
+
+class StatsCache:
+    """Latest computed statistics, dropped on relevant writes or after `ttl` seconds"""
+
+    def __init__(self, ttl: float):
+        self.ttl = ttl
+        self.version = 0
+        self._cached: Optional[Tuple[int, float, DashboardStats]] = None
+        self._lock = threading.Lock()
+
+    def get(self, db: Session) -> DashboardStats:
+        cached = self._cached
+        if cached is not None and cached[0] == self.version and time.monotonic() - cached[1] < self.ttl:
+            return cached[2]
+        # One request recomputes while concurrent ones wait for its result
+        with self._lock:
+            cached = self._cached
+            if cached is not None and cached[0] == self.version and time.monotonic() - cached[1] < self.ttl:
+                return cached[2]
+            version = self.version
+            stats = compute_stats(db)
+            if version == self.version:
+                self._cached = (version, time.monotonic(), stats)
+            return stats
+
+    def invalidate(self, *_):
+        self.version += 1
+        self._cached = None
+
+
+stats_cache = StatsCache(ttl=settings.STATS_CACHE_TTL_SECONDS)
+
+notification_listener.subscribe(STATS_CHANNEL, stats_cache.invalidate)
+notification_listener.on_reconnect(stats_cache.invalidate)
+
+
+def _mark_written(session: Session):
+    if session.info.get("stats_changed"):
+        return
+    session.info["stats_changed"] = True
+    notify(session.connection(), STATS_CHANNEL)
+
+
+@event.listens_for(Session, "after_flush")
+def _track_flushed_writes(session, flush_context):
+    if any(
+        getattr(obj, "__tablename__", None) in STATS_TABLES
+        for obj in chain(session.new, session.dirty, session.deleted)
+    ):
+        _mark_written(session)
+
+
+@event.listens_for(Session, "do_orm_execute")
+def _track_bulk_writes(orm_execute_state):
+    # Statements such as movement updates and bulk imports bypass the flush
+    if orm_execute_state.is_insert or orm_execute_state.is_update or orm_execute_state.is_delete:
+        table = getattr(orm_execute_state.statement, "table", None)
+        if getattr(table, "name", None) in STATS_TABLES:
+            _mark_written(orm_execute_state.session)
+
+
+@event.listens_for(Session, "after_commit")
+def _invalidate_committed_writes(session):
+    if session.info.pop("stats_changed", False):
+        stats_cache.invalidate()
+
+
+@event.listens_for(Session, "after_rollback")
+def _discard_rolled_back_writes(session):
+    session.info.pop("stats_changed", None)
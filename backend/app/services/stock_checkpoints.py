@@ -0,0 +1,202 @@
+"""
+Stock checkpoints and point-in-time stock.
+
+A checkpoint stores an item's quantity after a given ledger movement. They
+are written every STOCK_CHECKPOINT_EVERY movements of an item by an
+incremental roll-up that only reads movements past each item's latest
+checkpoint, in a single INSERT ... SELECT per item id range. The stock of
+an item at any time is then the nearest checkpoint plus the movements
+between it and that time, instead of the item's whole history.
+
+Movements of one item are serialised by the row lock their UPDATE takes,
+so an item's movement ids follow commit order and a checkpoint never
+skips a movement that commits later.
+"""
+
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from typing import Dict, Iterable, List, Optional, Tuple
+from sqlalchemy import and_, delete, func, insert, or_, select
+from sqlalchemy.orm import Session, aliased
+from app.config import settings
+from app.database.base import SessionLocal
+from app.models.models import InventoryItem, InventoryMovement, StockCheckpoint
+
+
+def _latest_checkpoints(first_item_id: int, last_item_id: int):
+    return (
+        select(
+            StockCheckpoint.inventory_item_id.label("item_id"),
+            func.max(StockCheckpoint.movement_id).label("movement_id")
+        )
+        .where(StockCheckpoint.inventory_item_id.between(first_item_id, last_item_id))
+        .group_by(StockCheckpoint.inventory_item_id)
+        .subquery()
+    )
+
+
+def checkpoint_range(db: Session, first_item_id: int, last_item_id: int, every: Optional[int] = None) -> int:
+    """
+    Write the checkpoints due for items with ids in [first_item_id, last_item_id].
+
+    Walks each item's movements after its latest checkpoint and checkpoints
+    every `every`-th one; the running quantity starts from that checkpoint,
+    or for an item without one from the balance before its first movement.
+    Returns the number of checkpoints written; nothing is committed.
+    """
+    every = every or settings.STOCK_CHECKPOINT_EVERY
+    high_water = db.scalar(select(func.max(InventoryMovement.id)))
+    if high_water is None:
+        return 0
+
+    latest = _latest_checkpoints(first_item_id, last_item_id)
+    previous = aliased(StockCheckpoint)
+    window = dict(partition_by=InventoryMovement.inventory_item_id, order_by=InventoryMovement.id)
+    opening = func.coalesce(
+        previous.quantity,
+        func.first_value(InventoryMovement.balance_after - InventoryMovement.quantity).over(**window)
+    )
+    tail = (
+        select(
+            InventoryMovement.inventory_item_id.label("inventory_item_id"),
+            InventoryMovement.id.label("movement_id"),
+            (opening + func.sum(InventoryMovement.quantity).over(**window)).label("quantity"),
+            InventoryMovement.created_at.label("taken_at"),
+            func.row_number().over(**window).label("position"),
+        )
+        .outerjoin(latest, latest.c.item_id == InventoryMovement.inventory_item_id)
+        .outerjoin(previous, and_(
+            previous.inventory_item_id == latest.c.item_id,
+            previous.movement_id == latest.c.movement_id
+        ))
+        .where(
+            InventoryMovement.inventory_item_id.between(first_item_id, last_item_id),
+            InventoryMovement.id > func.coalesce(latest.c.movement_id, 0),
+            InventoryMovement.id <= high_water
+        )
+        .subquery()
+    )
+    statement = insert(StockCheckpoint.__table__).from_select(
+        ["inventory_item_id", "movement_id", "quantity", "taken_at"],
+        select(tail.c.inventory_item_id, tail.c.movement_id, tail.c.quantity, tail.c.taken_at)
+        .where(tail.c.position % every == 0, tail.c.quantity.isnot(None))
+    )
+    return db.execute(statement).rowcount
+
+
+def item_id_ranges(db: Session, parts: int) -> List[Tuple[int, int]]:
+    """Split the item id space into at most `parts` contiguous inclusive ranges"""
+    low, high = db.execute(select(func.min(InventoryItem.id), func.max(InventoryItem.id))).one()
+    if low is None:
+        return []
+    step = max(1, -(-(high - low + 1) // max(1, parts)))
+    return [(start, min(start + step - 1, high)) for start in range(low, high + 1, step)]
+
+
+def _checkpoint_job(first_item_id: int, last_item_id: int, every: Optional[int], rebuild: bool) -> int:
+    with SessionLocal() as db:
+        if rebuild:
+            db.execute(
+                delete(StockCheckpoint)
+                .where(StockCheckpoint.inventory_item_id.between(first_item_id, last_item_id))
+            )
+        written = checkpoint_range(db, first_item_id, last_item_id, every)
+        db.commit()
+        return written
+
+
+def roll_up_checkpoints(workers: int = 1, every: Optional[int] = None, rebuild: bool = False) -> int:
+    """
+    Bring the checkpoints of every item up to date, or with `rebuild` drop
+    and recompute them from the whole ledger. Item id ranges are processed
+    in parallel, each in its own session and transaction. Returns the
+    number of checkpoints written.
+    """
+    with SessionLocal() as db:
+        # A few ranges per worker evens out ranges with busier items
+        ranges = item_id_ranges(db, workers * 4)
+    if workers <= 1:
+        return sum(_checkpoint_job(first, last, every, rebuild) for first, last in ranges)
+    with ThreadPoolExecutor(max_workers=workers, thread_name_prefix="stock-checkpoints") as pool:
+        return sum(pool.map(lambda bounds: _checkpoint_job(*bounds, every, rebuild), ranges))
+
+
+def stock_at(db: Session, item_ids: Iterable[int], at: datetime) -> Dict[int, int]:
+    """
+    Quantity of each item at `at`, keyed by item id (unknown ids are left out).
+
+    Replays forward from the item's last checkpoint taken at or before `at`.
+    Items without one replay backwards from their first checkpoint after
+    `at`, or from their live quantity when they have no checkpoint at all.
+    """
+    item_ids = list(item_ids)
+    if not item_ids:
+        return {}
+    quantities = {}
+
+    before = (
+        select(
+            StockCheckpoint.inventory_item_id.label("item_id"),
+            func.max(StockCheckpoint.movement_id).label("movement_id")
+        )
+        .where(StockCheckpoint.inventory_item_id.in_(item_ids), StockCheckpoint.taken_at <= at)
+        .group_by(StockCheckpoint.inventory_item_id)
+        .subquery()
+    )
+    anchors = db.execute(
+        select(StockCheckpoint.inventory_item_id, StockCheckpoint.quantity)
+        .join(before, and_(
+            before.c.item_id == StockCheckpoint.inventory_item_id,
+            before.c.movement_id == StockCheckpoint.movement_id
+        ))
+    ).all()
+    if anchors:
+        quantities.update(anchors)
+        forward = db.execute(
+            select(InventoryMovement.inventory_item_id, func.sum(InventoryMovement.quantity))
+            .join(before, before.c.item_id == InventoryMovement.inventory_item_id)
+            .where(InventoryMovement.id > before.c.movement_id, InventoryMovement.created_at <= at)
+            .group_by(InventoryMovement.inventory_item_id)
+        )
+        for item_id, total in forward:
+            quantities[item_id] += total
+
+    remaining = [item_id for item_id in item_ids if item_id not in quantities]
+    if not remaining:
+        return quantities
+
+    after = (
+        select(
+            StockCheckpoint.inventory_item_id.label("item_id"),
+            func.min(StockCheckpoint.movement_id).label("movement_id")
+        )
+        .where(StockCheckpoint.inventory_item_id.in_(remaining), StockCheckpoint.taken_at > at)
+        .group_by(StockCheckpoint.inventory_item_id)
+        .subquery()
+    )
+    anchors = dict(db.execute(
+        select(StockCheckpoint.inventory_item_id, StockCheckpoint.quantity)
+        .join(after, and_(
+            after.c.item_id == StockCheckpoint.inventory_item_id,
+            after.c.movement_id == StockCheckpoint.movement_id
+        ))
+    ).all())
+    live = [item_id for item_id in remaining if item_id not in anchors]
+    if live:
+        anchors.update(db.execute(
+            select(InventoryItem.id, InventoryItem.quantity).where(InventoryItem.id.in_(live))
+        ).all())
+    backward = db.execute(
+        select(InventoryMovement.inventory_item_id, func.sum(InventoryMovement.quantity))
+        .outerjoin(after, after.c.item_id == InventoryMovement.inventory_item_id)
+        .where(
+            InventoryMovement.inventory_item_id.in_(list(anchors)),
+            InventoryMovement.created_at > at,
+            or_(after.c.movement_id.is_(None), InventoryMovement.id <= after.c.movement_id)
+        )
+        .group_by(InventoryMovement.inventory_item_id)
+    )
+    for item_id, total in backward:
+        anchors[item_id] -= total
+    quantities.update(anchors)
+    return quantities
@@ -0,0 +1,187 @@
+"""
+Live stock change events.
+
+Item creations, updates, deletions and movements are published when their
+transaction commits. On PostgreSQL they travel as NOTIFY on the
+stock_changes channel, which every worker LISTENs to, so a subscriber on
+any worker sees changes made through any other; elsewhere they are handed
+to this process's subscribers directly.
+
+Each subscriber keeps at most one pending change per item: a burst of
+updates to the same item collapses into its latest state. Pending changes
+are bounded, and a consumer too slow to keep up is sent a single "resync"
+message instead of an ever-growing backlog.
+"""
+
+import asyncio
+import json
+import logging
+import threading
+from itertools import chain
+from typing import Dict, List, Optional, Set
+from sqlalchemy import event
+from sqlalchemy.orm import Session
+from app.config import settings
+from app.database.notifications import notification_listener, notify
+from app.models.models import InventoryItem
+
+logger = logging.getLogger(__name__)
+
+STOCK_CHANNEL = "stock_changes"
+
+
+class StockSubscription:
+    """Pending changes for one connected client, filtered by inventory"""
+
+    def __init__(self, loop: asyncio.AbstractEventLoop, inventory_ids: Optional[Set[int]], max_pending: int):
+        self.loop = loop
+        self.inventory_ids = inventory_ids
+        self.max_pending = max_pending
+        self.pending: Dict[tuple, dict] = {}
+        self.overflowed = False
+        self.ready = asyncio.Event()
+
+    def wants(self, change: dict) -> bool:
+        return self.inventory_ids is None or change.get("inventory_id") in self.inventory_ids
+
+    def push(self, change: dict):
+        """Queue a change; runs on the subscriber's event loop"""
+        if self.overflowed:
+            return
+        key = (change.get("inventory_id"), change.get("item_id"))
+        # Move the item to the end so changes go out in order of last update
+        self.pending.pop(key, None)
+        self.pending[key] = change
+        if len(self.pending) > self.max_pending:
+            self.pending.clear()
+            self.overflowed = True
+        self.ready.set()
+
+    def request_resync(self):
+        """Replace whatever is pending with a single resync message"""
+        self.pending.clear()
+        self.overflowed = True
+        self.ready.set()
+
+    async def next_batch(self, window: float) -> dict:
+        """Wait for changes, give a burst `window` seconds to settle, then drain"""
+        await self.ready.wait()
+        if window > 0:
+            await asyncio.sleep(window)
+        self.ready.clear()
+        if self.overflowed:
+            self.overflowed = False
+            return {"type": "resync"}
+        changes, self.pending = list(self.pending.values()), {}
+        return {"type": "changes", "changes": changes}
+
+
+class StockEventHub:
+    """Fans published stock changes out to the subscriptions of this process"""
+
+    def __init__(self, max_pending: int, coalesce_window: float):
+        self.max_pending = max_pending
+        self.coalesce_window = coalesce_window
+        self._subscriptions: Set[StockSubscription] = set()
+        self._lock = threading.Lock()
+
+    def subscribe(self, inventory_ids: Optional[Set[int]] = None) -> StockSubscription:
+        subscription = StockSubscription(asyncio.get_running_loop(), inventory_ids, self.max_pending)
+        with self._lock:
+            self._subscriptions.add(subscription)
+        return subscription
+
+    def unsubscribe(self, subscription: StockSubscription):
+        with self._lock:
+            self._subscriptions.discard(subscription)
+
+    def dispatch(self, changes: List[dict]):
+        """Hand changes to every interested subscription; safe from any thread"""
+        with self._lock:
+            subscriptions = list(self._subscriptions)
+        for subscription in subscriptions:
+            for change in changes:
+                if subscription.wants(change):
+                    try:
+                        subscription.loop.call_soon_threadsafe(subscription.push, change)
+                    except RuntimeError:
+                        # The subscriber's loop has shut down
+                        self.unsubscribe(subscription)
+                        break
+
+    def dispatch_payload(self, payload: str):
+        try:
+            self.dispatch(json.loads(payload))
+        except ValueError:
+            logger.warning("Ignoring malformed stock change notification")
+
+    def resync_all(self):
+        """Ask every subscriber to refetch, e.g. after notifications may have been missed"""
+        with self._lock:
+            subscriptions = list(self._subscriptions)
+        for subscription in subscriptions:
+            try:
+                subscription.loop.call_soon_threadsafe(subscription.request_resync)
+            except RuntimeError:
+                self.unsubscribe(subscription)
+
+
+stock_events = StockEventHub(
+    max_pending=settings.STOCK_EVENTS_MAX_PENDING,
+    coalesce_window=settings.STOCK_EVENTS_COALESCE_SECONDS
+)
+
+notification_listener.subscribe(STOCK_CHANNEL, stock_events.dispatch_payload)
+notification_listener.on_reconnect(stock_events.resync_all)
+
+
+def item_change(event_type: str, inventory_id: int, item_id: Optional[int], quantity: Optional[int] = None) -> dict:
+    return {"event": event_type, "inventory_id": inventory_id, "item_id": item_id, "quantity": quantity}
+
+
+def publish_stock_changes(session: Session, changes: List[dict]):
+    """
+    Publish changes made in `session`'s current transaction. They reach
+    subscribers once it commits and are dropped if it rolls back.
+    """
+    if not changes:
+        return
+    connection = session.connection()
+    if connection.dialect.name == "postgresql":
+        # pg_notify payloads are limited to 8000 bytes
+        batch = []
+        for change in changes:
+            batch.append(change)
+            if len(batch) == 50:
+                notify(connection, STOCK_CHANNEL, json.dumps(batch))
+                batch = []
+        if batch:
+            notify(connection, STOCK_CHANNEL, json.dumps(batch))
+    else:
+        session.info.setdefault("stock_changes", []).extend(changes)
+
+
+@event.listens_for(Session, "after_flush")
+def _publish_flushed_items(session, flush_context):
+    changes = []
+    for obj in chain(session.new, session.dirty, session.deleted):
+        if isinstance(obj, InventoryItem):
+            event_type = (
+                "deleted" if obj in session.deleted
+                else "created" if obj in session.new
+                else "updated"
+            )
+            changes.append(item_change(event_type, obj.inventory_id, obj.id, obj.quantity))
+    publish_stock_changes(session, changes)
+
+
+@event.listens_for(Session, "after_commit")
+def _dispatch_committed_changes(session):
+    changes = session.info.pop("stock_changes", None)
+    if changes:
+        stock_events.dispatch(changes)
+
+
+@event.listens_for(Session, "after_rollback")
+def _discard_rolled_back_changes(session):
+    session.info.pop("stock_changes", None)
@@ -0,0 +1,480 @@
+"""
+Deterministic synthetic datasets for benchmarks and staging databases.
+
+Every row is derived from (seed, table, id) alone through a small
+integer hash, so any id range can be generated independently and in any
+order, and the same seed always produces the same data. Row counts scale
+from the number of inventory items; items are spread round-robin over the
+inventories (item n belongs to inventory (n - 1) % inventories + 1) so
+workloads can pick items of a given inventory without querying.
+
+Synthetic users are named user1, user2, ... and all share the password
+SYNTHETIC_PASSWORD. Each item gets a short movement ledger ending at its
+quantity, so point-in-time stock is consistent with the items.
+
+load_dataset() inserts through batched INSERTs and works anywhere.
+bulk_load_dataset() is the PostgreSQL path for staging-sized datasets: it
+drops the secondary indexes, streams id ranges in with COPY from parallel
+worker processes, and rebuilds the indexes afterwards.
+"""
+
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from datetime import datetime, timedelta, timezone
+from decimal import Decimal
+from itertools import chain
+from typing import Callable, Dict, Iterator, List, Optional, Tuple
+from sqlalchemy import Table, create_engine, select, text
+from sqlalchemy.engine import Dialect, Engine
+from sqlalchemy.pool import NullPool
+from app.models.models import (
+    Category, InventoryGroup, InventoryItem, InventoryMovement, MovementType, Product, Supplier, Tag, User,
+    UserRole, inventory_tags
+)
+
+SYNTHETIC_PASSWORD = "password"
+
+WORDS = [
+    "widget", "gadget", "bolt", "screw", "cable", "adapter", "monitor", "keyboard",
+    "chair", "desk", "lamp", "paper", "stapler", "marker", "battery", "charger",
+    "router", "switch", "drive", "sensor", "valve", "pump", "filter", "bracket",
+    "hinge", "spring", "gasket", "fuse", "relay", "clamp", "tape", "glue",
+]
+
+# Load order respects foreign keys
+TABLES = {
+    "users": User.__table__,
+    "categories": Category.__table__,
+    "suppliers": Supplier.__table__,
+    "tags": Tag.__table__,
+    "inventories": InventoryGroup.__table__,
+    "products": Product.__table__,
+    "inventory_items": InventoryItem.__table__,
+    "inventory_tags": inventory_tags,
+    "inventory_movements": InventoryMovement.__table__,
+}
+
+# Tables loaded in parallel with each other; each stage only references
+# tables of earlier ones
+LOAD_STAGES = [
+    ["users", "categories", "suppliers", "tags", "inventories"],
+    ["products"],
+    ["inventory_items"],
+    ["inventory_tags", "inventory_movements"],
+]
+
+# Movement ids are (item id - 1) * MOVEMENTS_PER_ITEM + 1.. so that every
+# item's ledger can be generated on its own
+MOVEMENTS_PER_ITEM = 6
+LEDGER_START = datetime(2024, 1, 1, tzinfo=timezone.utc)
+LEDGER_MINUTES = 365 * 24 * 60
+
+COPY_CHUNK_ROWS = 200000
+
+_MASK = (1 << 64) - 1
+
+
+def _splitmix(x: int) -> int:
+    x = (x + 0x9E3779B97F4A7C15) & _MASK
+    x = ((x ^ (x >> 30)) * 0xBF58476D1CE4E5B9) & _MASK
+    x = ((x ^ (x >> 27)) * 0x94D049BB133111EB) & _MASK
+    return x ^ (x >> 31)
+
+
+class RowRandom:
+    """Pseudo-random stream for one row, seeded from (seed, table, row id)"""
+
+    __slots__ = ("state",)
+
+    def __init__(self, seed: int, table: str, row_id: int):
+        self.state = _splitmix(_splitmix(seed ^ hash_name(table)) ^ row_id)
+
+    def below(self, n: int) -> int:
+        self.state = _splitmix(self.state)
+        return self.state % n
+
+    def words(self, count: int) -> List[str]:
+        return [WORDS[self.below(len(WORDS))] for _ in range(count)]
+
+
+def hash_name(name: str) -> int:
+    # Stable across processes, unlike hash() under hash randomization
+    value = 0
+    for char in name.encode():
+        value = (value * 131 + char) & _MASK
+    return value
+
+
+def dataset_counts(items: int) -> Dict[str, int]:
+    """Row counts of a dataset with `items` inventory items"""
+    return {
+        "users": max(10, items // 10000),
+        "categories": min(500, max(10, items // 1000)),
+        "suppliers": min(5000, max(10, items // 500)),
+        "tags": min(10000, max(20, items // 200)),
+        "inventories": max(1, items // 10000),
+        "products": max(1, items // 2),
+        "inventory_items": items,
+        # Up to two tags and MOVEMENTS_PER_ITEM movements per item, generated
+        # per item id
+        "inventory_tags": items,
+        "inventory_movements": items,
+    }
+
+
+def _users(row_id, r, counts, seed, password_hash):
+    return [{
+        "id": row_id,
+        "username": f"user{row_id}",
+        "email": f"user{row_id}@example.com",
+        "hashed_password": password_hash,
+        "full_name": f"Synthetic User {row_id}",
+        "role": UserRole.MANAGER if row_id % 10 == 0 else UserRole.USER,
+        "is_active": True,
+    }]
+
+
+def _categories(row_id, r, counts, seed, password_hash):
+    word = WORDS[row_id % len(WORDS)]
+    return [{
+        "id": row_id, "name": f"Category {row_id:04d}", "description": f"{word.title()}s and related parts",
+        "is_active": True,
+    }]
+
+
+def _suppliers(row_id, r, counts, seed, password_hash):
+    return [{
+        "id": row_id,
+        "name": f"Supplier {row_id:05d}",
+        "contact_person": f"Contact {row_id}",
+        "email": f"orders@supplier{row_id}.example.com",
+        "phone": f"+1-555-{row_id % 10000:04d}",
+        "address": f"{row_id} Industrial Way",
+        "is_active": True,
+    }]
+
+
+def _tags(row_id, r, counts, seed, password_hash):
+    return [{"id": row_id, "name": f"tag-{row_id}", "description": None}]
+
+
+def _inventories(row_id, r, counts, seed, password_hash):
+    return [{"id": row_id, "name": f"Warehouse {row_id:04d}", "description": f"Synthetic warehouse {row_id}"}]
+
+
+def _products(row_id, r, counts, seed, password_hash):
+    words = r.words(3)
+    unit_cents = 100 + r.below(100000)
+    return [{
+        "id": row_id,
+        "name": " ".join(words).title(),
+        "description": f"{words[0]} for {WORDS[r.below(len(WORDS))]} use",
+        "sku": f"SKU-{row_id:08d}",
+        "barcode": f"{row_id:013d}",
+        "unit_price": Decimal(unit_cents).scaleb(-2),
+        "cost_price": Decimal(unit_cents * 3 // 5).scaleb(-2),
+        "category_id": 1 + r.below(counts["categories"]),
+        "supplier_id": 1 + r.below(counts["suppliers"]),
+        "created_by": None,
+        "is_active": r.below(20) != 0,
+    }]
+
+
+def _inventory_items(row_id, r, counts, seed, password_hash):
+    # About one item in twenty is below its minimum stock level
+    quantity = r.below(10) if r.below(20) == 0 else 10 + r.below(490)
+    return [{
+        "id": row_id,
+        "inventory_id": (row_id - 1) % counts["inventories"] + 1,
+        "name": " ".join(r.words(2)).title(),
+        "description": None,
+        "category": f"Category {1 + r.below(counts['categories']):04d}",
+        "product_id": 1 + r.below(counts["products"]),
+        "location_id": None,
+        "quantity": quantity,
+        "min_stock_level": 10,
+        "max_stock_level": 1000,
+        "updated_at": None,
+        "version": 1,
+    }]
+
+
+def _inventory_tags(row_id, r, counts, seed, password_hash):
+    tags = counts["tags"]
+    first = 1 + r.below(tags)
+    # Zero, one or two distinct tags
+    return [
+        {"inventory_id": row_id, "tag_id": tag_id}
+        for tag_id in (first, first % tags + 1)[:r.below(3)]
+    ]
+
+
+def _inventory_movements(row_id, r, counts, seed, password_hash):
+    item = _inventory_items(row_id, RowRandom(seed, "inventory_items", row_id), counts, seed, password_hash)[0]
+    # Walk back from the item's current quantity so that no balance is negative
+    balance = item["quantity"]
+    steps = []
+    for _ in range(r.below(MOVEMENTS_PER_ITEM)):
+        if balance > 0 and r.below(2):
+            delta = 1 + r.below(min(balance, 50))
+            steps.append((MovementType.IN, delta, balance))
+        else:
+            delta = -(1 + r.below(20))
+            steps.append((MovementType.OUT, delta, balance))
+        balance -= delta
+    if balance:
+        # The initial receipt
+        steps.append((MovementType.IN, balance, balance))
+    steps.reverse()
+    minutes = sorted(r.below(LEDGER_MINUTES) for _ in steps)
+    first_id = (row_id - 1) * MOVEMENTS_PER_ITEM + 1
+    return [
+        {
+            "id": first_id + n,
+            "product_id": item["product_id"],
+            "inventory_item_id": row_id,
+            "transfer_item_id": None,
+            "movement_type": movement_type,
+            "quantity": delta,
+            "balance_after": balance_after,
+            "reference_number": f"SYN-{first_id + n}",
+            "notes": None,
+            "user_id": 1 + r.below(counts["users"]),
+            "created_at": LEDGER_START + timedelta(minutes=minute),
+        }
+        for n, ((movement_type, delta, balance_after), minute) in enumerate(zip(steps, minutes))
+    ]
+
+
+GENERATORS: Dict[str, Callable] = {
+    "users": _users,
+    "categories": _categories,
+    "suppliers": _suppliers,
+    "tags": _tags,
+    "inventories": _inventories,
+    "products": _products,
+    "inventory_items": _inventory_items,
+    "inventory_tags": _inventory_tags,
+    "inventory_movements": _inventory_movements,
+}
+
+
+def generate_rows(
+    table: str,
+    start: int,
+    stop: int,
+    counts: Dict[str, int],
+    seed: int = 0,
+    password_hash: str = ""
+) -> Iterator[dict]:
+    """Rows of `table` for ids start..stop-1 (1-based; item ids for tags and movements)"""
+    generator = GENERATORS[table]
+    for row_id in range(start, stop):
+        yield from generator(row_id, RowRandom(seed, table, row_id), counts, seed, password_hash)
+
+
+def reset_sequences(engine: Engine):
+    """Move PostgreSQL id sequences past the explicitly inserted ids"""
+    if engine.dialect.name != "postgresql":
+        return
+    with engine.begin() as connection:
+        for table in TABLES.values():
+            if "id" in table.c:
+                connection.execute(text(
+                    f"SELECT setval(pg_get_serial_sequence('{table.name}', 'id'), "
+                    f"(SELECT COALESCE(MAX(id), 0) + 1 FROM {table.name}), false)"
+                ))
+
+
+def _check_empty(engine: Engine):
+    with engine.connect() as connection:
+        for table in TABLES.values():
+            if connection.execute(select(select(1).select_from(table).exists())).scalar():
+                raise RuntimeError(f"Table {table.name} is not empty; synthetic data needs an empty database")
+
+
+def _analyze(engine: Engine):
+    if engine.dialect.name == "postgresql":
+        with engine.connect().execution_options(isolation_level="AUTOCOMMIT") as connection:
+            connection.execute(text("ANALYZE"))
+
+
+def load_dataset(
+    engine: Engine,
+    items: int,
+    seed: int = 0,
+    batch_size: int = 5000,
+    password_hash: str = "",
+    progress: Optional[Callable[[str, int], None]] = None
+) -> Dict[str, int]:
+    """
+    Insert a synthetic dataset with `items` inventory items through
+    batched INSERTs. The target tables must be empty. Returns the row
+    counts per table.
+    """
+    counts = dataset_counts(items)
+    _check_empty(engine)
+
+    loaded = {}
+    for name, table in TABLES.items():
+        rows = 0
+        batch = []
+        with engine.begin() as connection:
+            for row in generate_rows(name, 1, counts[name] + 1, counts, seed, password_hash):
+                batch.append(row)
+                if len(batch) == batch_size:
+                    connection.execute(table.insert(), batch)
+                    rows += len(batch)
+                    batch = []
+            if batch:
+                connection.execute(table.insert(), batch)
+                rows += len(batch)
+        loaded[name] = rows
+        if progress:
+            progress(name, rows)
+
+    reset_sequences(engine)
+    _analyze(engine)
+    return loaded
+
+
+def _copy_value(value) -> str:
+    """A value in COPY's text format"""
+    if value is None:
+        return "\\N"
+    if value is True or value is False:
+        return "t" if value else "f"
+    if isinstance(value, datetime):
+        return value.isoformat()
+    return str(value).replace("\\", "\\\\").replace("\t", "\\t").replace("\n", "\\n").replace("\r", "\\r")
+
+
+def copy_lines(table: Table, dialect: Dialect, rows: Iterator[dict]) -> Tuple[List[str], Iterator[str]]:
+    """
+    The column list and COPY text lines for `rows`, with values converted by
+    the columns' types as an INSERT would (e.g. enums to their stored names)
+    """
+    first = next(rows, None)
+    if first is None:
+        return [], iter(())
+    columns = list(first)
+    processors = [table.c[column].type.bind_processor(dialect) for column in columns]
+
+    def lines():
+        for row in chain([first], rows):
+            values = []
+            for column, processor in zip(columns, processors):
+                value = row[column]
+                values.append(_copy_value(processor(value) if processor is not None and value is not None else value))
+            yield "\t".join(values) + "\n"
+
+    return columns, lines()
+
+
+class CopyStream:
+    """File-like object handing COPY lines to psycopg2's copy_expert as it reads"""
+
+    def __init__(self, lines: Iterator[str]):
+        self.lines = lines
+        self.pending = b""
+        self.rows = 0
+
+    def read(self, size: int = -1) -> bytes:
+        chunks, length = [self.pending], len(self.pending)
+        while size < 0 or length < size:
+            line = next(self.lines, None)
+            if line is None:
+                break
+            data = line.encode()
+            chunks.append(data)
+            length += len(data)
+            self.rows += 1
+        data = b"".join(chunks)
+        if size < 0:
+            self.pending = b""
+            return data
+        self.pending = data[size:]
+        return data[:size]
+
+
+def _copy_range(task) -> Tuple[str, int]:
+    """Worker process: COPY one id range of a table in its own transaction"""
+    database_url, name, start, stop, counts, seed, password_hash = task
+    engine = create_engine(database_url, poolclass=NullPool)
+    try:
+        connection = engine.raw_connection()
+        try:
+            cursor = connection.cursor()
+            cursor.execute("SET synchronous_commit = off")
+            table = TABLES[name]
+            columns, lines = copy_lines(
+                table, engine.dialect, generate_rows(name, start, stop, counts, seed, password_hash)
+            )
+            stream = CopyStream(lines)
+            if columns:
+                cursor.copy_expert(f"COPY {table.name} ({', '.join(columns)}) FROM STDIN", stream)
+            connection.commit()
+            return name, stream.rows
+        finally:
+            connection.close()
+    finally:
+        engine.dispose()
+
+
+def _create_index(engine: Engine, index):
+    with engine.connect() as connection:
+        connection.execute(text("SET maintenance_work_mem = '512MB'"))
+        index.create(connection)
+        connection.commit()
+
+
+def bulk_load_dataset(
+    engine: Engine,
+    items: int,
+    seed: int = 0,
+    workers: int = 4,
+    password_hash: str = "",
+    progress: Optional[Callable[[str, int], None]] = None
+) -> Dict[str, int]:
+    """
+    Load a synthetic dataset with `items` inventory items into an empty
+    PostgreSQL database with COPY from `workers` processes, each streaming
+    its own id range of COPY_CHUNK_ROWS ids. Secondary indexes are dropped
+    for the load and rebuilt in parallel afterwards. Other databases fall
+    back to load_dataset().
+    """
+    if engine.dialect.name != "postgresql":
+        return load_dataset(engine, items, seed=seed, password_hash=password_hash, progress=progress)
+
+    counts = dataset_counts(items)
+    _check_empty(engine)
+
+    indexes = [index for table in TABLES.values() for index in table.indexes]
+    with engine.begin() as connection:
+        for index in indexes:
+            connection.execute(text(f"DROP INDEX IF EXISTS {index.name}"))
+
+    database_url = engine.url.render_as_string(hide_password=False)
+    # Forked workers must not share the parent's pooled connections
+    engine.dispose()
+    loaded = {name: 0 for name in TABLES}
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        for stage in LOAD_STAGES:
+            tasks = [
+                (database_url, name, start, min(start + COPY_CHUNK_ROWS, counts[name] + 1), counts, seed, password_hash)
+                for name in stage
+                for start in range(1, counts[name] + 1, COPY_CHUNK_ROWS)
+            ]
+            for name, rows in pool.map(_copy_range, tasks):
+                loaded[name] += rows
+            if progress:
+                for name in stage:
+                    progress(name, loaded[name])
+
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        list(pool.map(lambda index: _create_index(engine, index), indexes))
+    if progress:
+        progress("indexes", len(indexes))
+
+    reset_sequences(engine)
+    _analyze(engine)
+    return loaded
@@ -0,0 +1,75 @@
+"""
+Bulk tag resolution for inventory items.
+
+Resolves a list of tag names to Tag rows with one SELECT, creating the
+missing ones with a single INSERT ... ON CONFLICT DO NOTHING so that
+concurrent requests introducing the same new tag do not trip the unique
+constraint on Tag.name.
+"""
+
+from typing import Dict, Iterable, List
+from sqlalchemy import delete, insert, select
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.orm import Session
+from app.models.models import Tag, inventory_tags
+from app.schemas.schemas import TagCreate
+
+
+def _insert_ignoring_conflicts(db: Session, rows: List[dict]):
+    """Insert tag rows, skipping names that already exist"""
+    dialect = db.get_bind().dialect.name
+    if dialect == "postgresql":
+        stmt = postgresql.insert(Tag).on_conflict_do_nothing(index_elements=[Tag.name])
+    elif dialect == "sqlite":
+        stmt = sqlite.insert(Tag).on_conflict_do_nothing(index_elements=[Tag.name])
+    else:
+        stmt = insert(Tag)
+    db.execute(stmt, rows)
+
+
+def resolve_tags(db: Session, tags: Iterable[TagCreate]) -> List[Tag]:
+    """
+    Return the Tag rows for the given tags, in input order and without
+    duplicates, creating any that do not exist yet.
+    """
+    wanted: Dict[str, TagCreate] = {}
+    for tag in tags:
+        name = tag.name.strip()
+        if name and name not in wanted:
+            wanted[name] = tag
+    if not wanted:
+        return []
+
+    found = {
+        tag.name: tag
+        for tag in db.scalars(select(Tag).where(Tag.name.in_(list(wanted))))
+    }
+
+    missing = [name for name in wanted if name not in found]
+    if missing:
+        _insert_ignoring_conflicts(
+            db,
+            [{"name": name, "description": wanted[name].description} for name in missing]
+        )
+        # Re-read rather than rely on RETURNING: rows inserted concurrently by
+        # another transaction are skipped by ON CONFLICT and would be missing
+        for tag in db.scalars(select(Tag).where(Tag.name.in_(missing))):
+            found[tag.name] = tag
+
+    return [found[name] for name in wanted]
+
+
+def set_item_tags(db: Session, item_id: int, tags: List[Tag], replace: bool = False):
+    """Link tags to an item with one INSERT, first unlinking its current ones if `replace`"""
+    if replace:
+        db.execute(delete(inventory_tags).where(inventory_tags.c.inventory_id == item_id))
+    if tags:
+        db.execute(insert(inventory_tags), [{"inventory_id": item_id, "tag_id": tag.id} for tag in tags])
+
+
+def item_tags(db: Session, item_id: int) -> List[Tag]:
+    return list(db.scalars(
+        select(Tag)
+        .join(inventory_tags, inventory_tags.c.tag_id == Tag.id)
+        .where(inventory_tags.c.inventory_id == item_id)
+    ))
@@ -1,17 +1,18 @@
+import time
 from datetime import datetime, timedelta
 from typing import Optional
 from jose import JWTError, jwt
-from passlib.context import CryptContext
 from fastapi import HTTPException, status, Depends
 from fastapi.security import OAuth2PasswordBearer
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
 from app.config import settings
 from app.database.base import get_db
-from app.models.models import User
-from app.schemas.schemas import TokenData
-
-# Password hashing
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
+from app.models.models import User, UserRole
+from app.schemas.schemas import TokenData, User as UserSchema
+from app.utils.auth_cache import auth_cache
+from app.utils.passwords import password_hasher, pwd_context
 
 # OAuth2 scheme
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl=f"{settings.API_V1_STR}/auth/login")
@@ -73,28 +74,102 @@ def authenticate_user(db: Session, username: str, password: str) -> Optional[Use
     return user
 
 
+async def get_user_by_username_async(db: AsyncSession, username: str) -> Optional[User]:
+    """Get user by username on an async session"""
+    return await db.scalar(select(User).where(User.username == username))
+
+
+async def get_user_by_email_async(db: AsyncSession, email: str) -> Optional[User]:
+    """Get user by email on an async session"""
+    return await db.scalar(select(User).where(User.email == email))
+
+
+async def get_password_hash_async(password: str) -> str:
+    """Hash a password in the password worker pool"""
+    return await password_hasher.hash(password)
+
+
+async def authenticate_user_async(db: AsyncSession, username: str, password: str) -> Optional[User]:
+    """
+    Authenticate a user on an async session, upgrading the stored hash when
+    it was made with a different cost factor than BCRYPT_ROUNDS
+    """
+    user = await get_user_by_username_async(db, username)
+    if not user:
+        return None
+    verified, new_hash = await password_hasher.verify_and_update(password, user.hashed_password)
+    if not verified:
+        return None
+    if new_hash:
+        user.hashed_password = new_hash
+        await db.commit()
+    return user
+
+
+def resolve_token_user(db: Session, token: str) -> UserSchema:
+    """
+    Resolve a bearer token to the user record it belongs to.
+
+    Results are kept in the auth cache, so repeated requests with the same
+    token skip both the JWT decode and the users-table SELECT.
+    """
+    user = auth_cache.get(token)
+    if user is not None:
+        return user
+
+    started = time.perf_counter()
+    version = auth_cache.version
+    credentials_exception = HTTPException(
+        status_code=status.HTTP_401_UNAUTHORIZED,
+        detail="Could not validate credentials",
+        headers={"WWW-Authenticate": "Bearer"},
+    )
+    try:
+        payload = jwt.decode(token, settings.SECRET_KEY, algorithms=[settings.ALGORITHM])
+    except JWTError:
+        auth_cache.record_miss(time.perf_counter() - started)
+        raise credentials_exception
+    username = payload.get("sub")
+    db_user = get_user_by_username(db, username) if username else None
+    if db_user is None:
+        auth_cache.record_miss(time.perf_counter() - started)
+        raise credentials_exception
+
+    user = UserSchema.model_validate(db_user)
+    auth_cache.put(token, user, float(payload.get("exp", time.time())), time.perf_counter() - started, version)
+    return user
+
+
 def get_current_user(token: str = Depends(oauth2_scheme), db: Session = Depends(get_db)) -> User:
-    """Bypass authentication: always return a dummy user."""
-    class DummyUser:
-        id = 1
-        username = "demo"
-        email = "demo@example.com"
-        full_name = "Demo User"
-        role = "admin"
-        is_active = True
-    return DummyUser()
+    """Resolve the user of the request's bearer token (a dummy admin under AUTH_BYPASS)."""
+    if settings.AUTH_BYPASS:
+        class DummyUser:
+            id = 1
+            username = "demo"
+            email = "demo@example.com"
+            full_name = "Demo User"
+            role = "admin"
+            is_active = True
+        return DummyUser()
+    return resolve_token_user(db, token)
 
 
 def get_current_active_user(current_user: User = Depends(get_current_user)) -> User:
-    """Bypass active user check: always return dummy user."""
+    """Reject inactive users."""
+    if not current_user.is_active:
+        raise HTTPException(status_code=400, detail="Inactive user")
     return current_user
 
 
 def require_admin(current_user: User = Depends(get_current_active_user)) -> User:
-    """Bypass admin check: always return dummy user."""
+    """Only allow admins."""
+    if current_user.role != UserRole.ADMIN:
+        raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Not enough permissions")
     return current_user
 
 
 def require_manager_or_admin(current_user: User = Depends(get_current_active_user)) -> User:
-    """Bypass manager/admin check: always return dummy user."""
+    """Only allow managers and admins."""
+    if current_user.role not in (UserRole.ADMIN, UserRole.MANAGER):
+        raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Not enough permissions")
     return current_user
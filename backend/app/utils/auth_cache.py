@@ -0,0 +1,182 @@
+import hashlib
+import threading
+import time
+from collections import OrderedDict
+from typing import Dict, NamedTuple, Optional, Set
+from sqlalchemy import event, inspect
+from sqlalchemy.orm import Session
+from app.config import settings
+from app.database.notifications import notification_listener, notify
+from app.models.models import User
+from app.schemas.schemas import User as UserSchema
+
+
+class _Entry(NamedTuple):
+    user: UserSchema
+    expires_at: float
+
+
+class AuthCache:
+    """
+    TTL/LRU cache of resolved bearer tokens.
+
+    Keyed by the SHA-256 digest of the token (the token itself is never
+    stored), each entry holds the compact user record the token resolved
+    to. Entries expire after `ttl` seconds or at the token's own expiry,
+    whichever comes first, and are dropped as soon as a change to the
+    user's name, role or active flag commits through the ORM. On PostgreSQL
+    the same commit delivers a NOTIFY on the auth_cache channel, so sibling
+    worker processes drop their entries too; everything is dropped when the
+    listener reconnects, as notifications may have been missed meanwhile.
+
+    A lookup that read the users table before such a commit may still hold
+    the old row; `version` is bumped by every invalidation so that its
+    result is not cached.
+    """
+
+    def __init__(self, ttl: float, max_entries: int):
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[str, _Entry]" = OrderedDict()
+        self._keys_by_user: Dict[int, Set[str]] = {}
+        self._lock = threading.Lock()
+        self.version = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.invalidations = 0
+        self._hit_seconds = 0.0
+        self._miss_seconds = 0.0
+
+    @staticmethod
+    def _key(token: str) -> str:
+        return hashlib.sha256(token.encode()).hexdigest()
+
+    def get(self, token: str) -> Optional[UserSchema]:
+        started = time.perf_counter()
+        key = self._key(token)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            if entry.expires_at <= time.time():
+                self._remove(key)
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            self._hit_seconds += time.perf_counter() - started
+            return entry.user
+
+    def put(self, token: str, user: UserSchema, token_expires_at: float, lookup_seconds: float, version: int):
+        """
+        Cache a resolved token; `lookup_seconds` is what resolving it cost and
+        `version` the cache version read before the lookup started
+        """
+        key = self._key(token)
+        expires_at = min(time.time() + self.ttl, token_expires_at)
+        with self._lock:
+            self.misses += 1
+            self._miss_seconds += lookup_seconds
+            if self.ttl <= 0 or self.max_entries <= 0 or version != self.version:
+                return
+            self._remove(key)
+            self._entries[key] = _Entry(user, expires_at)
+            self._keys_by_user.setdefault(user.id, set()).add(key)
+            while len(self._entries) > self.max_entries:
+                self._remove(next(iter(self._entries)))
+                self.evictions += 1
+
+    def record_miss(self, lookup_seconds: float):
+        """Account for a lookup whose result could not be cached"""
+        with self._lock:
+            self.misses += 1
+            self._miss_seconds += lookup_seconds
+
+    def _remove(self, key: str):
+        entry = self._entries.pop(key, None)
+        if entry is not None:
+            keys = self._keys_by_user.get(entry.user.id)
+            if keys is not None:
+                keys.discard(key)
+                if not keys:
+                    del self._keys_by_user[entry.user.id]
+
+    def invalidate_user(self, user_id: int):
+        """Drop every cached token of a user"""
+        with self._lock:
+            for key in list(self._keys_by_user.get(user_id, ())):
+                self._remove(key)
+            self.version += 1
+            self.invalidations += 1
+
+    def invalidate_payload(self, payload: str):
+        self.invalidate_user(int(payload))
+
+    def clear(self, *_):
+        with self._lock:
+            self._entries.clear()
+            self._keys_by_user.clear()
+            self.version += 1
+
+    def stats(self) -> dict:
+        with self._lock:
+            lookups = self.hits + self.misses
+            avg_hit_ms = self._hit_seconds * 1000 / self.hits if self.hits else 0.0
+            avg_miss_ms = self._miss_seconds * 1000 / self.misses if self.misses else 0.0
+            return {
+                "entries": len(self._entries),
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": self.hits / lookups if lookups else 0.0,
+                "evictions": self.evictions,
+                "invalidations": self.invalidations,
+                "avg_hit_ms": avg_hit_ms,
+                "avg_miss_ms": avg_miss_ms,
+                "saved_ms": max(0.0, avg_miss_ms - avg_hit_ms) * self.hits,
+            }
+
+
+auth_cache = AuthCache(
+    ttl=settings.AUTH_CACHE_TTL_SECONDS,
+    max_entries=settings.AUTH_CACHE_MAX_ENTRIES
+)
+
+AUTH_CACHE_CHANNEL = "auth_cache"
+
+notification_listener.subscribe(AUTH_CACHE_CHANNEL, auth_cache.invalidate_payload)
+notification_listener.on_reconnect(auth_cache.clear)
+
+
+# Changes are only evicted once they commit: evicting at flush time would
+# let a concurrent request re-cache the still-committed old row. The
+# NOTIFY queued here is likewise only delivered to other workers on commit
+
+
+def _track_invalidation(connection, target):
+    session = inspect(target).session
+    if session is not None:
+        session.info.setdefault("auth_cache_invalidations", set()).add(target.id)
+    notify(connection, AUTH_CACHE_CHANNEL, str(target.id))
+
+
+@event.listens_for(User, "after_update")
+def _track_access_change(mapper, connection, target):
+    attrs = inspect(target).attrs
+    if any(attrs[name].history.has_changes() for name in ("username", "role", "is_active")):
+        _track_invalidation(connection, target)
+
+
+@event.listens_for(User, "after_delete")
+def _track_delete(mapper, connection, target):
+    _track_invalidation(connection, target)
+
+
+@event.listens_for(Session, "after_commit")
+def _invalidate_committed_changes(session):
+    for user_id in session.info.pop("auth_cache_invalidations", ()):
+        auth_cache.invalidate_user(user_id)
+
+
+@event.listens_for(Session, "after_rollback")
+def _discard_rolled_back_changes(session):
+    session.info.pop("auth_cache_invalidations", None)
@@ -0,0 +1,19 @@
+from typing import Dict, NoReturn
+from fastapi import HTTPException
+from sqlalchemy.exc import IntegrityError
+
+
+def raise_for_unique_violation(exc: IntegrityError, messages: Dict[str, str]) -> NoReturn:
+    """
+    Turn a unique-constraint violation on one of the columns of `messages`
+    into a 400 with that column's message, so writes can rely on the
+    constraint instead of checking with a SELECT first. Anything else is
+    re-raised unchanged.
+    """
+    error = str(exc.orig)
+    for column, detail in messages.items():
+        # PostgreSQL: "Key (sku)=(...) already exists"
+        # SQLite: "UNIQUE constraint failed: products.sku"
+        if f"Key ({column})=" in error or (error.startswith("UNIQUE constraint failed") and error.endswith(f".{column}")):
+            raise HTTPException(status_code=400, detail=detail) from exc
+    raise exc
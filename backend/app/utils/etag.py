@@ -0,0 +1,39 @@
+import hashlib
+from typing import Any
+from fastapi import Request, Response
+
+
+def make_etag(*watermark: Any) -> str:
+    """
+    Build a weak ETag from a watermark: values (ids, counts, updated_at
+    timestamps) that change whenever the underlying rows change.
+
+    Aggregates over many rows must move with every commit. max(updated_at)
+    does not: now() is the transaction's start time on PostgreSQL, so a
+    long transaction can commit a timestamp older than one already seen.
+    Listings sum a version column bumped by each UPDATE instead.
+    """
+    digest = hashlib.sha1(repr(watermark).encode()).hexdigest()[:20]
+    return f'W/"{digest}"'
+
+
+def etag_matches(request: Request, etag: str) -> bool:
+    """Weak comparison of `etag` against the request's If-None-Match header"""
+    header = request.headers.get("if-none-match")
+    if not header:
+        return False
+    if header.strip() == "*":
+        return True
+    opaque = etag.removeprefix("W/")
+    return any(candidate.strip().removeprefix("W/") == opaque for candidate in header.split(","))
+
+
+def conditional_response(request: Request, response: Response, etag: str):
+    """
+    Return a 304 response when the client already holds `etag`; otherwise
+    attach the ETag to the outgoing response and return None.
+    """
+    if etag_matches(request, etag):
+        return Response(status_code=304, headers={"ETag": etag})
+    response.headers["ETag"] = etag
+    return None
@@ -0,0 +1,428 @@
+"""
+Request and database metrics in the Prometheus text format.
+
+MetricsMiddleware records per-route latency, response size and status
+counts; SQLAlchemy cursor events on the engine add the number of SQL
+statements and the time spent in the database to the request that issued
+them. Requests are labelled by route template (/items/{item_id}), never
+by raw path, so the number of series stays bounded.
+
+Metrics are only updated on the event loop thread: statements executed in
+threadpool workers accumulate in a per-request RequestStats reached
+through a context variable, and are folded into the histograms when the
+response completes. No locking is needed on the hot path.
+
+Under the multi-process server every worker has its own registry, and a
+scrape reaches whichever worker accepts it. A MultiprocessStore then
+shares them through a directory: each worker writes a snapshot of its
+registry there every second, and /metrics publishes its own worker's
+snapshot and adds up all of them. A worker's published snapshots only
+grow, so consecutive scrapes never see a counter go back, whichever
+worker answers. Workers that exit (recycled after their request limit)
+fold their final counts into an archive, so counters do not go back when
+a worker is replaced either.
+"""
+
+import asyncio
+import copy
+import fcntl
+import json
+import os
+import time
+from bisect import bisect_left
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+from starlette.responses import Response
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+SIZE_BUCKETS = (256, 1024, 4096, 16384, 65536, 262144, 1048576, 4194304)
+STATEMENT_BUCKETS = (0, 1, 2, 5, 10, 20, 50, 100)
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+
+def _format_value(value: float) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    return repr(float(value)) if not float(value).is_integer() else str(int(value))
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _format_labels(names: Sequence[str], values: Sequence[str]) -> str:
+    if not names:
+        return ""
+    return "{" + ",".join(f'{name}="{_escape(str(value))}"' for name, value in zip(names, values)) + "}"
+
+
+class Metric:
+    type = ""
+    # Only counted while the process that recorded it is alive
+    live_only = False
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+
+    def samples(self) -> List[str]:
+        raise NotImplementedError
+
+    def dump(self) -> list:
+        """The recorded values as JSON-compatible [labels, value] pairs"""
+        raise NotImplementedError
+
+    def load(self, data: list):
+        """Add values from another process's dump() to this metric"""
+        raise NotImplementedError
+
+    def empty(self) -> "Metric":
+        """A metric of the same kind with nothing recorded"""
+        raise NotImplementedError
+
+    def render(self) -> str:
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} {self.type}"]
+        lines.extend(self.samples())
+        return "\n".join(lines)
+
+
+class Counter(Metric):
+    type = "counter"
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()):
+        super().__init__(name, documentation, labelnames)
+        self.values: Dict[Tuple[str, ...], float] = {}
+
+    def inc(self, labels: Tuple[str, ...] = (), amount: float = 1):
+        self.values[labels] = self.values.get(labels, 0) + amount
+
+    def samples(self) -> List[str]:
+        return [
+            f"{self.name}{_format_labels(self.labelnames, labels)} {_format_value(value)}"
+            for labels, value in sorted(self.values.items())
+        ]
+
+    def dump(self) -> list:
+        return [[list(labels), value] for labels, value in self.values.items()]
+
+    def load(self, data: list):
+        for labels, value in data:
+            self.inc(tuple(labels), value)
+
+    def empty(self) -> "Counter":
+        metric = copy.copy(self)
+        metric.values = {}
+        return metric
+
+
+class Gauge(Counter):
+    type = "gauge"
+    live_only = True
+
+    def dec(self, labels: Tuple[str, ...] = (), amount: float = 1):
+        self.inc(labels, -amount)
+
+
+class Histogram(Metric):
+    type = "histogram"
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str], buckets: Sequence[float]):
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(buckets)
+        # Per label set: non-cumulative bucket counts (last one is +Inf) and the sum
+        self.series: Dict[Tuple[str, ...], List[float]] = {}
+
+    def observe(self, labels: Tuple[str, ...], value: float):
+        series = self.series.get(labels)
+        if series is None:
+            series = self.series[labels] = [0] * (len(self.buckets) + 2)
+        series[bisect_left(self.buckets, value)] += 1
+        series[-1] += value
+
+    def samples(self) -> List[str]:
+        lines = []
+        bucket_labels = self.labelnames + ("le",)
+        for labels, series in sorted(self.series.items()):
+            cumulative = 0
+            for bound, count in zip(self.buckets + (float("inf"),), series):
+                cumulative += count
+                lines.append(
+                    f"{self.name}_bucket{_format_labels(bucket_labels, labels + (_format_value(bound),))} {cumulative}"
+                )
+            label_text = _format_labels(self.labelnames, labels)
+            lines.append(f"{self.name}_sum{label_text} {_format_value(series[-1])}")
+            lines.append(f"{self.name}_count{label_text} {cumulative}")
+        return lines
+
+    def dump(self) -> list:
+        return [[list(labels), series] for labels, series in self.series.items()]
+
+    def load(self, data: list):
+        for labels, values in data:
+            series = self.series.get(tuple(labels))
+            if series is None:
+                self.series[tuple(labels)] = list(values)
+            else:
+                for index, value in enumerate(values):
+                    series[index] += value
+
+    def empty(self) -> "Histogram":
+        metric = copy.copy(self)
+        metric.series = {}
+        return metric
+
+
+class MetricsRegistry:
+    def __init__(self):
+        self.metrics: List[Metric] = []
+
+    def register(self, metric: Metric) -> Metric:
+        self.metrics.append(metric)
+        return metric
+
+    def snapshot(self, live: bool = True) -> Dict[str, list]:
+        """Every metric's values; without `live`, leave out live-only metrics"""
+        return {metric.name: metric.dump() for metric in self.metrics if live or not metric.live_only}
+
+    def combine(self, snapshots: Iterable[Dict[str, list]], include_own: bool = True) -> "MetricsRegistry":
+        """A registry holding the sum of `snapshots` and, optionally, this one's values"""
+        combined = MetricsRegistry()
+        for metric in self.metrics:
+            combined.register(copy.deepcopy(metric) if include_own else metric.empty())
+        for snapshot in snapshots:
+            for metric in combined.metrics:
+                metric.load(snapshot.get(metric.name, []))
+        return combined
+
+    def render(self) -> str:
+        return "\n".join(metric.render() for metric in self.metrics) + "\n"
+
+
+registry = MetricsRegistry()
+
+REQUESTS = registry.register(Counter(
+    "http_requests_total", "HTTP requests by route and status", ("method", "route", "status")
+))
+REQUEST_DURATION = registry.register(Histogram(
+    "http_request_duration_seconds", "HTTP request latency", ("method", "route"), LATENCY_BUCKETS
+))
+RESPONSE_SIZE = registry.register(Histogram(
+    "http_response_size_bytes", "HTTP response body size as sent", ("method", "route"), SIZE_BUCKETS
+))
+IN_PROGRESS = registry.register(Gauge(
+    "http_requests_in_progress", "HTTP requests being served", ("method",)
+))
+REQUEST_STATEMENTS = registry.register(Histogram(
+    "http_request_db_statements", "SQL statements executed per HTTP request", ("method", "route"), STATEMENT_BUCKETS
+))
+REQUEST_DB_DURATION = registry.register(Histogram(
+    "http_request_db_duration_seconds", "Time spent executing SQL per HTTP request", ("method", "route"), LATENCY_BUCKETS
+))
+
+
+class RequestStats:
+    __slots__ = ("statements", "db_seconds")
+
+    def __init__(self):
+        self.statements = 0
+        self.db_seconds = 0.0
+
+
+_request_stats: ContextVar[Optional[RequestStats]] = ContextVar("request_stats", default=None)
+
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    if context is not None and _request_stats.get() is not None:
+        context.metrics_started = time.perf_counter()
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    stats = _request_stats.get()
+    if stats is not None:
+        started = getattr(context, "metrics_started", None)
+        if started is not None:
+            stats.db_seconds += time.perf_counter() - started
+        stats.statements += 1
+
+
+def instrument_engine(engine: Engine):
+    """Attribute the statements executed on `engine` to the current request"""
+    event.listen(engine, "before_cursor_execute", _before_cursor_execute)
+    event.listen(engine, "after_cursor_execute", _after_cursor_execute)
+
+
+def _route_label(scope: Scope) -> str:
+    route = scope.get("route")
+    return getattr(route, "path", None) or "unmatched"
+
+
+class MetricsMiddleware:
+    def __init__(self, app: ASGIApp, store: Optional["MultiprocessStore"] = None):
+        self.app = app
+        self.store = store
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        method = scope["method"]
+        stats = RequestStats()
+        token = _request_stats.set(stats)
+        status = 500
+        size = 0
+
+        async def send_wrapper(message: Message):
+            nonlocal status, size
+            if message["type"] == "http.response.start":
+                status = message["status"]
+            elif message["type"] == "http.response.body":
+                size += len(message.get("body", b""))
+            await send(message)
+
+        IN_PROGRESS.inc((method,))
+        started = time.perf_counter()
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            elapsed = time.perf_counter() - started
+            _request_stats.reset(token)
+            IN_PROGRESS.dec((method,))
+            labels = (method, _route_label(scope))
+            REQUESTS.inc(labels + (str(status),))
+            REQUEST_DURATION.observe(labels, elapsed)
+            RESPONSE_SIZE.observe(labels, size)
+            REQUEST_STATEMENTS.observe(labels, stats.statements)
+            REQUEST_DB_DURATION.observe(labels, stats.db_seconds)
+            if self.store is not None:
+                self.store.dirty = True
+
+
+def _process_alive(pid: int) -> bool:
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        pass
+    return True
+
+
+class MultiprocessStore:
+    """
+    Shares a registry between the worker processes of one server through
+    `directory`, which must be empty when the server starts.
+
+    <pid>.json holds each running worker's latest snapshot, written
+    atomically. archive.json holds the sum of all exited workers, less the
+    live-only gauges. A lock file orders archiving against scrapes, so a
+    scrape never counts a worker both in the archive and in its own file.
+    """
+
+    ARCHIVE = "archive.json"
+    LOCK = "metrics.lock"
+
+    def __init__(self, registry: MetricsRegistry, directory: str, interval: float = 1.0):
+        self.registry = registry
+        self.directory = directory
+        self.interval = interval
+        self.dirty = False
+        self._task: Optional[asyncio.Task] = None
+
+    @property
+    def _path(self) -> str:
+        # Resolved on use: the store is created before the workers fork
+        return os.path.join(self.directory, f"{os.getpid()}.json")
+
+    @contextmanager
+    def _locked(self, operation: int):
+        with open(os.path.join(self.directory, self.LOCK), "a") as lock:
+            fcntl.flock(lock, operation)
+            try:
+                yield
+            finally:
+                fcntl.flock(lock, fcntl.LOCK_UN)
+
+    @staticmethod
+    def _read(path: str) -> Optional[Dict[str, list]]:
+        try:
+            with open(path) as f:
+                return json.load(f)
+        except (FileNotFoundError, ValueError):
+            return None
+
+    @staticmethod
+    def _write(path: str, snapshot: Dict[str, list]):
+        temporary = f"{path}.{os.getpid()}.tmp"
+        with open(temporary, "w") as f:
+            json.dump(snapshot, f)
+        os.replace(temporary, path)
+
+    def _archive(self, snapshot: Dict[str, list]):
+        """Fold a finished process's snapshot into the archive; needs the exclusive lock"""
+        path = os.path.join(self.directory, self.ARCHIVE)
+        archived = [self._read(path) or {}, snapshot]
+        self._write(path, self.registry.combine(archived, include_own=False).snapshot(live=False))
+
+    def write(self):
+        self.dirty = False
+        self._write(self._path, self.registry.snapshot())
+
+    async def _write_periodically(self):
+        while True:
+            await asyncio.sleep(self.interval)
+            if self.dirty:
+                self.write()
+
+    def start(self):
+        """Begin publishing this worker's metrics; call from the event loop"""
+        with self._locked(fcntl.LOCK_EX):
+            # Left behind by a killed worker that had the same pid
+            stale = self._read(self._path)
+            if stale is not None:
+                self._archive(stale)
+                os.remove(self._path)
+        self.write()
+        self._task = asyncio.create_task(self._write_periodically())
+
+    def stop(self):
+        """Move this worker's final counts into the archive"""
+        if self._task is not None:
+            self._task.cancel()
+            self._task = None
+        with self._locked(fcntl.LOCK_EX):
+            self._archive(self.registry.snapshot(live=False))
+            if os.path.exists(self._path):
+                os.remove(self._path)
+
+    def render(self) -> str:
+        # Only published snapshots are added up: mixing this worker's live
+        # values with the others' older snapshots would let consecutive
+        # scrapes answered by different workers disagree
+        self.write()
+        snapshots = []
+        with self._locked(fcntl.LOCK_SH):
+            for name in os.listdir(self.directory):
+                if not name.endswith(".json"):
+                    continue
+                snapshot = self._read(os.path.join(self.directory, name))
+                if snapshot is None:
+                    continue
+                if name != self.ARCHIVE and not _process_alive(int(name[:-len(".json")])):
+                    snapshot = {
+                        metric.name: snapshot.get(metric.name, [])
+                        for metric in self.registry.metrics if not metric.live_only
+                    }
+                snapshots.append(snapshot)
+        return self.registry.combine(snapshots, include_own=False).render()
+
+
+def metrics_response(store: Optional[MultiprocessStore] = None) -> Response:
+    content = store.render() if store is not None else registry.render()
+    return Response(content, media_type=CONTENT_TYPE)
@@ -0,0 +1,59 @@
+import base64
+import json
+from typing import Any, List, Optional, Sequence
+from fastapi import HTTPException
+from sqlalchemy import tuple_
+
+
+def encode_cursor(key: str, values: Sequence[Any]) -> str:
+    """Encode the sort key values of the last row of a page into an opaque cursor"""
+    payload = json.dumps({"k": key, "v": list(values)}, separators=(",", ":"), default=str)
+    return base64.urlsafe_b64encode(payload.encode()).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str, key: str) -> List[Any]:
+    """Decode a cursor produced by encode_cursor for the given sort key"""
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        payload = json.loads(base64.urlsafe_b64decode(padded.encode()))
+        values = payload["v"]
+        if payload["k"] != key or not isinstance(values, list):
+            raise ValueError
+    except (ValueError, KeyError, TypeError):
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+    return values
+
+
+def keyset_page(
+    query,
+    columns: Sequence,
+    key: str,
+    limit: int,
+    cursor: Optional[str] = None,
+    offset: int = 0
+):
+    """
+    Fetch one page of a query ordered by `columns` using keyset pagination.
+
+    The last column must be unique (normally the primary key) so that the
+    ordering is total. Without a cursor the page starts at `offset`, which
+    keeps plain skip/limit callers working. Returns the rows and the cursor
+    of the next page, or None when this is the last page.
+    """
+    if cursor:
+        values = decode_cursor(cursor, key)
+        if len(values) != len(columns):
+            raise HTTPException(status_code=400, detail="Invalid cursor")
+        query = query.filter(tuple_(*columns) > tuple_(*values))
+
+    query = query.order_by(*columns)
+    if offset and not cursor:
+        query = query.offset(offset)
+    rows = query.limit(limit + 1).all()
+
+    next_cursor = None
+    if len(rows) > limit:
+        rows = rows[:limit]
+        last = rows[-1]
+        next_cursor = encode_cursor(key, [getattr(last, column.key) for column in columns])
+    return rows, next_cursor
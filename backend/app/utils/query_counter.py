@@ -0,0 +1,54 @@
+from contextlib import contextmanager
+from typing import List
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+from app.database.base import engine as default_engine
+
+
+class QueryCounter:
+    """Records the SQL statements executed on an engine while active"""
+
+    def __init__(self):
+        self.statements: List[str] = []
+
+    @property
+    def count(self) -> int:
+        return len(self.statements)
+
+    def _before_cursor_execute(self, conn, cursor, statement, parameters, context, executemany):
+        self.statements.append(statement)
+
+
+@contextmanager
+def count_queries(bind: Engine = default_engine):
+    """
+    Count the SQL statements executed on `bind` inside the block.
+
+        with count_queries() as counter:
+            client.get("/api/v1/products")
+        print(counter.count)
+    """
+    counter = QueryCounter()
+    event.listen(bind, "before_cursor_execute", counter._before_cursor_execute)
+    try:
+        yield counter
+    finally:
+        event.remove(bind, "before_cursor_execute", counter._before_cursor_execute)
+
+
+@contextmanager
+def assert_max_queries(limit: int, bind: Engine = default_engine):
+    """
+    Fail if the block executes more than `limit` SQL statements on `bind`.
+
+    Used by benchmarks/query_counts.py to pin the number of statements the
+    list endpoints may issue, so that per-row lazy loading (N+1 queries)
+    cannot creep back in.
+    """
+    with count_queries(bind) as counter:
+        yield counter
+    if counter.count > limit:
+        executed = "\n".join(f"  {statement}" for statement in counter.statements)
+        raise AssertionError(
+            f"Expected at most {limit} SQL statements, {counter.count} were executed:\n{executed}"
+        )
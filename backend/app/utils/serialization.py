@@ -0,0 +1,110 @@
+"""
+Fast JSON responses.
+
+FastAPI's default path validates every returned object against the
+response_model (from_attributes) and then walks the result again with
+jsonable_encoder before encoding it. For list endpoints returning
+thousands of ORM rows that dominates CPU time, although the rows come
+straight from the database and need no validation.
+
+ModelSerializer reads the attributes a response schema declares straight
+off ORM objects, RETURNING rows or schema instances, recursing into nested
+schemas, and FastJSONResponse encodes the result with orjson. The output
+matches what the schema would produce.
+"""
+
+import typing
+from decimal import Decimal
+from typing import Any, Dict, Iterable, List, Optional, Tuple, Type
+import orjson
+from fastapi import Response
+from fastapi.responses import JSONResponse
+from pydantic import BaseModel
+
+
+def _default(value: Any):
+    # Pydantic encodes Decimal as a string in JSON; match it
+    if isinstance(value, Decimal):
+        return str(value)
+    raise TypeError(f"Object of type {type(value).__name__} is not JSON serializable")
+
+
+def dumps(content: Any) -> bytes:
+    return orjson.dumps(content, default=_default, option=orjson.OPT_UTC_Z | orjson.OPT_NON_STR_KEYS)
+
+
+class FastJSONResponse(JSONResponse):
+    """JSONResponse encoded with orjson"""
+
+    def render(self, content: Any) -> bytes:
+        return dumps(content)
+
+
+def json_response(content: Any, response: Optional[Response] = None) -> FastJSONResponse:
+    """
+    Wrap `content` in a FastJSONResponse. FastAPI drops headers set on the
+    injected `response` when an endpoint returns a Response itself, so they
+    are copied over.
+    """
+    return FastJSONResponse(content, headers=dict(response.headers) if response is not None else None)
+
+
+def _unwrap(annotation) -> Tuple[Optional[Type[BaseModel]], bool]:
+    """The nested schema of a field annotation, and whether it is a list of them"""
+    origin = typing.get_origin(annotation)
+    if origin is typing.Union:
+        args = [arg for arg in typing.get_args(annotation) if arg is not type(None)]
+        return _unwrap(args[0]) if len(args) == 1 else (None, False)
+    if origin in (list, List):
+        nested, _ = _unwrap(typing.get_args(annotation)[0])
+        return nested, nested is not None
+    if isinstance(annotation, type) and issubclass(annotation, BaseModel):
+        return annotation, False
+    return None, False
+
+
+class ModelSerializer:
+    """Builds JSON-ready dicts shaped like `schema` from trusted objects, without validation"""
+
+    _instances: Dict[Type[BaseModel], "ModelSerializer"] = {}
+
+    def __init__(self, schema: Type[BaseModel]):
+        self.schema = schema
+        self._fields: Optional[List[Tuple[str, Optional["ModelSerializer"], bool]]] = None
+
+    @classmethod
+    def for_schema(cls, schema: Type[BaseModel]) -> "ModelSerializer":
+        if schema not in cls._instances:
+            cls._instances[schema] = cls(schema)
+        return cls._instances[schema]
+
+    @property
+    def fields(self):
+        # Resolved lazily so that self-referencing schemas work
+        if self._fields is None:
+            fields = []
+            for name, field in self.schema.model_fields.items():
+                nested, many = _unwrap(field.annotation)
+                fields.append((name, ModelSerializer.for_schema(nested) if nested else None, many))
+            self._fields = fields
+        return self._fields
+
+    def to_dict(self, obj: Any, **overrides) -> Optional[dict]:
+        """`overrides` replace attributes, e.g. relationships served from a cache"""
+        if obj is None:
+            return None
+        data = {}
+        for name, nested, many in self.fields:
+            value = overrides[name] if name in overrides else getattr(obj, name, None)
+            if nested is not None and value is not None:
+                value = [nested.to_dict(item) for item in value] if many else nested.to_dict(value)
+            data[name] = value
+        return data
+
+    def to_list(self, objs: Iterable[Any]) -> List[dict]:
+        return [self.to_dict(obj) for obj in objs]
+
+
+def serialize(schema: Type[BaseModel], objs: Iterable[Any]) -> List[dict]:
+    """Serialize trusted objects as a list of `schema`"""
+    return ModelSerializer.for_schema(schema).to_list(objs)
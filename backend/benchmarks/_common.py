@@ -0,0 +1,28 @@
+"""
+Helpers shared by the benchmark scripts, which run as
+python benchmarks/<name>.py from the backend directory.
+"""
+
+import os
+import sys
+import tempfile
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+
+def setup_database(args, name: str):
+    """
+    Point the app at --database-url, or at a throwaway SQLite file named
+    after the benchmark. Must run before anything from app is imported.
+    """
+    if args.database_url:
+        os.environ["DATABASE_URL"] = args.database_url
+    else:
+        path = os.path.join(tempfile.mkdtemp(), f"{name}_bench.db")
+        os.environ["DATABASE_URL"] = f"sqlite:///{path}"
+    os.environ["DEBUG"] = "false"
+
+
+def percentile(values, fraction: float):
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * fraction))]
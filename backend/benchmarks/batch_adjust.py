@@ -0,0 +1,70 @@
+#!/usr/bin/env python3
+"""
+Batch quantity adjustment benchmark.
+
+Replays a scanner's queue of +1/-1 scans over a few items, once as one
+PUT per scan (read the quantity, write it back) and once as a single
+POST .../items/adjust, and prints requests, SQL statements and wall time
+for each as one JSON line.
+
+    python benchmarks/batch_adjust.py --scans 200 --items 20
+"""
+
+import argparse
+import json
+import random
+import time
+
+from _common import setup_database
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--scans", type=int, default=200, help="Scans in the queue")
+    parser.add_argument("--items", type=int, default=20, help="Distinct items scanned")
+    parser.add_argument("--database-url", help="Database to run against (default: throwaway SQLite)")
+    return parser.parse_args()
+
+
+def main():
+    args = parse_args()
+    setup_database(args, "batch_adjust")
+
+    from fastapi.testclient import TestClient
+    from app.config import settings
+    from app.main import app
+    from app.utils.query_counter import count_queries
+
+    rng = random.Random(1)
+    with TestClient(app, headers={"Authorization": "Bearer benchmark"}) as client:
+        inventory_id = client.post(f"{settings.API_V1_STR}/inventories", json={"name": "Scanner bench"}).json()["id"]
+        base = f"{settings.API_V1_STR}/inventory/inventories/{inventory_id}/items"
+        item_ids = [
+            client.post(base, json={"inventory_id": inventory_id, "name": f"Item {i}", "quantity": 1000}).json()["id"]
+            for i in range(args.items)
+        ]
+        scans = [{"item_id": rng.choice(item_ids), "delta": rng.choice((1, -1))} for _ in range(args.scans)]
+
+        with count_queries() as counter:
+            started = time.perf_counter()
+            for scan in scans:
+                current = client.get(f"{base}/{scan['item_id']}").json()["quantity"]
+                client.put(f"{base}/{scan['item_id']}", json={"quantity": current + scan["delta"]}).raise_for_status()
+            elapsed = time.perf_counter() - started
+        print(json.dumps({
+            "mode": "put_per_scan", "requests": args.scans * 2, "queries": counter.count,
+            "ms": round(elapsed * 1000, 2)
+        }))
+
+        with count_queries() as counter:
+            started = time.perf_counter()
+            client.post(f"{base}/adjust", json={"adjustments": scans}).raise_for_status()
+            elapsed = time.perf_counter() - started
+        print(json.dumps({
+            "mode": "batch_adjust", "requests": 1, "queries": counter.count,
+            "ms": round(elapsed * 1000, 2)
+        }))
+
+
+if __name__ == "__main__":
+    main()
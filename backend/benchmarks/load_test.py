@@ -0,0 +1,205 @@
+#!/usr/bin/env python3
+"""
+API load benchmark.
+
+Seeds a deterministic synthetic dataset (app.services.synthetic_data)
+sized by --items, then drives scripted workloads through the app
+in-process with httpx.AsyncClient and prints one JSON line per workload
+with throughput and p50/p95/p99 latency:
+
+    search      product search (GET /products?search=)
+    list_items  full item listing of an inventory
+    scanner     batches of +1/-1 scans (POST .../items/adjust)
+    login       password login of a synthetic user
+
+    python benchmarks/load_test.py --items 10000 --requests 500 --concurrency 8
+    python benchmarks/load_test.py --items 100000 --output run.json
+    python benchmarks/load_test.py --items 100000 --baseline run.json
+
+Results carry the git commit they were measured on. With --baseline, each
+workload is compared against an earlier --output file and the script
+exits non-zero when throughput drops or p95 latency grows by more than
+--tolerance. Against --database-url a large dataset can be seeded once
+and reused by later runs with --skip-seed.
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import random
+import subprocess
+import sys
+import time
+
+from _common import percentile, setup_database
+
+WORKLOADS = ("search", "list_items", "scanner", "login")
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--items", type=int, default=10000, help="Inventory items in the dataset; other tables scale from it")
+    parser.add_argument("--workloads", nargs="+", choices=WORKLOADS, default=list(WORKLOADS))
+    parser.add_argument("--requests", type=int, default=500, help="Timed requests per workload")
+    parser.add_argument("--warmup", type=int, default=20, help="Untimed requests per workload")
+    parser.add_argument("--concurrency", type=int, default=8, help="Requests in flight")
+    parser.add_argument("--scan-batch", type=int, default=10, help="Scans per scanner request")
+    parser.add_argument("--seed", type=int, default=0, help="Dataset and workload seed")
+    parser.add_argument("--database-url", help="Database to run against (default: throwaway SQLite)")
+    parser.add_argument("--skip-seed", action="store_true", help="Reuse a dataset already seeded with the same --items and --seed")
+    parser.add_argument("--output", help="Also write the results to this file")
+    parser.add_argument("--baseline", help="Results file of an earlier run to compare against")
+    parser.add_argument("--tolerance", type=float, default=0.2, help="Allowed relative regression against --baseline")
+    return parser.parse_args()
+
+
+def git_commit():
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, check=True,
+            cwd=os.path.dirname(os.path.abspath(__file__))
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def make_workloads(api, counts, args):
+    """Each workload returns a coroutine function issuing one request with a given RNG"""
+    from app.services.synthetic_data import SYNTHETIC_PASSWORD, WORDS
+
+    inventories = counts["inventories"]
+    items = counts["inventory_items"]
+
+    def random_item(rng, inventory_id):
+        # Items are spread round-robin over the inventories
+        per_inventory = (items - inventory_id) // inventories + 1
+        return inventory_id + rng.randrange(per_inventory) * inventories
+
+    async def search(client, rng):
+        query = " ".join(rng.sample(WORDS, rng.choice((1, 2))))
+        return await client.get(f"{api}/products", params={"search": query, "limit": 50})
+
+    async def list_items(client, rng):
+        return await client.get(f"{api}/inventory/inventories/{rng.randint(1, inventories)}/items")
+
+    async def scanner(client, rng):
+        inventory_id = rng.randint(1, inventories)
+        scans = [
+            {"item_id": random_item(rng, inventory_id), "delta": rng.choice((1, 1, -1))}
+            for _ in range(args.scan_batch)
+        ]
+        return await client.post(
+            f"{api}/inventory/inventories/{inventory_id}/items/adjust", json={"adjustments": scans}
+        )
+
+    async def login(client, rng):
+        return await client.post(
+            f"{api}/auth/login",
+            data={"username": f"user{rng.randint(1, counts['users'])}", "password": SYNTHETIC_PASSWORD}
+        )
+
+    return {"search": search, "list_items": list_items, "scanner": scanner, "login": login}
+
+
+async def run_workload(client, name, request, args):
+    rng = random.Random(f"{args.seed}:{name}")
+    for _ in range(args.warmup):
+        await request(client, rng)
+
+    latencies = []
+    # Rejected: 4xx, e.g. a scan taking an empty item below zero. Errors: 5xx
+    rejected = errors = 0
+    remaining = args.requests
+
+    async def worker():
+        nonlocal remaining, rejected, errors
+        while remaining > 0:
+            remaining -= 1
+            started = time.perf_counter()
+            response = await request(client, rng)
+            latencies.append((time.perf_counter() - started) * 1000)
+            if response.status_code >= 500:
+                errors += 1
+            elif response.status_code >= 400:
+                rejected += 1
+
+    started = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(args.concurrency)))
+    elapsed = time.perf_counter() - started
+    return {
+        "workload": name,
+        "requests": len(latencies),
+        "rejected": rejected,
+        "errors": errors,
+        "concurrency": args.concurrency,
+        "requests_per_second": round(len(latencies) / elapsed, 2),
+        "p50_ms": round(percentile(latencies, 0.50), 2),
+        "p95_ms": round(percentile(latencies, 0.95), 2),
+        "p99_ms": round(percentile(latencies, 0.99), 2),
+        "max_ms": round(max(latencies), 2),
+    }
+
+
+def regressions(results, baseline_path, tolerance):
+    with open(baseline_path) as f:
+        baseline = {entry["workload"]: entry for entry in map(json.loads, f)}
+    found = []
+    for result in results:
+        before = baseline.get(result["workload"])
+        if before is None:
+            continue
+        if result["requests_per_second"] < before["requests_per_second"] * (1 - tolerance):
+            found.append(f"{result['workload']}: {before['requests_per_second']} -> {result['requests_per_second']} requests/s")
+        if result["p95_ms"] > before["p95_ms"] * (1 + tolerance):
+            found.append(f"{result['workload']}: p95 {before['p95_ms']} -> {result['p95_ms']} ms")
+    return found
+
+
+async def main():
+    args = parse_args()
+    setup_database(args, "load")
+    os.environ.setdefault("SLOW_QUERY_LOG_ENABLED", "false")
+
+    import httpx
+    from app.config import settings
+    from app.database.base import create_tables, engine
+    from app.main import app
+    from app.services.synthetic_data import SYNTHETIC_PASSWORD, dataset_counts, load_dataset
+    from app.utils.auth import get_password_hash
+
+    create_tables()
+    counts = dataset_counts(args.items)
+    if not args.skip_seed:
+        started = time.perf_counter()
+        loaded = load_dataset(
+            engine, args.items, seed=args.seed, password_hash=get_password_hash(SYNTHETIC_PASSWORD)
+        )
+        print(json.dumps({"seeded": loaded, "seconds": round(time.perf_counter() - started, 2)}), file=sys.stderr)
+
+    commit = git_commit()
+    workloads = make_workloads(settings.API_V1_STR, counts, args)
+    results = []
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(
+        transport=transport, base_url="http://bench", timeout=None,
+        headers={"Authorization": "Bearer benchmark"}
+    ) as client:
+        for name in args.workloads:
+            result = {"commit": commit, "items": args.items, **await run_workload(client, name, workloads[name], args)}
+            results.append(result)
+            print(json.dumps(result))
+
+    if args.output:
+        with open(args.output, "w") as f:
+            f.writelines(json.dumps(result) + "\n" for result in results)
+    if args.baseline:
+        found = regressions(results, args.baseline, args.tolerance)
+        for line in found:
+            print(f"Regression: {line}", file=sys.stderr)
+        if found:
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,121 @@
+#!/usr/bin/env python3
+"""
+Login burst concurrency benchmark.
+
+Fires bursts of concurrent logins at the app in-process (httpx.AsyncClient
+over ASGI) while a probe keeps requesting /health, and reports the probe's
+latency during the bursts, measured from when each probe was due. It runs
+twice: against a reproduction of the old blocking login (async route calling
+the sync session and bcrypt inline) and against the real async /auth/login,
+printing one JSON line each.
+
+    python benchmarks/login_concurrency.py --concurrency 20 --rounds 3
+"""
+
+import argparse
+import asyncio
+import json
+import statistics
+import time
+
+from _common import percentile, setup_database
+
+USERNAME = "bench"
+PASSWORD = "bench-password"
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--concurrency", type=int, default=20, help="Logins per burst")
+    parser.add_argument("--rounds", type=int, default=3, help="Bursts per scenario")
+    parser.add_argument("--probe-interval", type=float, default=0.005, help="Seconds between probe requests")
+    parser.add_argument("--database-url", help="Database to run against (default: throwaway SQLite)")
+    return parser.parse_args()
+
+
+async def run_scenario(client, name, login_path, args):
+    probe_latencies = []
+    login_latencies = []
+    done = asyncio.Event()
+
+    async def probe():
+        # Latency is measured from when each probe was due, so time spent
+        # waiting for a blocked event loop counts against it
+        due = time.perf_counter()
+        while not done.is_set():
+            await client.get("/health")
+            probe_latencies.append((time.perf_counter() - due) * 1000)
+            due = max(due + args.probe_interval, time.perf_counter())
+            await asyncio.sleep(max(0.0, due - time.perf_counter()))
+
+    async def login():
+        started = time.perf_counter()
+        response = await client.post(login_path, data={"username": USERNAME, "password": PASSWORD})
+        response.raise_for_status()
+        login_latencies.append((time.perf_counter() - started) * 1000)
+
+    probe_task = asyncio.create_task(probe())
+    started = time.perf_counter()
+    for _ in range(args.rounds):
+        await asyncio.gather(*(login() for _ in range(args.concurrency)))
+    elapsed = time.perf_counter() - started
+    done.set()
+    await probe_task
+
+    return {
+        "scenario": name,
+        "logins": len(login_latencies),
+        "logins_per_second": round(len(login_latencies) / elapsed, 2),
+        "login_p50_ms": round(statistics.median(login_latencies), 2),
+        "probe_requests": len(probe_latencies),
+        "probe_p50_ms": round(statistics.median(probe_latencies), 2),
+        "probe_p95_ms": round(percentile(probe_latencies, 0.95), 2),
+        "probe_p99_ms": round(percentile(probe_latencies, 0.99), 2),
+        "probe_max_ms": round(max(probe_latencies), 2),
+    }
+
+
+async def main():
+    args = parse_args()
+    setup_database(args, "login")
+
+    import httpx
+    from fastapi import Depends, HTTPException
+    from fastapi.security import OAuth2PasswordRequestForm
+    from sqlalchemy.orm import Session
+    from app.config import settings
+    from app.database.base import SessionLocal, create_tables, get_db
+    from app.main import app
+    from app.models.models import User
+    from app.utils.auth import authenticate_user, create_access_token, get_password_hash
+
+    create_tables()
+    with SessionLocal() as db:
+        if not db.query(User).filter(User.username == USERNAME).first():
+            db.add(User(
+                username=USERNAME,
+                email="bench@example.com",
+                hashed_password=get_password_hash(PASSWORD),
+                is_active=True
+            ))
+            db.commit()
+
+    # The login route as it was before the async port, for comparison
+    @app.post("/bench/blocking-login")
+    async def blocking_login(form_data: OAuth2PasswordRequestForm = Depends(), db: Session = Depends(get_db)):
+        user = authenticate_user(db, form_data.username, form_data.password)
+        if not user:
+            raise HTTPException(status_code=401, detail="Incorrect username or password")
+        return {"access_token": create_access_token(data={"sub": user.username}), "token_type": "bearer"}
+
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench", timeout=None) as client:
+        for name, path in (
+            ("blocking", "/bench/blocking-login"),
+            ("async", f"{settings.API_V1_STR}/auth/login"),
+        ):
+            print(json.dumps(await run_scenario(client, name, path, args)))
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,96 @@
+#!/usr/bin/env python3
+"""
+Low-stock query benchmark.
+
+Seeds a large number of inventory items, a small share of them below their
+minimum stock level, then times the global and per-inventory low-stock
+queries page by page and prints the plan the database picked for them.
+
+    python benchmarks/low_stock.py --items 1000000 --low-share 0.01
+"""
+
+import argparse
+import json
+import random
+import statistics
+import time
+
+from _common import setup_database
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--items", type=int, default=200000)
+    parser.add_argument("--inventories", type=int, default=20)
+    parser.add_argument("--low-share", type=float, default=0.01, help="Share of items below their minimum")
+    parser.add_argument("--limit", type=int, default=100, help="Page size")
+    parser.add_argument("--pages", type=int, default=20, help="Pages to time per query")
+    parser.add_argument("--database-url", help="Database to run against (default: throwaway SQLite)")
+    return parser.parse_args()
+
+
+def main():
+    args = parse_args()
+    setup_database(args, "low_stock")
+
+    from sqlalchemy import text
+    from app.database.base import SessionLocal, create_tables, engine
+    from app.models.models import InventoryGroup, InventoryItem
+    from app.services.low_stock import LOW_STOCK, low_stock_page
+
+    create_tables()
+    rng = random.Random(1)
+    with SessionLocal() as db:
+        db.execute(InventoryGroup.__table__.insert(), [{"name": f"Inventory {i}"} for i in range(args.inventories)])
+        batch = []
+        for i in range(args.items):
+            low = rng.random() < args.low_share
+            batch.append({
+                "inventory_id": i % args.inventories + 1,
+                "name": f"Item {i}",
+                "quantity": rng.randint(0, 9) if low else rng.randint(10, 500),
+                "min_stock_level": 10,
+                "max_stock_level": 1000,
+            })
+            if len(batch) == 10000:
+                db.execute(InventoryItem.__table__.insert(), batch)
+                batch = []
+        if batch:
+            db.execute(InventoryItem.__table__.insert(), batch)
+        db.commit()
+        if engine.dialect.name == "postgresql":
+            db.execute(text("ANALYZE inventory_items"))
+        else:
+            db.execute(text("ANALYZE"))
+        db.commit()
+
+    def time_pages(inventory_id=None):
+        timings, rows, cursor = [], 0, None
+        with SessionLocal() as db:
+            for _ in range(args.pages):
+                started = time.perf_counter()
+                items, cursor = low_stock_page(db, args.limit, cursor, inventory_id=inventory_id)
+                timings.append((time.perf_counter() - started) * 1000)
+                rows += len(items)
+                if cursor is None:
+                    break
+        return {"pages": len(timings), "rows": rows,
+                "page_p50_ms": round(statistics.median(timings), 3), "page_max_ms": round(max(timings), 3)}
+
+    def plan(inventory_id=None):
+        with SessionLocal() as db:
+            statement = db.query(InventoryItem.id).filter(LOW_STOCK)
+            if inventory_id is not None:
+                statement = statement.filter(InventoryItem.inventory_id == inventory_id)
+            compiled = statement.order_by(InventoryItem.id).limit(args.limit).statement.compile(
+                engine, compile_kwargs={"literal_binds": True}
+            )
+            prefix = "EXPLAIN QUERY PLAN " if engine.dialect.name == "sqlite" else "EXPLAIN "
+            return [" ".join(str(part) for part in row) for row in db.execute(text(prefix + str(compiled)))]
+
+    for name, inventory_id in (("global", None), ("per_inventory", 1)):
+        print(json.dumps({"query": name, "items": args.items, **time_pages(inventory_id), "plan": plan(inventory_id)}))
+
+
+if __name__ == "__main__":
+    main()
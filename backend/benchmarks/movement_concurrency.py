@@ -0,0 +1,138 @@
+#!/usr/bin/env python3
+"""
+Inventory movement concurrency stress test.
+
+Many threads hammer the same item with IN and OUT movements at once, then
+the item's quantity is checked against the ledger: it must equal the
+starting quantity plus the sum of every recorded movement, and must never
+have gone negative. Runs twice, against a reproduction of the old
+read-modify-write update and against the movement ledger, printing one
+JSON line each. Exits non-zero if the ledger scenario loses an update.
+
+    python benchmarks/movement_concurrency.py --threads 16 --writes 200
+"""
+
+import argparse
+import json
+import random
+import sys
+import threading
+import time
+
+from _common import setup_database
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--threads", type=int, default=16, help="Concurrent writers")
+    parser.add_argument("--writes", type=int, default=200, help="Movements per writer")
+    parser.add_argument("--initial-quantity", type=int, default=50)
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--database-url", help="Database to run against (default: throwaway SQLite)")
+    return parser.parse_args()
+
+
+def main():
+    args = parse_args()
+    setup_database(args, "movement")
+
+    from fastapi import HTTPException
+    from sqlalchemy import func
+    from app.database.base import SessionLocal, create_tables
+    from app.models.models import InventoryGroup, InventoryItem, InventoryMovement, MovementType
+    from app.schemas.schemas import InventoryMovementCreate
+    from app.services.movements import record_movement
+
+    create_tables()
+
+    def read_modify_write(db, inventory_id, item_id, movement):
+        # What PUT /items/{id} with a computed quantity used to amount to
+        item = db.query(InventoryItem).filter(InventoryItem.id == item_id).first()
+        delta = movement.quantity if movement.movement_type == MovementType.IN else -movement.quantity
+        if item.quantity + delta < 0:
+            raise HTTPException(status_code=400, detail="Insufficient stock")
+        item.quantity = item.quantity + delta
+        db.add(InventoryMovement(
+            inventory_item_id=item_id,
+            movement_type=movement.movement_type,
+            quantity=delta,
+            balance_after=item.quantity
+        ))
+
+    def run_scenario(name, apply):
+        with SessionLocal() as db:
+            group = InventoryGroup(name=f"Stress {name}")
+            db.add(group)
+            db.flush()
+            item = InventoryItem(inventory_id=group.id, name="Contended item", quantity=args.initial_quantity)
+            db.add(item)
+            db.commit()
+            inventory_id, item_id = group.id, item.id
+
+        counts = {"accepted": 0, "rejected": 0, "errors": 0}
+        lock = threading.Lock()
+        start = threading.Barrier(args.threads)
+
+        def writer(index):
+            rng = random.Random(args.seed * 1000 + index)
+            start.wait()
+            for _ in range(args.writes):
+                movement = InventoryMovementCreate(
+                    movement_type=rng.choice((MovementType.IN, MovementType.OUT)),
+                    quantity=rng.randint(1, 5)
+                )
+                outcome = "accepted"
+                with SessionLocal() as db:
+                    try:
+                        apply(db, inventory_id, item_id, movement)
+                        db.commit()
+                    except HTTPException:
+                        db.rollback()
+                        outcome = "rejected"
+                    except Exception:
+                        db.rollback()
+                        outcome = "errors"
+                with lock:
+                    counts[outcome] += 1
+
+        threads = [threading.Thread(target=writer, args=(index,)) for index in range(args.threads)]
+        started = time.perf_counter()
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        elapsed = time.perf_counter() - started
+
+        with SessionLocal() as db:
+            quantity = db.query(InventoryItem.quantity).filter(InventoryItem.id == item_id).scalar()
+            recorded, ledger_sum, lowest = db.query(
+                func.count(InventoryMovement.id),
+                func.coalesce(func.sum(InventoryMovement.quantity), 0),
+                func.min(InventoryMovement.balance_after)
+            ).filter(InventoryMovement.inventory_item_id == item_id).one()
+
+        expected = args.initial_quantity + ledger_sum
+        return {
+            "scenario": name,
+            **counts,
+            "writes_per_second": round((counts["accepted"] + counts["rejected"]) / elapsed, 1),
+            "ledger_rows": recorded,
+            "final_quantity": quantity,
+            "expected_quantity": expected,
+            "lost_updates": expected != quantity or recorded != counts["accepted"],
+            "lowest_balance": lowest,
+        }
+
+    results = [
+        run_scenario("read_modify_write", read_modify_write),
+        run_scenario("ledger", lambda db, inventory_id, item_id, movement: record_movement(db, inventory_id, item_id, movement)),
+    ]
+    for result in results:
+        print(json.dumps(result))
+    ledger = results[-1]
+    if ledger["lost_updates"] or ledger["errors"] or (ledger["lowest_balance"] or 0) < 0:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,91 @@
+#!/usr/bin/env python3
+"""
+Product search latency benchmark.
+
+Grows the products table through the given sizes and times the indexed
+search at each step, printing one JSON line per size. With the search
+indexes in place the latency should stay roughly flat as the table grows.
+
+    python benchmarks/product_search.py --sizes 1000 10000 100000
+    python benchmarks/product_search.py --database-url postgresql://...
+
+Without --database-url a throwaway SQLite database is used, which exercises
+the FTS5 fallback.
+"""
+
+import argparse
+import json
+import random
+import time
+
+from _common import percentile, setup_database
+
+QUERIES = ["widget", "usb cable", "SKU-0000042", "desk lamp", "charger"]
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sizes", type=int, nargs="+", default=[1000, 10000, 100000])
+    parser.add_argument("--repeat", type=int, default=20, help="Timed runs per query and size")
+    parser.add_argument("--limit", type=int, default=100, help="Page size of each search")
+    parser.add_argument("--database-url", help="Database to benchmark (its products table is dropped)")
+    return parser.parse_args()
+
+
+def main():
+    args = parse_args()
+    setup_database(args, "search")
+
+    from sqlalchemy import text
+    from sqlalchemy.orm import Session
+    from app.database.base import Base, engine
+    from app.models.models import Product
+    from app.services.product_search import search_products
+    from app.services.synthetic_data import WORDS
+
+    Base.metadata.drop_all(bind=engine)
+    Base.metadata.create_all(bind=engine)
+
+    rng = random.Random(42)
+    rows = 0
+    with Session(engine) as db:
+        for size in sorted(args.sizes):
+            batch = []
+            while rows < size:
+                rows += 1
+                words = rng.sample(WORDS, 3)
+                batch.append({
+                    "name": " ".join(words).title(),
+                    "description": f"{words[0]} for {rng.choice(WORDS)} use",
+                    "sku": f"SKU-{rows:07d}",
+                    "barcode": f"{rng.randrange(10 ** 12):012d}",
+                    "is_active": True,
+                })
+                if len(batch) == 5000 or rows == size:
+                    db.execute(Product.__table__.insert(), batch)
+                    batch = []
+            if engine.dialect.name == "postgresql":
+                db.execute(text("ANALYZE products"))
+            db.commit()
+
+            timings = []
+            for term in QUERIES:
+                for _ in range(args.repeat):
+                    started = time.perf_counter()
+                    query, ranking = search_products(db, db.query(Product), term)
+                    query.order_by(*ranking, Product.id).limit(args.limit).all()
+                    timings.append((time.perf_counter() - started) * 1000)
+                    db.expunge_all()
+
+            print(json.dumps({
+                "dialect": engine.dialect.name,
+                "products": size,
+                "queries": len(timings),
+                "p50_ms": round(percentile(timings, 0.50), 3),
+                "p95_ms": round(percentile(timings, 0.95), 3),
+                "max_ms": round(max(timings), 3),
+            }))
+
+
+if __name__ == "__main__":
+    main()
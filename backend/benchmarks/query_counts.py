@@ -0,0 +1,91 @@
+#!/usr/bin/env python3
+"""
+Statement budget check for the list endpoints.
+
+Seeds a synthetic dataset (app.services.synthetic_data) and requests the
+product list and an inventory's item list under assert_max_queries, with
+the reference cache cold so the count is the worst case. The budgets only
+grow with selectinload's batches, never per row, so a relationship that
+starts lazy loading per row (N+1 queries) makes the script exit non-zero
+and print the statements it saw.
+
+    python benchmarks/query_counts.py
+    python benchmarks/query_counts.py --items 20000
+"""
+
+import argparse
+import json
+import math
+import os
+import sys
+
+from _common import setup_database
+
+# Products: the page, then categories and suppliers for the cold reference
+# cache. Items: the ETag watermark and the items, plus their tags
+LIST_PRODUCTS_BUDGET = 3
+LIST_ITEMS_BUDGET = 2
+# selectinload fetches a relationship for this many parent rows per statement
+SELECTIN_BATCH_SIZE = 500
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--items", type=int, default=2000, help="Inventory items in the dataset")
+    parser.add_argument("--limit", type=int, default=100, help="Page size of the product list")
+    parser.add_argument("--database-url", help="Database to run against (default: throwaway SQLite)")
+    return parser.parse_args()
+
+
+def main():
+    args = parse_args()
+    setup_database(args, "query_counts")
+    os.environ.setdefault("SLOW_QUERY_LOG_ENABLED", "false")
+
+    from fastapi.testclient import TestClient
+    from app.config import settings
+    from app.database.base import create_tables, engine
+    from app.main import app
+    from app.services.reference_cache import reference_cache
+    from app.services.synthetic_data import dataset_counts, load_dataset
+    from app.utils.query_counter import assert_max_queries
+
+    create_tables()
+    load_dataset(engine, args.items)
+
+    # Items are spread round-robin over the inventories; the first gets the most
+    counts = dataset_counts(args.items)
+    inventory_items = math.ceil(counts["inventory_items"] / counts["inventories"])
+    endpoints = {
+        "list_products": (
+            f"{settings.API_V1_STR}/products?limit={args.limit}",
+            LIST_PRODUCTS_BUDGET
+        ),
+        "list_items": (
+            f"{settings.API_V1_STR}/inventory/inventories/1/items",
+            LIST_ITEMS_BUDGET + math.ceil(inventory_items / SELECTIN_BATCH_SIZE)
+        ),
+    }
+    failed = False
+    with TestClient(app, headers={"Authorization": "Bearer benchmark"}) as client:
+        for name, (url, budget) in endpoints.items():
+            reference_cache.invalidate_all()
+            try:
+                with assert_max_queries(budget) as counter:
+                    response = client.get(url)
+                    response.raise_for_status()
+            except AssertionError as e:
+                print(f"{name}: {e}", file=sys.stderr)
+                failed = True
+            print(json.dumps({
+                "endpoint": name,
+                "rows": len(response.json()),
+                "statements": counter.count,
+                "budget": budget,
+            }))
+    if failed:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
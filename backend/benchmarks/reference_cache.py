@@ -0,0 +1,80 @@
+#!/usr/bin/env python3
+"""
+Reference-data cache benchmark.
+
+Counts the SQL statements and time per request for product reads with the
+reference cache warm, and with it invalidated before every request (which
+costs what loading category and supplier per request did before the
+cache). Prints one JSON line per endpoint.
+
+    python benchmarks/reference_cache.py --products 1000 --requests 200
+"""
+
+import argparse
+import json
+import time
+
+from _common import setup_database
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--products", type=int, default=1000)
+    parser.add_argument("--categories", type=int, default=50)
+    parser.add_argument("--suppliers", type=int, default=50)
+    parser.add_argument("--requests", type=int, default=200, help="Requests per endpoint and mode")
+    parser.add_argument("--database-url", help="Database to run against (default: throwaway SQLite)")
+    return parser.parse_args()
+
+
+def main():
+    args = parse_args()
+    setup_database(args, "reference")
+
+    from fastapi.testclient import TestClient
+    from app.config import settings
+    from app.database.base import SessionLocal, create_tables
+    from app.main import app
+    from app.models.models import Category, Product, Supplier
+    from app.services.reference_cache import reference_cache
+    from app.utils.query_counter import count_queries
+
+    create_tables()
+    with SessionLocal() as db:
+        db.execute(Category.__table__.insert(), [{"name": f"Category {i}"} for i in range(args.categories)])
+        db.execute(Supplier.__table__.insert(), [{"name": f"Supplier {i}"} for i in range(args.suppliers)])
+        db.execute(Product.__table__.insert(), [
+            {
+                "name": f"Product {i}",
+                "sku": f"SKU-{i:07d}",
+                "category_id": i % args.categories + 1,
+                "supplier_id": i % args.suppliers + 1,
+                "is_active": True,
+            }
+            for i in range(args.products)
+        ])
+        db.commit()
+
+    endpoints = {
+        "list_products": f"{settings.API_V1_STR}/products?limit=100",
+        "get_product": f"{settings.API_V1_STR}/products/1",
+    }
+    with TestClient(app, headers={"Authorization": "Bearer benchmark"}) as client:
+        for name, url in endpoints.items():
+            result = {"endpoint": name}
+            for mode in ("cold", "warm"):
+                client.get(url).raise_for_status()
+                with count_queries() as counter:
+                    started = time.perf_counter()
+                    for _ in range(args.requests):
+                        if mode == "cold":
+                            reference_cache.invalidate_all()
+                        client.get(url).raise_for_status()
+                    elapsed = time.perf_counter() - started
+                result[f"{mode}_queries_per_request"] = counter.count / args.requests
+                result[f"{mode}_ms_per_request"] = round(elapsed * 1000 / args.requests, 3)
+            print(json.dumps(result))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,146 @@
+#!/usr/bin/env python3
+"""
+List serialization benchmark.
+
+Seeds an inventory with items, tags, movements and products, then for
+each list endpoint times encoding the same rows the FastAPI default way
+(validate against the response schema, jsonable_encoder, json.dumps)
+and with ModelSerializer + orjson, and measures end-to-end requests per
+second through the app. Prints one JSON line per endpoint.
+
+    python benchmarks/serialization.py --items 5000 --repeat 20
+"""
+
+import argparse
+import json
+import time
+from typing import List, Tuple
+
+from _common import setup_database
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--items", type=int, default=5000, help="Inventory items (and products) to seed")
+    parser.add_argument("--repeat", type=int, default=20, help="Timed runs per measurement")
+    parser.add_argument("--database-url", help="Database to run against (default: throwaway SQLite)")
+    return parser.parse_args()
+
+
+def seed(db, count: int) -> Tuple[int, int]:
+    from sqlalchemy import insert
+    from app.models.models import InventoryGroup, InventoryItem, InventoryMovement, MovementType, Product, Tag, inventory_tags
+
+    inventory_id = db.execute(
+        insert(InventoryGroup).values(name="Serialization bench").returning(InventoryGroup.id)
+    ).scalar_one()
+    db.execute(insert(InventoryItem), [
+        {
+            "inventory_id": inventory_id, "name": f"Item {i}", "description": f"Description {i}",
+            "category": f"Category {i % 20}", "quantity": i % 50, "min_stock_level": 10, "max_stock_level": 1000
+        }
+        for i in range(count)
+    ])
+    item_ids = [row.id for row in db.query(InventoryItem.id).filter(InventoryItem.inventory_id == inventory_id)]
+    tag_ids = db.execute(
+        insert(Tag).returning(Tag.id), [{"name": f"bench-tag-{i}"} for i in range(10)]
+    ).scalars().all()
+    db.execute(insert(inventory_tags), [
+        {"inventory_id": item_id, "tag_id": tag_ids[(item_id + k) % len(tag_ids)]}
+        for item_id in item_ids for k in range(2)
+    ])
+    db.execute(insert(InventoryMovement), [
+        {
+            "inventory_item_id": item_ids[0], "movement_type": MovementType.ADJUSTMENT,
+            "quantity": 1, "balance_after": i, "reference_number": f"R{i}"
+        }
+        for i in range(min(count, 1000))
+    ])
+    db.execute(insert(Product), [
+        {"name": f"Product {i}", "sku": f"BENCH-{i}", "unit_price": "9.99", "cost_price": "4.50"}
+        for i in range(count)
+    ])
+    db.commit()
+    return inventory_id, item_ids[0]
+
+
+def timed(fn, repeat: int) -> float:
+    fn()
+    started = time.perf_counter()
+    for _ in range(repeat):
+        fn()
+    return (time.perf_counter() - started) / repeat
+
+
+def main():
+    args = parse_args()
+    setup_database(args, "serialization")
+
+    from fastapi.encoders import jsonable_encoder
+    from fastapi.testclient import TestClient
+    from pydantic import TypeAdapter
+    from sqlalchemy.orm import selectinload
+    from app.config import settings
+    from app.database.base import SessionLocal
+    from app.main import app
+    from app.models.models import InventoryGroup, InventoryItem, InventoryMovement, Product
+    from app.routers.products import product_responses
+    from app.schemas import schemas
+    from app.utils.serialization import dumps, serialize
+
+    with TestClient(app, headers={"Authorization": "Bearer benchmark"}) as client, SessionLocal() as db:
+        inventory_id, item_id = seed(db, args.items)
+        items_url = f"{settings.API_V1_STR}/inventory/inventories/{inventory_id}/items"
+        cases = [
+            (
+                "items", items_url, schemas.InventoryItem,
+                db.query(InventoryItem).options(selectinload(InventoryItem.tags))
+                .filter(InventoryItem.inventory_id == inventory_id).all()
+            ),
+            (
+                "low_stock", f"{items_url}/low-stock?limit=1000", schemas.InventoryItem,
+                db.query(InventoryItem).options(selectinload(InventoryItem.tags))
+                .filter(InventoryItem.quantity < InventoryItem.min_stock_level).limit(1000).all()
+            ),
+            (
+                "movements", f"{items_url}/{item_id}/movements?limit=1000", schemas.InventoryMovement,
+                db.query(InventoryMovement).filter(InventoryMovement.inventory_item_id == item_id).limit(1000).all()
+            ),
+            (
+                "products", f"{settings.API_V1_STR}/products?limit=1000", schemas.Product,
+                db.query(Product).order_by(Product.id).limit(1000).all()
+            ),
+            ("inventories", f"{settings.API_V1_STR}/inventories", schemas.InventoryGroup, db.query(InventoryGroup).all()),
+        ]
+
+        for name, url, schema, rows in cases:
+            adapter = TypeAdapter(List[schema])
+
+            def default_path():
+                return json.dumps(jsonable_encoder(adapter.validate_python(rows, from_attributes=True))).encode()
+
+            def fast_path():
+                if schema is schemas.Product:
+                    return dumps(product_responses(db, rows))
+                return dumps(serialize(schema, rows))
+
+            assert json.loads(default_path()) == json.loads(fast_path()), f"{name}: outputs differ"
+            default_seconds = timed(default_path, args.repeat)
+            fast_seconds = timed(fast_path, args.repeat)
+
+            def request():
+                client.get(url).raise_for_status()
+
+            request_seconds = timed(request, args.repeat)
+            print(json.dumps({
+                "endpoint": name,
+                "rows": len(rows),
+                "default_ms": round(default_seconds * 1000, 2),
+                "fast_ms": round(fast_seconds * 1000, 2),
+                "speedup": round(default_seconds / fast_seconds, 1),
+                "requests_per_second": round(1 / request_seconds, 1)
+            }))
+
+
+if __name__ == "__main__":
+    main()
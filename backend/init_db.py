@@ -2,15 +2,24 @@
 """
 Database initialization script for Register Inventory Management System
 Creates initial admin user and sample data
+
+With --scale N, first loads a deterministic synthetic dataset of N inventory
+items (plus users, categories, suppliers, products, tags and movements
+scaled from it) into an empty database, e.g. to stand up staging with
+production volumes. On PostgreSQL it is streamed in with COPY from
+parallel worker processes.
 """
 
+import argparse
 import sys
 import os
+import time
 sys.path.append(os.path.dirname(os.path.abspath(__file__)))
 
 from sqlalchemy.orm import Session
 from app.database.base import engine, create_tables
 from app.models.models import User, Category, Supplier, Location
+from app.services.synthetic_data import SYNTHETIC_PASSWORD, bulk_load_dataset
 from app.utils.auth import get_password_hash
 
 
@@ -42,11 +51,8 @@ def create_sample_categories(db: Session):
         {"name": "Clothing", "description": "Clothing and apparel"},
     ]
     
-    for cat_data in categories:
-        category = db.query(Category).filter(Category.name == cat_data["name"]).first()
-        if not category:
-            category = Category(**cat_data)
-            db.add(category)
+    existing = {name for (name,) in db.query(Category.name)}
+    db.add_all(Category(**cat_data) for cat_data in categories if cat_data["name"] not in existing)
     
     print("✓ Created sample categories")
 
@@ -77,11 +83,8 @@ def create_sample_suppliers(db: Session):
         },
     ]
     
-    for sup_data in suppliers:
-        supplier = db.query(Supplier).filter(Supplier.name == sup_data["name"]).first()
-        if not supplier:
-            supplier = Supplier(**sup_data)
-            db.add(supplier)
+    existing = {name for (name,) in db.query(Supplier.name)}
+    db.add_all(Supplier(**sup_data) for sup_data in suppliers if sup_data["name"] not in existing)
     
     print("✓ Created sample suppliers")
 
@@ -103,22 +106,48 @@ def create_sample_locations(db: Session):
         },
     ]
     
-    for loc_data in locations:
-        location = db.query(Location).filter(Location.name == loc_data["name"]).first()
-        if not location:
-            location = Location(**loc_data)
-            db.add(location)
+    existing = {name for (name,) in db.query(Location.name)}
+    db.add_all(Location(**loc_data) for loc_data in locations if loc_data["name"] not in existing)
     
     print("✓ Created sample locations")
 
 
+def load_synthetic_data(items: int, workers: int, seed: int):
+    """Bulk load a synthetic dataset of `items` inventory items"""
+    started = time.perf_counter()
+    bulk_load_dataset(
+        engine,
+        items,
+        seed=seed,
+        workers=workers,
+        password_hash=get_password_hash(SYNTHETIC_PASSWORD),
+        progress=lambda table, rows: print(f"✓ Loaded {table}: {rows}")
+    )
+    print(f"✓ Synthetic dataset loaded in {time.perf_counter() - started:.1f}s "
+          f"(users user1.. share password '{SYNTHETIC_PASSWORD}')")
+
+
 def main():
     """Initialize database with sample data"""
+    parser = argparse.ArgumentParser(description="Initialize the database with an admin user and sample data")
+    parser.add_argument("--scale", type=int, help="Also load a synthetic dataset with this many inventory items")
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 4,
+                        help="Parallel loader processes for --scale")
+    parser.add_argument("--seed", type=int, default=0, help="Seed of the synthetic dataset")
+    args = parser.parse_args()
+
     print("🚀 Initializing Register Inventory Management Database...")
     
     # Create tables
     create_tables()
     print("✓ Database tables created")
+
+    if args.scale:
+        try:
+            load_synthetic_data(args.scale, args.workers, args.seed)
+        except Exception as e:
+            print(f"❌ Error while loading synthetic data: {e}")
+            sys.exit(1)
     
     # Create session
     db = Session(engine)
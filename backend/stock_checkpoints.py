@@ -0,0 +1,40 @@
+#!/usr/bin/env python3
+"""
+Stock checkpoint maintenance for Register Inventory Management System
+Run periodically (e.g. from cron) to roll checkpoints forward, or with
+--rebuild to recompute them from the whole movement ledger
+"""
+
+import argparse
+import sys
+import os
+import time
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from app.config import settings
+from app.database.base import create_tables
+from app.services.stock_checkpoints import roll_up_checkpoints
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Roll up or rebuild stock checkpoints")
+    parser.add_argument("--rebuild", action="store_true", help="Drop and recompute every checkpoint")
+    parser.add_argument("--workers", type=int, default=settings.STOCK_REBUILD_WORKERS,
+                        help="Item id ranges processed in parallel")
+    parser.add_argument("--every", type=int, default=settings.STOCK_CHECKPOINT_EVERY,
+                        help="Movements per item between two checkpoints")
+    args = parser.parse_args()
+
+    create_tables()
+    started = time.perf_counter()
+    try:
+        written = roll_up_checkpoints(workers=args.workers, every=args.every, rebuild=args.rebuild)
+    except Exception as e:
+        print(f"❌ Error while writing checkpoints: {e}")
+        sys.exit(1)
+    action = "Rebuilt" if args.rebuild else "Rolled up"
+    print(f"✓ {action} stock checkpoints: {written} written in {time.perf_counter() - started:.2f}s")
+
+
+if __name__ == "__main__":
+    main()
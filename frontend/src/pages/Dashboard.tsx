@@ -1,4 +1,4 @@
-import React from 'react';
+import React, { useEffect, useState } from 'react';
 import {
   Box,
   Grid,
@@ -13,6 +13,17 @@ import {
   Warning as WarningIcon,
   TrendingUp as TrendingUpIcon,
 } from '@mui/icons-material';
+import axios from 'axios';
+
+const API_BASE_URL = process.env.REACT_APP_API_URL || 'http://localhost:8000';
+
+interface DashboardStats {
+  total_products: number;
+  total_items: number;
+  total_units: number;
+  low_stock_items: number;
+  stock_value: string;
+}
 
 interface StatCardProps {
   title: string;
@@ -53,29 +64,39 @@ const StatCard: React.FC<StatCardProps> = ({ title, value, icon, color }) => (
 );
 
 const Dashboard: React.FC = () => {
-  // Mock data - in real app, this would come from API calls
+  const [data, setData] = useState<DashboardStats | null>(null);
+
+  // One aggregated request instead of pulling full lists to count client-side
+  useEffect(() => {
+    axios.get(`${API_BASE_URL}/api/v1/stats`)
+      .then(res => setData(res.data))
+      .catch(() => setData(null));
+  }, []);
+
+  const format = (value: number | undefined) => (value === undefined ? '—' : value.toLocaleString());
+
   const stats = [
     {
       title: 'Total Products',
-      value: '1,234',
+      value: format(data?.total_products),
       icon: <ProductsIcon />,
       color: '#1976d2',
     },
     {
       title: 'Total Stock Value',
-      value: '$45,678',
+      value: data ? `$${Number(data.stock_value).toLocaleString(undefined, { minimumFractionDigits: 2 })}` : '—',
       icon: <InventoryIcon />,
       color: '#388e3c',
     },
     {
       title: 'Low Stock Items',
-      value: '23',
+      value: format(data?.low_stock_items),
       icon: <WarningIcon />,
       color: '#f57c00',
     },
     {
-      title: 'Monthly Sales',
-      value: '$12,345',
+      title: 'Units in Stock',
+      value: format(data?.total_units),
       icon: <TrendingUpIcon />,
       color: '#7b1fa2',
     },